@@ -0,0 +1,101 @@
+import asyncio
+import time
+from typing import Any, Callable, Optional, Sequence
+
+from app import metrics
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-item requests into vectorized batches.
+
+    Items submitted within ``max_wait_ms`` of the first queued item (or until
+    ``max_batch_size`` items are waiting) are handed to ``batch_fn`` in one call.
+    ``batch_fn`` runs in a worker thread so the event loop stays responsive and
+    must return one result per input, in order.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[list], Sequence[Any]],
+        max_batch_size: int = 64,
+        max_wait_ms: float = 5.0,
+        name: str = "batcher",
+    ):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+        self.queue_depth = metrics.gauge(
+            f"{name}_queue_depth", "Items waiting to be batched"
+        )
+        self.batch_size = metrics.histogram(
+            f"{name}_batch_size",
+            "Items per dispatched batch",
+            BATCH_SIZE_BUCKETS,
+        )
+        self.wait_time = metrics.histogram(
+            f"{name}_wait_seconds", "Time an item waited before dispatch"
+        )
+        self.batch_time = metrics.histogram(
+            f"{name}_batch_seconds", "Time spent running one batch"
+        )
+
+    def _ensure_worker(self) -> asyncio.Queue:
+        # Bind the queue and worker to the loop currently running
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+        return self._queue  # pyright: ignore
+
+    async def submit(self, item: Any) -> Any:
+        """Queues ``item`` and waits for its result from the next batch."""
+        queue = self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await queue.put((item, future, time.perf_counter()))
+        self.queue_depth.set(queue.qsize())
+        return await future
+
+    async def _collect(self, queue: asyncio.Queue) -> list:
+        batch = [await queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+
+        self.queue_depth.set(queue.qsize())
+        return batch
+
+    async def _run(self):
+        queue = self._queue
+        while True:
+            batch = await self._collect(queue)  # pyright: ignore
+
+            dispatched_at = time.perf_counter()
+            for _, _, enqueued_at in batch:
+                self.wait_time.observe(dispatched_at - enqueued_at)
+            self.batch_size.observe(len(batch))
+
+            items = [item for item, _, _ in batch]
+            try:
+                results = await asyncio.to_thread(self.batch_fn, items)
+            except Exception as e:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            else:
+                for (_, future, _), result in zip(batch, results):
+                    if not future.done():
+                        future.set_result(result)
+            finally:
+                self.batch_time.observe(time.perf_counter() - dispatched_at)
@@ -20,3 +20,113 @@ if not all([DB_NAME, DB_USER, DB_PASS, DB_HOST, DB_PORT]):
     raise ValueError(
         "One or more required database environment variables are missing!"
     )
+
+# Same database through the asyncpg driver, for the async endpoints
+ASYNC_DATABASE_URL = DATABASE_URL.replace(
+    "postgresql://", "postgresql+asyncpg://", 1
+)
+
+# Connection pool of each engine (sync and async), the server-side statement
+# timeout in milliseconds (0: none) and SQL statement logging
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() == "true"
+
+# Location of the trained classifier artifact
+MODEL_PATH = os.getenv("MODEL_PATH", "app/trained_models/trained_model.pkl")
+
+# Maximum number of documents accepted by one batch classification request
+CLASSIFY_MAX_BATCH_SIZE = int(os.getenv("CLASSIFY_MAX_BATCH_SIZE", "5000"))
+
+# Micro-batching of concurrent single-document classifications
+CLASSIFY_COALESCE_MAX_BATCH = int(
+    os.getenv("CLASSIFY_COALESCE_MAX_BATCH", "64")
+)
+CLASSIFY_COALESCE_MAX_WAIT_MS = float(
+    os.getenv("CLASSIFY_COALESCE_MAX_WAIT_MS", "5")
+)
+
+# Publication crawler: pages in flight, per-host request rate and retries
+SCRAPE_CONCURRENCY = int(os.getenv("SCRAPE_CONCURRENCY", "4"))
+SCRAPE_RATE_PER_HOST = float(os.getenv("SCRAPE_RATE_PER_HOST", "1.0"))
+SCRAPE_RATE_BURST = float(os.getenv("SCRAPE_RATE_BURST", "2"))
+SCRAPE_MAX_RETRIES = int(os.getenv("SCRAPE_MAX_RETRIES", "3"))
+
+# Scheduled crawl (crontab syntax, empty to disable); every worker schedules
+# it and one runs it. Runs that started less than SCRAPE_SCHEDULE_MIN_INTERVAL
+# seconds after the previous one are skipped
+SCRAPE_SCHEDULE = os.getenv("SCRAPE_SCHEDULE", "0 0 1 * *")
+SCRAPE_SCHEDULE_MIN_INTERVAL = float(
+    os.getenv("SCRAPE_SCHEDULE_MIN_INTERVAL", "3600")
+)
+
+# Scraper HTTP cache: compressed bodies and validators of fetched pages
+HTTP_CACHE_DIR = os.getenv("HTTP_CACHE_DIR", "app/http_cache")
+
+# HTML extraction of scraped pages: "lxml" (compiled XPath) or "bs4" (the
+# BeautifulSoup html.parser reference), worker processes parsing pages, and
+# the smallest batch worth shipping to them
+EXTRACTION_ENGINE = os.getenv("EXTRACTION_ENGINE", "lxml")
+EXTRACTION_PROCESSES = int(
+    os.getenv("EXTRACTION_PROCESSES", str(os.cpu_count() or 1))
+)
+EXTRACTION_POOL_MIN_BATCH = int(os.getenv("EXTRACTION_POOL_MIN_BATCH", "32"))
+
+# RSS pipeline: requests in flight and minimum spacing (seconds) per domain
+RSS_DOMAIN_CONCURRENCY = int(os.getenv("RSS_DOMAIN_CONCURRENCY", "4"))
+RSS_DOMAIN_DELAY = float(os.getenv("RSS_DOMAIN_DELAY", "0.5"))
+
+# Publication search: results per page and the cap of exact match counts
+SEARCH_PAGE_SIZE = int(os.getenv("SEARCH_PAGE_SIZE", "10"))
+SEARCH_MAX_PAGE_SIZE = int(os.getenv("SEARCH_MAX_PAGE_SIZE", "100"))
+SEARCH_COUNT_CAP = int(os.getenv("SEARCH_COUNT_CAP", "1000"))
+
+# Publication search result cache: memory budget (bytes) and entry lifetime
+SEARCH_CACHE_MAX_BYTES = int(
+    os.getenv("SEARCH_CACHE_MAX_BYTES", str(16 * 2**20))
+)
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "300"))
+
+# Publication search backend: "postgres" (full-text search) or "memory"
+# (in-process BM25 index, rebuilt after scrapes and every N seconds)
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "postgres")
+SEARCH_INDEX_REFRESH_SECONDS = float(
+    os.getenv("SEARCH_INDEX_REFRESH_SECONDS", "600")
+)
+
+# Memory-mapped snapshots of the search index and classifier, and how many
+# versions of each are kept on disk
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "app/snapshots")
+SNAPSHOT_KEEP = int(os.getenv("SNAPSHOT_KEEP", "2"))
+
+# Streaming trainer: rows per database fetch, hashed feature columns and
+# rows held out to calibrate the probabilities
+TRAIN_CHUNK_ROWS = int(os.getenv("TRAIN_CHUNK_ROWS", "10000"))
+TRAIN_HASH_FEATURES = int(os.getenv("TRAIN_HASH_FEATURES", str(2**20)))
+TRAIN_CALIBRATION_ROWS = int(os.getenv("TRAIN_CALIBRATION_ROWS", "50000"))
+
+# Background training: training processes per worker (jobs still run one at
+# a time across all workers), and cores used for the calibration folds of a
+# full fit (-1: all)
+TRAIN_MAX_JOBS = int(os.getenv("TRAIN_MAX_JOBS", "1"))
+TRAIN_CV_JOBS = int(os.getenv("TRAIN_CV_JOBS", "-1"))
+
+# Text cleaning of a full fit: processes used for corpora of at least
+# PREPROCESS_POOL_MIN_BATCH documents (1: in the training process)
+TRAIN_PREPROCESS_PROCESSES = int(os.getenv("TRAIN_PREPROCESS_PROCESSES", "1"))
+PREPROCESS_POOL_MIN_BATCH = int(
+    os.getenv("PREPROCESS_POOL_MIN_BATCH", "200000")
+)
+
+# Incremental training: how far the share of unknown words in the rows added
+# since the last full fit may exceed the share expected from the training
+# corpus before a rebuild is forced, and new rows needed to recalibrate
+TRAIN_MAX_OOV_RATIO = float(os.getenv("TRAIN_MAX_OOV_RATIO", "0.25"))
+TRAIN_RECALIBRATION_ROWS = int(os.getenv("TRAIN_RECALIBRATION_ROWS", "500"))
+
+# Model compaction: n-grams must occur in at least TRAIN_MIN_DF documents,
+# and only the TRAIN_MAX_FEATURES most class-dependent (chi2) ones are kept
+TRAIN_MIN_DF = int(os.getenv("TRAIN_MIN_DF", "2"))
+TRAIN_MAX_FEATURES = int(os.getenv("TRAIN_MAX_FEATURES", "200000"))
@@ -0,0 +1,154 @@
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Optional
+
+from sqlalchemy import text, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app import metrics
+from app.database import async_engine, async_session_maker
+from app.models import CrawlJobRun
+
+# Crawl functions store what they scraped with the session they are given
+# and return the counts and statistics recorded in the run history
+CrawlFunction = Callable[[AsyncSession], Awaitable[dict]]
+
+# Histogram buckets (seconds) for crawls, which take seconds to hours
+CRAWL_BUCKETS = (1, 5, 10, 30, 60, 120, 300, 600, 1800, 3600, 7200)
+
+crawl_job_time = metrics.histogram_family(
+    "crawl_job_seconds",
+    "Duration of crawl job runs",
+    ("job", "status"),
+    buckets=CRAWL_BUCKETS,
+)
+
+TRY_LOCK = text("SELECT pg_try_advisory_lock(:key)")
+UNLOCK = text("SELECT pg_advisory_unlock(:key)")
+
+
+class CrawlJobRunning(Exception):
+    """Raised when a run of the crawl job is already in progress."""
+
+
+def lock_key(job: str) -> int:
+    """Advisory lock key of ``job``, the same in every process."""
+    return zlib.crc32(f"crawl:{job}".encode())
+
+
+async def run_crawl_job(
+    job: str,
+    trigger: str,
+    crawl: CrawlFunction,
+    min_interval: float = 0,
+) -> Optional[CrawlJobRun]:
+    """
+    Runs ``crawl`` as the only run of ``job`` across every worker process and
+    records it, with its duration, in the crawl history.
+
+    The run holds a session-level PostgreSQL advisory lock on a dedicated
+    connection; if the process dies, PostgreSQL releases the lock with the
+    connection.
+
+    Args:
+        job: Name of the crawl job, e.g. "publications".
+        trigger: What started the run ("scheduled" or "manual").
+        crawl: Performs the crawl; its result is stored with the run.
+        min_interval: Skip the run if another run of ``job`` started less
+            than this many seconds ago and did not fail (the same scheduled
+            run fired by another worker).
+
+    Returns:
+        CrawlJobRun: The finished run, or None if it was skipped.
+
+    Raises:
+        CrawlJobRunning: Another run of ``job`` holds the lock.
+    """
+    key = lock_key(job)
+    async with async_engine.connect() as lock_connection:
+        locked = (
+            await lock_connection.execute(TRY_LOCK, {"key": key})
+        ).scalar()
+        # The lock outlives the transaction; nothing stays idle in one
+        await lock_connection.commit()
+        if not locked:
+            raise CrawlJobRunning(f"A {job} crawl is already running.")
+        try:
+            return await _run_locked(job, trigger, crawl, min_interval)
+        finally:
+            try:
+                await lock_connection.execute(UNLOCK, {"key": key})
+                await lock_connection.commit()
+            except Exception as e:
+                # Never return a connection holding the lock to the pool
+                print(f"Error releasing the {job} crawl lock: {e}")
+                await lock_connection.invalidate()
+
+
+async def _run_locked(
+    job: str, trigger: str, crawl: CrawlFunction, min_interval: float
+) -> Optional[CrawlJobRun]:
+    async with async_session_maker() as session:
+        # Left behind by a process that died mid-run: holding the lock
+        # proves no other run is in progress
+        await session.exec(
+            update(CrawlJobRun)  # pyright: ignore
+            .where(CrawlJobRun.job == job, CrawlJobRun.status == "running")
+            .values(status="failed", error="interrupted")
+        )
+        if min_interval > 0:
+            since = datetime.now(timezone.utc) - timedelta(seconds=min_interval)
+            recent = await session.exec(
+                select(CrawlJobRun.id).where(
+                    CrawlJobRun.job == job,
+                    CrawlJobRun.started_at >= since,
+                    CrawlJobRun.status != "failed",
+                )
+            )
+            if recent.first() is not None:
+                await session.commit()
+                return None
+        run = CrawlJobRun(job=job, trigger=trigger)
+        session.add(run)
+        await session.commit()
+
+    start = time.perf_counter()
+    try:
+        async with async_session_maker() as session:
+            run.result = await crawl(session)
+        run.status = "succeeded"
+    except BaseException as e:  # Including cancellation at shutdown
+        run.status, run.error = "failed", str(e) or type(e).__name__
+        raise
+    finally:
+        run.duration_seconds = round(time.perf_counter() - start, 3)
+        run.finished_at = datetime.now(timezone.utc)
+        crawl_job_time.labels(job, run.status).observe(run.duration_seconds)
+        async with async_session_maker() as session:
+            await session.exec(
+                update(CrawlJobRun)  # pyright: ignore
+                .where(CrawlJobRun.id == run.id)  # pyright: ignore
+                .values(
+                    status=run.status,
+                    finished_at=run.finished_at,
+                    duration_seconds=run.duration_seconds,
+                    result=run.result,
+                    error=run.error,
+                )
+            )
+            await session.commit()
+    return run
+
+
+async def recent_runs(
+    session: AsyncSession, limit: int = 20
+) -> list[CrawlJobRun]:
+    """The latest crawl runs of every job, newest first."""
+    runs = await session.exec(
+        select(CrawlJobRun)
+        .order_by(CrawlJobRun.started_at.desc())  # pyright: ignore
+        .limit(limit)
+    )
+    return list(runs.all())
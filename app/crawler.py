@@ -0,0 +1,375 @@
+import asyncio
+import random
+import re
+import time
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+from urllib.parse import urljoin, urlsplit
+
+from app import metrics
+from app.http_cache import HttpCache
+
+# HTTP statuses worth retrying, everything else is returned as is
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Query parameter numbering the pages of a paginated listing
+PAGE_NUMBER = re.compile(r"([?&]page=)(\d+)")
+
+
+def page_number(url: str) -> Optional[int]:
+    """The ``page=N`` number of ``url``, or None if it has none."""
+    match = PAGE_NUMBER.search(url)
+    return int(match.group(2)) if match else None
+
+
+def numbered_page(url: str, number: int) -> str:
+    """``url`` with its ``page=N`` number replaced by ``number``."""
+    return PAGE_NUMBER.sub(
+        lambda match: f"{match.group(1)}{number}", url, count=1
+    )
+
+
+class TokenBucket:
+    """
+    Async token-bucket rate limiter.
+
+    Allows bursts of up to ``capacity`` requests and refills at ``rate`` tokens
+    per second, so callers only wait when they actually exceed the rate.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity,
+                    self._tokens + (now - self._updated) * self.rate,
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class HostRateLimiter:
+    """Keeps one token bucket per host."""
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self._buckets: dict[str, TokenBucket] = {}
+
+    async def acquire(self, url: str):
+        host = urlsplit(url).netloc
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = TokenBucket(self.rate, self.capacity)
+        await bucket.acquire()
+
+
+@dataclass
+class CrawlStats:
+    pages: int = 0
+    failed_pages: int = 0
+    pages_past_end: int = 0
+    retries: int = 0
+    bytes: int = 0
+    started_at: float = field(default_factory=time.perf_counter)
+    finished_at: Optional[float] = None
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished_at or time.perf_counter()) - self.started_at
+
+    @property
+    def pages_per_second(self) -> float:
+        return self.pages / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "pages": self.pages,
+            "failed_pages": self.failed_pages,
+            "pages_past_end": self.pages_past_end,
+            "retries": self.retries,
+            "bytes": self.bytes,
+            "elapsed_seconds": round(self.elapsed, 3),
+            "pages_per_second": round(self.pages_per_second, 3),
+        }
+
+
+pages_fetched = metrics.counter("crawler_pages_total", "Pages fetched")
+bytes_fetched = metrics.counter("crawler_bytes_total", "Response bytes fetched")
+fetch_retries = metrics.counter("crawler_retries_total", "Fetch retries")
+fetch_latency = metrics.histogram(
+    "crawler_fetch_seconds", "Time to fetch one page"
+)
+crawl_rate = metrics.gauge(
+    "crawler_pages_per_second", "Pages fetched per second by the last crawl"
+)
+
+
+def timed(func: Callable, *args) -> tuple[Any, float]:
+    """
+    Returns ``func(*args)`` and the CPU seconds it took in this thread, which
+    unlike wall time is not inflated by other threads holding the GIL.
+    """
+    start = time.thread_time()
+    result = func(*args)
+    return result, time.thread_time() - start
+
+
+class Crawler:
+    """
+    Concurrent, rate-limited page crawler.
+
+    Pages are fetched with one shared (pooled) requests-compatible session in
+    worker threads. As soon as a page arrives its next-page link is queued, and
+    the page itself is parsed in a thread, so parsing page N overlaps fetching
+    page N+1.
+
+    Following next-page links alone keeps a single page in flight. Once the
+    links are numbered (``page=N``), the ``lookahead`` pages after the next
+    one are queued too, so up to ``concurrency`` pages are fetched at once.
+    The first page without a next link ends the listing: pages queued past
+    it are discarded, and not counted as fetched or failed.
+
+    Args:
+        session: Object with a requests-style ``get(url, timeout=...)``.
+        concurrency: Maximum number of pages in flight.
+        rate: Requests per second allowed per host.
+        burst: Requests a host may receive back to back.
+        max_retries: Retries for network errors and retryable statuses.
+        backoff: Base delay (seconds) of the exponential retry backoff.
+        cache: Revalidates pages with conditional requests; unchanged pages
+            are neither parsed nor returned, their stored next-page link is
+            followed instead. The caller commits the cache.
+        executor: Runs ``parse`` (e.g. a process pool, which needs a
+            module-level function); worker threads by default.
+        lookahead: Numbered pages queued past the next-page link (0: only
+            follow the links).
+    """
+
+    def __init__(
+        self,
+        session: Any,
+        concurrency: int = 4,
+        rate: float = 1.0,
+        burst: float = 1.0,
+        max_retries: int = 3,
+        backoff: float = 1.0,
+        timeout: float = 30.0,
+        cache: Optional[HttpCache] = None,
+        executor: Optional[Executor] = None,
+        lookahead: int = 0,
+    ):
+        self.session = session
+        self.concurrency = concurrency
+        self.limiter = HostRateLimiter(rate, burst)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.cache = cache
+        self.executor = executor
+        self.lookahead = lookahead
+        self.stats = CrawlStats()
+
+    async def fetch(self, url: str, headers: Optional[dict] = None):
+        """
+        Fetches ``url``, retrying with exponential backoff and jitter.
+
+        Returns:
+            The response (status 200, or 304 to conditional ``headers``), or
+            None if the page could not be fetched.
+        """
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire(url)
+            start = time.perf_counter()
+            retry_after = None
+            try:
+                response = await asyncio.to_thread(
+                    self.session.get,
+                    url,
+                    timeout=self.timeout,
+                    headers=headers or {},
+                )
+                fetch_latency.observe(time.perf_counter() - start)
+                if response.status_code not in RETRY_STATUSES:
+                    if response.status_code not in (200, 304):
+                        print(f"Error fetching {url}: {response.status_code}")
+                        return None
+                    self.stats.bytes += len(response.content)
+                    bytes_fetched.inc(len(response.content))
+                    return response
+                error = f"HTTP {response.status_code}"
+                retry_after = response.headers.get("Retry-After")
+            except Exception as e:
+                error = str(e)
+
+            if attempt == self.max_retries:
+                print(f"Error fetching {url}: {error}")
+                return None
+
+            self.stats.retries += 1
+            fetch_retries.inc()
+            delay = self.backoff * 2**attempt * random.uniform(0.5, 1.5)
+            if retry_after and retry_after.isdigit():
+                delay = max(delay, float(retry_after))
+            await asyncio.sleep(delay)
+        return None
+
+    async def crawl(
+        self,
+        start_urls: list[str],
+        parse: Callable[[str], Any],
+        find_next: Callable[[str], str],
+    ) -> list[Any]:
+        """
+        Crawls from ``start_urls`` following ``find_next`` links.
+
+        Args:
+            start_urls: Absolute URLs to start from.
+            parse: Turns page HTML into a result; runs in ``executor``.
+            find_next: Cheaply extracts the next page link (may be relative)
+                from page HTML, or returns "" on the last page.
+
+        Returns:
+            The parse results, in the order the pages were discovered
+            (without the unchanged pages skipped by the cache).
+        """
+        self.stats = CrawlStats()
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        seen: set[str] = set()
+        results: dict[int, Any] = {}
+        numbers: dict[int, Optional[int]] = {}
+        fetched: set[int] = set()
+        failed: set[int] = set()
+        last_page: Optional[int] = None
+
+        def enqueue(url: str):
+            if url and url not in seen:
+                seen.add(url)
+                index = len(numbers)
+                numbers[index] = page_number(url)
+                queue.put_nowait((index, url))
+
+        def follow(number: Optional[int], next_url: str):
+            nonlocal last_page
+            if not next_url:
+                if number is not None and (
+                    last_page is None or number < last_page
+                ):
+                    last_page = number
+                return
+            enqueue(next_url)
+
+            next_number = page_number(next_url)
+            if next_number is None:
+                return
+            end = next_number + self.lookahead
+            if last_page is not None:
+                end = min(end, last_page)
+            # Always ascending, so discovery order stays page order
+            for ahead in range(next_number + 1, end + 1):
+                enqueue(numbered_page(next_url, ahead))
+
+        for url in start_urls:
+            enqueue(url)
+
+        async def worker():
+            while True:
+                index, url = await queue.get()
+                number = numbers[index]
+                try:
+                    if (
+                        last_page is not None
+                        and number is not None
+                        and number > last_page
+                    ):
+                        continue
+                    print(f"Scraping: {url}")
+                    cached = self.cache.lookup(url) if self.cache else None
+                    response = await self.fetch(
+                        url, HttpCache.request_headers(cached)
+                    )
+                    if response is None:
+                        failed.add(index)
+                        continue
+
+                    fetched.add(index)
+                    pages_fetched.inc()
+
+                    if self.cache and self.cache.is_unchanged(
+                        cached, response.status_code, response.content
+                    ):
+                        self.cache.revalidated(
+                            cached, response.headers  # pyright: ignore
+                        )
+                        follow(
+                            number,
+                            cached.extra.get("next", ""),  # pyright: ignore
+                        )
+                        continue
+                    if response.status_code != 200:
+                        failed.add(index)
+                        continue
+
+                    # Queue the next page before parsing this one
+                    html = response.text
+                    next_url = find_next(html)
+                    next_url = urljoin(url, next_url) if next_url else ""
+                    follow(number, next_url)
+
+                    parsed = loop.run_in_executor(
+                        self.executor, timed, parse, html
+                    )
+                    results[index], parse_seconds = await parsed
+                    if self.cache:
+                        self.cache.stage(
+                            url,
+                            response.content,
+                            response.headers,
+                            parse_seconds,
+                            next=next_url,
+                        )
+                except Exception as e:
+                    print(f"Error processing {url}: {e}")
+                    failed.add(index)
+                finally:
+                    queue.task_done()
+
+        workers = [
+            asyncio.create_task(worker()) for _ in range(self.concurrency)
+        ]
+        try:
+            await queue.join()
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+            past_end = {
+                index
+                for index, number in numbers.items()
+                if last_page is not None
+                and number is not None
+                and number > last_page
+            }
+            self.stats.pages = len(fetched - past_end)
+            self.stats.failed_pages = len(failed - past_end)
+            self.stats.pages_past_end = len((fetched | failed) & past_end)
+            self.stats.finished_at = time.perf_counter()
+            crawl_rate.set(self.stats.pages_per_second)
+
+        return [
+            results[index] for index in sorted(results) if index not in past_end
+        ]
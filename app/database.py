@@ -1,7 +1,25 @@
 import psycopg2
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.config import DATABASE_URL, DB_HOST, DB_NAME, DB_PASS, DB_PORT, DB_USER
+from app.config import (
+    ASYNC_DATABASE_URL,
+    DATABASE_URL,
+    DB_ECHO,
+    DB_HOST,
+    DB_MAX_OVERFLOW,
+    DB_NAME,
+    DB_PASS,
+    DB_POOL_PRE_PING,
+    DB_POOL_SIZE,
+    DB_PORT,
+    DB_STATEMENT_TIMEOUT_MS,
+    DB_USER,
+)
+from app.instrumentation import instrument_engine
+from app.models import PUBLICATION_SEARCH_VECTOR
 
 
 def create_database_if_not_exists():
@@ -35,11 +53,36 @@ def create_database_if_not_exists():
         print(f"Error creating database: {e}")
 
 
-# Ensure the database exists before initializing SQLAlchemy/SQLModel
-create_database_if_not_exists()
+# Pool settings shared by the sync and async engines
+POOL_OPTIONS = {
+    "echo": DB_ECHO,
+    "pool_size": DB_POOL_SIZE,
+    "max_overflow": DB_MAX_OVERFLOW,
+    "pool_pre_ping": DB_POOL_PRE_PING,
+}
 
 # Create SQLModel engine
-engine = create_engine(DATABASE_URL, echo=True)
+engine = create_engine(
+    DATABASE_URL,
+    connect_args={"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"},
+    **POOL_OPTIONS,
+)
+
+# Async engine (asyncpg) for the endpoints that run on the event loop
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    connect_args={
+        "server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}
+    },
+    **POOL_OPTIONS,
+)
+async_session_maker = async_sessionmaker(
+    async_engine, class_=AsyncSession, expire_on_commit=False
+)
+
+# Statement timings of both engines, exposed at /metrics
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
 
 
 def create_db_and_tables():
@@ -47,6 +90,61 @@ def create_db_and_tables():
     Creates all tables defined in SQLModel.
     """
     SQLModel.metadata.create_all(engine)
+    upgrade_schema()
+
+    # create_all skips the indexes of tables that already exist
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+
+
+def upgrade_schema():
+    """
+    Applies model changes that create_all cannot make to existing tables.
+    """
+    with engine.begin() as conn:
+        columns = {
+            name: (data_type, is_generated)
+            for name, data_type, is_generated in conn.execute(
+                text(
+                    "SELECT column_name, data_type, is_generated "
+                    "FROM information_schema.columns "
+                    "WHERE table_name = 'publication' "
+                    "AND column_name IN ('authors', 'search_vector')"
+                )
+            )
+        }
+        authors_type, _ = columns.get("authors", (None, None))
+        _, is_generated = columns.get("search_vector", (None, None))
+
+        # search_vector used to be a plain column filled by an UPDATE after
+        # every scrape; it is now generated from the title and author names
+        if is_generated == "NEVER":
+            print(
+                "Converting publication.search_vector to a generated column..."
+            )
+            conn.execute(
+                text("ALTER TABLE publication DROP COLUMN search_vector")
+            )
+
+        # authors used to be json, which the jsonb path functions of the
+        # generated column do not accept
+        if authors_type == "json":
+            print("Converting publication.authors to jsonb...")
+            conn.execute(
+                text(
+                    "ALTER TABLE publication "
+                    "ALTER COLUMN authors TYPE jsonb USING authors::jsonb"
+                )
+            )
+
+        if is_generated in ("NEVER", None):
+            conn.execute(
+                text(
+                    "ALTER TABLE publication ADD COLUMN search_vector tsvector "
+                    f"GENERATED ALWAYS AS ({PUBLICATION_SEARCH_VECTOR}) STORED"
+                )
+            )
 
 
 def get_db():
@@ -55,3 +153,11 @@ def get_db():
     """
     with Session(engine) as session:
         yield session
+
+
+async def get_async_db():
+    """
+    Dependency for getting an async database session.
+    """
+    async with async_session_maker() as session:
+        yield session
@@ -0,0 +1,182 @@
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Callable, Optional, Sequence, TypeVar
+
+import lxml.html
+from lxml import etree
+
+from app.config import EXTRACTION_POOL_MIN_BATCH, EXTRACTION_PROCESSES
+
+T = TypeVar("T")
+
+# Parses the HTML once into a libxml2 tree; str input is encoded as UTF-8 so
+# pages with an XML encoding declaration are accepted too
+PARSER = lxml.html.HTMLParser(encoding="utf-8")
+
+
+def _has_class(name: str) -> str:
+    """XPath predicate matching one token of the class attribute."""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+# Compiled once; the queries mirror the BeautifulSoup lookups of
+# ``parse_page`` and ``parse_article`` in document order
+RESULT_CONTAINERS = etree.XPath(f"//div[{_has_class('result-container')}]")
+TITLE = etree.XPath(f"(.//h3[{_has_class('title')}])[1]")
+FIRST_LINK = etree.XPath("(.//a)[1]")
+DATE = etree.XPath(f"(.//span[{_has_class('date')}])[1]")
+# class_="link person" matches the whole (whitespace-normalised) attribute
+AUTHORS = etree.XPath(".//a[normalize-space(@class) = 'link person']")
+NEXT_LINK = etree.XPath(f"(//a[{_has_class('nextLink')}])[1]")
+ARTICLE = etree.XPath("(//article)[1]")
+PARAGRAPHS = etree.XPath(".//p")
+
+# Text nodes as BeautifulSoup's get_text sees them: comments are not text
+# nodes, and script, style and template contents are left out
+STRINGS = etree.XPath(
+    "descendant-or-self::text()"
+    "[not(parent::script or parent::style or ancestor::template)]",
+    smart_strings=False,
+)
+
+
+def _document(page_html: str):
+    try:
+        return lxml.html.document_fromstring(
+            page_html.encode("utf-8"), parser=PARSER
+        )
+    except etree.ParserError:  # Empty document
+        return None
+
+
+def _first(query: etree.XPath, element):
+    found = query(element)
+    return found[0] if found else None
+
+
+def get_text(element, strip: bool = False) -> str:
+    """``Tag.get_text()`` (or ``get_text(strip=True)``) of an lxml element."""
+    strings = STRINGS(element)
+    if strip:
+        return "".join(text for s in strings if (text := s.strip()))
+    return "".join(strings)
+
+
+def extract_publications(page_html: str) -> tuple[list[dict], str]:
+    """
+    Extracts the publications and the next page link from a results page;
+    same output as ``parse_page`` in app/routers/scrape.py.
+    """
+    document = _document(page_html)
+    if document is None:
+        return [], ""
+
+    publications = []
+    for container in RESULT_CONTAINERS(document):
+        authors = [
+            {
+                "name": get_text(author).strip(),
+                "link": author.get("href", ""),
+            }
+            for author in AUTHORS(container)
+        ]
+        if not authors:
+            continue
+
+        title_tag = _first(TITLE, container)
+        link_tag = _first(FIRST_LINK, container)
+        year_tag = _first(DATE, container)
+        publications.append(
+            {
+                "title": (
+                    get_text(title_tag, strip=True)
+                    if title_tag is not None
+                    else "No Title"
+                ),
+                "link": (
+                    link_tag.get("href", "No URL")
+                    if link_tag is not None
+                    else "No URL"
+                ),
+                "authors": authors,
+                "year": (
+                    get_text(year_tag).strip()
+                    if year_tag is not None
+                    else "No Year"
+                ),
+            }
+        )
+
+    next_tag = _first(NEXT_LINK, document)
+    next_page = next_tag.get("href", "") if next_tag is not None else ""
+    return publications, next_page
+
+
+def extract_article(page_html: str) -> Optional[str]:
+    """
+    Extracts the full article text from an article page; same output as
+    ``parse_article`` in app/routers/rss_scrape.py on valid markup. Where a
+    page nests block elements in ``<p>`` or leaves paragraphs unclosed,
+    lxml closes the paragraph like a browser does, while html.parser keeps
+    the rest of the block inside it.
+    """
+    document = _document(page_html)
+    article = _first(ARTICLE, document) if document is not None else None
+    if article is None:
+        return None
+    return "\n".join(get_text(p) for p in PARAGRAPHS(article)).strip()
+
+
+class ExtractionPool:
+    """
+    Process pool for extraction, so parsing large batches of pages uses every
+    core instead of contending for the GIL.
+
+    Args:
+        processes: Worker processes; with 1 or fewer, everything is
+            extracted in the calling process.
+        min_batch: Smaller batches are extracted in the calling process,
+            where shipping the pages to workers would cost more than it saves.
+    """
+
+    def __init__(
+        self,
+        processes: int = EXTRACTION_PROCESSES,
+        min_batch: int = EXTRACTION_POOL_MIN_BATCH,
+    ):
+        self.processes = processes
+        self.min_batch = min_batch
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def executor(self) -> Optional[Executor]:
+        """The (lazily started) pool, or None when it is disabled."""
+        if self.processes <= 1:
+            return None
+        with self._lock:
+            if self._executor is None:
+                # Spawned (not forked) processes do not inherit server threads
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+        return self._executor
+
+    def map(self, extract: Callable[[str], T], pages: Sequence[str]) -> list[T]:
+        """Runs ``extract`` (a module-level function) on every page, in order."""
+        executor = self.executor() if len(pages) >= self.min_batch else None
+        if executor is None:
+            return [extract(page) for page in pages]
+        chunksize = max(1, len(pages) // (self.processes * 4))
+        return list(executor.map(extract, pages, chunksize=chunksize))
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
+
+
+# Shared extraction pool of the scrapers
+extraction_pool = ExtractionPool()
@@ -0,0 +1,200 @@
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Mapping, NamedTuple, Optional
+
+from app import metrics
+from app.config import HTTP_CACHE_DIR
+
+cache_bytes_saved = metrics.counter(
+    "http_cache_bytes_saved_total", "Response bytes not downloaded (304)"
+)
+cache_unchanged_pages = metrics.counter(
+    "http_cache_unchanged_total", "Unchanged pages skipped before parsing"
+)
+
+
+class CacheEntry(NamedTuple):
+    url: str
+    etag: str
+    last_modified: str
+    content_hash: str
+    size: int
+    parse_seconds: float
+    stored_at: float
+    # Whatever the scraper needs to resume from a skipped page
+    extra: dict
+
+
+@dataclass
+class CacheStats:
+    not_modified: int = 0
+    unchanged: int = 0
+    changed: int = 0
+    bytes_saved: int = 0
+    parse_seconds_saved: float = 0.0
+
+    def as_dict(self) -> dict:
+        stats = asdict(self)
+        stats["parse_seconds_saved"] = round(self.parse_seconds_saved, 3)
+        return stats
+
+
+def content_hash(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()
+
+
+def _write_atomic(path: str, data: bytes):
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as tmp:
+            tmp.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class HttpCache:
+    """
+    On-disk HTTP cache for the scrapers, one instance per crawl.
+
+    For every URL the last body is kept gzip-compressed under the SHA-256 of
+    the URL, next to its validators (ETag, Last-Modified), the hash of the
+    body and the time it took to parse. Scrapers send the validators as
+    conditional request headers; a ``304 Not Modified``, or a ``200`` with
+    the same body hash, means the page is unchanged and can be skipped
+    before parsing and before any database write.
+
+    New entries are only staged by ``stage`` and written by ``commit``, which
+    the caller runs once the scraped data is committed: a failed crawl must
+    not mark pages as seen.
+
+    Args:
+        root: Cache directory.
+        refresh: Ignore the stored entries (every page counts as changed),
+            while still recording the new ones.
+    """
+
+    def __init__(self, root: str = HTTP_CACHE_DIR, refresh: bool = False):
+        self.root = root
+        self.refresh = refresh
+        self.stats = CacheStats()
+        self._staged: dict[str, tuple[bytes, dict]] = {}
+
+    def _path(self, url: str, suffix: str) -> str:
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.root, key[:2], key + suffix)
+
+    def lookup(self, url: str) -> Optional[CacheEntry]:
+        """Returns the stored entry of ``url``, if any."""
+        if self.refresh:
+            return None
+        try:
+            with open(self._path(url, ".json"), encoding="utf-8") as meta:
+                return CacheEntry(**json.load(meta))
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def body(self, entry: CacheEntry) -> Optional[bytes]:
+        """The stored body of ``entry``, e.g. to reuse it after a 304."""
+        try:
+            with gzip.open(self._path(entry.url, ".gz"), "rb") as body:
+                return body.read()
+        except OSError:
+            return None
+
+    @staticmethod
+    def request_headers(entry: Optional[CacheEntry]) -> dict:
+        """Conditional request headers revalidating ``entry``."""
+        headers = {}
+        if entry and entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry and entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def is_unchanged(
+        self, entry: Optional[CacheEntry], status: int, body: bytes
+    ) -> bool:
+        """
+        Whether a response repeats ``entry``: a 304, or a 200 whose body has
+        the stored hash. Updates the saved bytes and parse time.
+        """
+        if entry is None:
+            return False
+        if status == 304:
+            self._not_modified(entry)
+        elif status != 200 or content_hash(body) != entry.content_hash:
+            return False
+        self.stats.unchanged += 1
+        self.stats.parse_seconds_saved += entry.parse_seconds
+        cache_unchanged_pages.inc()
+        return True
+
+    def _not_modified(self, entry: CacheEntry):
+        self.stats.not_modified += 1
+        self.stats.bytes_saved += entry.size
+        cache_bytes_saved.inc(entry.size)
+
+    def reuse(self, entry: CacheEntry) -> Optional[bytes]:
+        """
+        The stored body after a 304, for pages that are always parsed (RSS
+        feeds). None if it is missing and the page must be refetched.
+        """
+        body = self.body(entry)
+        if body is not None:
+            self._not_modified(entry)
+        return body
+
+    def stage(
+        self,
+        url: str,
+        body: bytes,
+        headers: Mapping[str, str],
+        parse_seconds: float = 0.0,
+        **extra: Any,
+    ):
+        """Records a fetched (and parsed) page; written by ``commit``."""
+        self.stats.changed += 1
+        meta = CacheEntry(
+            url=url,
+            etag=headers.get("ETag", ""),
+            last_modified=headers.get("Last-Modified", ""),
+            content_hash=content_hash(body),
+            size=len(body),
+            parse_seconds=parse_seconds,
+            stored_at=time.time(),
+            extra=extra,
+        )._asdict()
+        self._staged[url] = (body, meta)
+
+    def revalidated(self, entry: CacheEntry, headers: Mapping[str, str]):
+        """Stages new validators for an unchanged page, keeping its body."""
+        etag = headers.get("ETag", entry.etag)
+        last_modified = headers.get("Last-Modified", entry.last_modified)
+        if (etag, last_modified) != (entry.etag, entry.last_modified):
+            meta = entry._replace(etag=etag, last_modified=last_modified)
+            self._staged[entry.url] = (b"", meta._asdict())
+
+    def commit(self) -> int:
+        """Writes the staged entries. Returns how many were written."""
+        for url, (body, meta) in self._staged.items():
+            if body:
+                _write_atomic(self._path(url, ".gz"), gzip.compress(body, 6))
+            # The metadata goes last, once its body is in place
+            _write_atomic(
+                self._path(url, ".json"), json.dumps(meta).encode("utf-8")
+            )
+        written = len(self._staged)
+        self._staged.clear()
+        return written
+
+    def discard(self):
+        self._staged.clear()
@@ -0,0 +1,109 @@
+import time
+from functools import lru_cache
+
+from sqlalchemy import Engine, event
+
+from app import metrics
+
+request_latency = metrics.histogram_family(
+    "http_request_duration_seconds",
+    "Time to send the full response, by route template",
+    ("method", "route", "status"),
+)
+requests_in_progress = metrics.gauge(
+    "http_requests_in_progress", "Requests being handled"
+)
+query_latency = metrics.histogram_family(
+    "db_query_duration_seconds",
+    "Time to execute a statement, by SQL command",
+    ("command",),
+)
+
+# Route label of requests no route matched (404s), so that arbitrary paths
+# cannot create new label values
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class RequestMetricsMiddleware:
+    """
+    ASGI middleware recording the latency of every HTTP request, labelled
+    with the route's path template (``/train/jobs/{job_id}``, not the path).
+
+    Latency runs until the last body chunk is sent; background tasks that
+    run afterwards are not counted. A plain ASGI middleware rather than a
+    ``BaseHTTPMiddleware`` so the response is not streamed through a second
+    task.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status, end = 500, None
+
+        async def send_and_record(message):
+            nonlocal status, end
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get(
+                "more_body", False
+            ):
+                end = time.perf_counter()
+
+        requests_in_progress.inc()
+        try:
+            await self.app(scope, receive, send_and_record)
+        finally:
+            requests_in_progress.dec()
+            # Set by FastAPI on the scope once a route matched
+            route = scope.get("route")
+            request_latency.labels(
+                scope["method"],
+                getattr(route, "path", UNMATCHED_ROUTE),
+                str(status),
+            ).observe((end or time.perf_counter()) - start)
+
+
+@lru_cache(maxsize=1024)
+def _statement_latency(statement: str) -> metrics.Histogram:
+    """Histogram of the SQL command (SELECT, INSERT, ...) of ``statement``."""
+    command = statement[:32].split(None, 1)
+    return query_latency.labels(command[0].upper() if command else "")
+
+
+def _timed(method: str):
+    """
+    Dialect event listener running the dialect's own ``method`` (e.g.
+    ``do_execute``) and timing it; returning True tells SQLAlchemy the
+    statement was executed.
+    """
+
+    def listener(cursor, statement: str, *args):
+        context = args[-1]
+        start = time.perf_counter()
+        try:
+            getattr(context.dialect, method)(cursor, statement, *args)
+        finally:
+            _statement_latency(statement).observe(time.perf_counter() - start)
+        return True
+
+    return listener
+
+
+def instrument_engine(engine: Engine):
+    """
+    Times every statement run on ``engine``; for an async engine pass its
+    ``sync_engine``. COPY through the raw driver connection is not seen.
+
+    Dialect events wrap only the driver call: connection-level
+    ``*_cursor_execute`` listeners would move every execution onto
+    SQLAlchemy's slower event-dispatching path.
+    """
+    for method in ("do_execute", "do_executemany", "do_execute_no_params"):
+        event.listen(engine, method, _timed(method))
@@ -0,0 +1,454 @@
+import multiprocessing
+import threading
+import time
+import uuid
+import zlib
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Literal, Optional
+
+from sqlalchemy import text, update
+from sqlmodel import Session, func, select
+
+from app import metrics
+from app.config import TRAIN_MAX_JOBS
+from app.database import engine
+from app.models import Prediction, TrainingJob
+
+if TYPE_CHECKING:
+    from app.training import ProgressCallback
+
+TrainingMode = Literal["full", "streaming", "incremental"]
+JobStatus = Literal["queued", "running", "succeeded", "failed", "cancelled"]
+
+# Jobs returned by the job list
+MAX_LISTED_JOBS = 100
+
+# Seconds between attempts of a queued job to take the training lock
+LOCK_POLL_SECONDS = 1.0
+
+# One training job runs at a time across every worker: they all publish the
+# same model, and incremental updates start from the published one
+TRAINING_LOCK_KEY = zlib.crc32(b"training")
+TRY_LOCK = text("SELECT pg_try_advisory_lock(:key)")
+UNLOCK = text("SELECT pg_advisory_unlock(:key)")
+
+# Histogram buckets (seconds) for training, which takes seconds to hours
+TRAINING_BUCKETS = (0.1, 0.5, 1, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+
+training_phase_time = metrics.histogram_family(
+    "training_phase_seconds",
+    "Time spent in each step of a successful training job",
+    ("mode", "phase"),
+    buckets=TRAINING_BUCKETS,
+)
+training_job_time = metrics.histogram_family(
+    "training_job_seconds",
+    "Time from queueing a training job to its end",
+    ("mode", "status"),
+    buckets=TRAINING_BUCKETS,
+)
+
+
+class TrainingCancelled(Exception):
+    """Raised inside a training process once its job was cancelled."""
+
+
+class NoTrainingData(Exception):
+    """Raised when there are no labelled documents to train on."""
+
+
+class PhaseTimer:
+    """Wall time spent in each step reported by a training run."""
+
+    def __init__(self):
+        self.durations: dict[str, float] = {}
+        self._step: Optional[str] = None
+        self._since = time.perf_counter()
+
+    def enter(self, step: Optional[str]):
+        if step == self._step:
+            return
+        now = time.perf_counter()
+        if self._step is not None:
+            elapsed = now - self._since
+            self.durations[self._step] = (
+                self.durations.get(self._step, 0.0) + elapsed
+            )
+        self._step, self._since = step, now
+
+    def stop(self) -> dict[str, float]:
+        self.enter(None)
+        return {step: round(t, 4) for step, t in self.durations.items()}
+
+
+def _scaled(progress: "ProgressCallback", start: float, end: float):
+    """Maps a trainer's 0..1 progress onto ``start..end`` of the whole job."""
+    return lambda fraction, step: progress(
+        start + (end - start) * fraction, step
+    )
+
+
+def _fit(
+    session: Session,
+    mode: TrainingMode,
+    watermark: int,
+    progress: "ProgressCallback",
+) -> tuple[dict, int]:
+    """Fits a new model on every row up to ``watermark``."""
+    from app.training import (
+        fit_classifier,
+        fit_streaming,
+        iter_training_chunks,
+        training_classes,
+    )
+
+    if mode == "streaming":
+        classes = training_classes(session)
+        total = session.exec(
+            select(func.count(Prediction.id)).where(
+                Prediction.id <= watermark  # pyright: ignore
+            )
+        ).one()
+        if not classes:
+            raise NoTrainingData("No data available for training")
+        artifact = fit_streaming(
+            iter_training_chunks(session, up_to_id=watermark),
+            classes,
+            total_rows=total,
+            progress=_scaled(progress, 0.0, 0.95),
+        )
+    else:
+        rows = session.exec(
+            select(Prediction.content, Prediction.category).where(
+                Prediction.id <= watermark  # pyright: ignore
+            )
+        ).all()
+        if not rows:
+            raise NoTrainingData("No data available for training")
+        texts, labels = zip(*rows)
+        total = len(texts)
+        # The session is released before the long fit starts
+        session.close()
+        artifact = fit_classifier(
+            texts, labels, progress=_scaled(progress, 0.1, 0.95)
+        )
+    return {**artifact, "watermark": watermark}, total
+
+
+def _report(job_id: str, **values) -> bool:
+    """
+    Writes ``values`` to the row of the job.
+
+    Returns:
+        bool: Whether cancellation of the job was requested.
+    """
+    with engine.begin() as conn:
+        return bool(
+            conn.execute(
+                update(TrainingJob)
+                .where(TrainingJob.id == job_id)  # pyright: ignore
+                .values(**values)
+                .returning(TrainingJob.cancel_requested)  # pyright: ignore
+            ).scalar()
+        )
+
+
+@contextmanager
+def _training_lock(job_id: str):
+    """
+    Holds the training lock, waiting for the job running in any worker.
+
+    The job stays queued while it waits, and cancellation is checked every
+    ``LOCK_POLL_SECONDS``. The lock is a session-level PostgreSQL advisory
+    lock on a dedicated connection, released by PostgreSQL if the process
+    dies.
+    """
+    with engine.connect() as conn:
+        while not conn.execute(TRY_LOCK, {"key": TRAINING_LOCK_KEY}).scalar():
+            conn.commit()
+            if _report(job_id, step="waiting"):
+                raise TrainingCancelled()
+            time.sleep(LOCK_POLL_SECONDS)
+        # The lock outlives the transaction; nothing stays idle in one
+        conn.commit()
+        try:
+            # Left behind by a process that died mid-job: holding the lock
+            # proves no other job is running
+            with engine.begin() as stale:
+                stale.execute(
+                    update(TrainingJob)
+                    .where(
+                        TrainingJob.status == "running",
+                        TrainingJob.id != job_id,  # pyright: ignore
+                    )
+                    .values(
+                        status="failed",
+                        error="interrupted",
+                        finished=time.time(),
+                    )
+                )
+            yield
+        finally:
+            try:
+                conn.execute(UNLOCK, {"key": TRAINING_LOCK_KEY})
+                conn.commit()
+            except Exception as e:
+                # Never return a connection holding the lock to the pool
+                print(f"Error releasing the training lock: {e}")
+                conn.invalidate()
+
+
+def run_training(job_id: str, mode: TrainingMode):
+    """
+    Runs a training job in a training process and records its progress and
+    outcome in the job's row.
+
+    Cancellation is checked before the job starts, while it waits for the
+    job of another worker, and at every progress report: between the steps
+    of a full fit (cleaning, vectorizing, pruning, fitting) and after every
+    chunk of a streaming fit. A step in progress, such as the calibrated fit
+    of a large corpus, runs to its end; a job that started publishing can
+    no longer be cancelled.
+    """
+    try:
+        if _report(job_id, step="waiting"):
+            raise TrainingCancelled()
+        with _training_lock(job_id):
+            # Recorded while the lock is held: the next job to take it
+            # fails every job still marked running
+            _report(job_id, finished=time.time(), **_outcome(job_id, mode))
+    except TrainingCancelled:
+        _report(job_id, status="cancelled", finished=time.time())
+
+
+def _outcome(job_id: str, mode: TrainingMode) -> dict:
+    """Runs the job; returns the final values of its row."""
+    try:
+        outcome = _train(job_id, mode)
+    except TrainingCancelled:
+        return {"status": "cancelled"}
+    except Exception as e:
+        return {"status": "failed", "error": str(e) or repr(e)}
+    return {"status": "succeeded", "progress": 1.0, "step": "done", **outcome}
+
+
+def _train(job_id: str, mode: TrainingMode) -> dict:
+    """
+    Trains and publishes a model.
+
+    In ``incremental`` mode only rows added after the watermark of the
+    current model are folded into it; the model is rebuilt (the way it was
+    first trained) when there is none yet or ``update_classifier`` refuses.
+
+    Returns:
+        dict: The number of samples used and what was done.
+    """
+    # scikit-learn and SciPy are only imported by the training processes,
+    # never by the API workers that queue the jobs
+    from sklearn.feature_extraction.text import HashingVectorizer
+
+    from app.model_registry import load_model_file, publish_model
+    from app.training import (
+        RebuildRequired,
+        training_watermark,
+        update_classifier,
+    )
+
+    phases = PhaseTimer()
+
+    def progress(fraction: float, step: str):
+        phases.enter(step)
+        cancelled = _report(
+            job_id, status="running", progress=round(fraction, 4), step=step
+        )
+        if cancelled:
+            raise TrainingCancelled()
+
+    progress(0.0, "loading")
+    with Session(engine) as session:
+        watermark = training_watermark(session)
+        result = mode
+
+        if mode == "incremental":
+            previous = load_model_file()
+            if previous is None or "watermark" not in previous:
+                mode, result = "full", "full rebuild: no incremental model"
+            else:
+                rows = session.exec(
+                    select(Prediction.content, Prediction.category).where(
+                        Prediction.id
+                        > previous["watermark"],  # pyright: ignore
+                        Prediction.id <= watermark,  # pyright: ignore
+                    )
+                ).all()
+                if not rows:
+                    return {
+                        "total_samples": 0,
+                        "result": "up to date",
+                        "phases": phases.stop(),
+                    }
+                progress(0.2, "updating")
+                texts, labels = zip(*rows)
+                try:
+                    artifact = update_classifier(
+                        previous, texts, labels, watermark
+                    )
+                    total = len(texts)
+                except RebuildRequired as e:
+                    mode = (
+                        "streaming"
+                        if isinstance(previous["vectorizer"], HashingVectorizer)
+                        else "full"
+                    )
+                    result = f"{mode} rebuild: {e}"
+
+        if mode != "incremental":
+            artifact, total = _fit(session, mode, watermark, progress)
+
+    progress(0.95, "publishing")
+    # Written atomically so in-flight classifications never see a partial file
+    publish_model(artifact)  # pyright: ignore
+    return {
+        "total_samples": total,  # pyright: ignore
+        "result": result,
+        "phases": phases.stop(),
+    }
+
+
+class JobManager:
+    """
+    Runs training jobs in a separate process pool, so fits never block the
+    API workers.
+
+    Jobs are stored in the ``trainingjob`` table: any worker can report or
+    cancel a job accepted by another one. Jobs run one at a time across all
+    workers (see ``run_training``), so models are never published
+    concurrently.
+    """
+
+    def __init__(self, max_workers: int = TRAIN_MAX_JOBS):
+        self.max_workers = max_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._futures: dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def _start(self):
+        # Spawned (not forked) processes do not inherit the server's threads
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+
+    def submit(self, mode: TrainingMode) -> TrainingJob:
+        """Queues a training job and returns it immediately."""
+        job = TrainingJob(id=uuid.uuid4().hex, mode=mode)
+        with Session(engine) as session:
+            session.add(job)
+            session.commit()
+            session.refresh(job)
+
+        with self._lock:
+            if self._executor is None:
+                self._start()
+            future = self._executor.submit(  # pyright: ignore
+                run_training, job.id, mode
+            )
+            self._futures[job.id] = future
+
+        future.add_done_callback(lambda f: self._finish(job.id, f))
+        return job
+
+    def _finish(self, job_id: str, future: Future):
+        with self._lock:
+            self._futures.pop(job_id, None)
+        error = None if future.cancelled() else future.exception()
+        with Session(engine) as session:
+            job = session.get(TrainingJob, job_id)
+            if job is None:
+                return
+            if job.finished is None:
+                # Cancelled before it started, or the process died
+                job.finished = time.time()
+                if future.cancelled():
+                    job.status = "cancelled"
+                else:
+                    job.status, job.error = "failed", repr(error)
+                session.add(job)
+                session.commit()
+                session.refresh(job)
+
+            # Timed in the training process, recorded in this one
+            if job.status == "succeeded":
+                for phase, seconds in job.phases.items():
+                    training_phase_time.labels(job.mode, phase).observe(seconds)
+            training_job_time.labels(job.mode, job.status).observe(
+                job.finished - job.created  # pyright: ignore
+            )
+
+    def get(self, job_id: str) -> Optional[TrainingJob]:
+        """Returns the job with its latest progress, or None if unknown."""
+        with Session(engine) as session:
+            return session.get(TrainingJob, job_id)
+
+    def jobs(self) -> list[TrainingJob]:
+        """The latest ``MAX_LISTED_JOBS`` jobs, oldest first."""
+        with Session(engine) as session:
+            jobs = session.exec(
+                select(TrainingJob)
+                .order_by(TrainingJob.created.desc())  # pyright: ignore
+                .limit(MAX_LISTED_JOBS)
+            ).all()
+        return list(reversed(jobs))
+
+    def cancel(self, job_id: str) -> Optional[TrainingJob]:
+        """
+        Cancels a job. One queued in this worker is dropped right away; any
+        other stops at its next cancellation check (see ``run_training``).
+        """
+        with self._lock:
+            future = self._futures.get(job_id)
+        if future is not None and future.cancel():
+            # _finish records the cancellation
+            return self.get(job_id)
+
+        with Session(engine) as session:
+            session.exec(
+                update(TrainingJob)  # pyright: ignore
+                .where(
+                    TrainingJob.id == job_id,  # pyright: ignore
+                    TrainingJob.finished.is_(None),  # pyright: ignore
+                )
+                .values(cancel_requested=True, step="cancelling")
+            )
+            session.commit()
+        return self.get(job_id)
+
+    def shutdown(self):
+        """
+        Cancels the jobs queued in this worker, stops its running ones at
+        their next cancellation check and shuts the pool down.
+        """
+        with self._lock:
+            futures = dict(self._futures)
+            executor, self._executor = self._executor, None
+        # Done callbacks run right away and take the lock
+        running = [
+            job_id
+            for job_id, future in futures.items()
+            if not future.cancel() and not future.done()
+        ]
+        if running:
+            with Session(engine) as session:
+                session.exec(
+                    update(TrainingJob)  # pyright: ignore
+                    .where(TrainingJob.id.in_(running))  # pyright: ignore
+                    .values(cancel_requested=True)
+                )
+                session.commit()
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+# Shared job manager used by the training endpoints
+training_jobs = JobManager()
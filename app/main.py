@@ -1,51 +1,98 @@
+import asyncio
 from contextlib import asynccontextmanager
 
-import httpx
-from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.cron import CronTrigger
 from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, PlainTextResponse
 from fastapi.templating import Jinja2Templates
 
-from app.database import create_db_and_tables
+from app import metrics
+from app.config import (
+    SCRAPE_SCHEDULE,
+    SCRAPE_SCHEDULE_MIN_INTERVAL,
+    SEARCH_BACKEND,
+)
+from app.crawl_jobs import CrawlJobRunning, run_crawl_job
+from app.database import (
+    async_engine,
+    create_database_if_not_exists,
+    create_db_and_tables,
+    engine,
+)
+from app.extraction import extraction_pool
+from app.instrumentation import RequestMetricsMiddleware
+from app.jobs import training_jobs
 from app.routers import classifier, rss_scrape, scrape, search, train
+from app.search_index import publication_search_index
+
+# Runs coroutine jobs on the server's event loop; started with the app
+scheduler = AsyncIOScheduler()
+
+
+async def scheduled_scrape_job():
+    """
+    Crawls the publications on schedule. Every worker fires the job; the one
+    that takes the crawl lock runs it and the others skip.
+    """
+    try:
+        run = await run_crawl_job(
+            scrape.PUBLICATIONS_JOB,
+            "scheduled",
+            scrape.crawl_and_store,
+            min_interval=SCRAPE_SCHEDULE_MIN_INTERVAL,
+        )
+    except CrawlJobRunning:
+        print("Scheduled scrape skipped: a crawl is already running.")
+        return
+    if run is None:
+        print("Scheduled scrape skipped: another worker already ran it.")
+        return
+
+    print(f"Scheduled scrape finished in {run.duration_seconds:.1f}s.")
+    result = run.result or {}
+    if SEARCH_BACKEND == "memory" and (result["inserted"] or result["updated"]):
+        await asyncio.to_thread(publication_search_index.refresh)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # Bootstrapped here, not at import: importing the app (and every spawned
+    # training or extraction process) must not connect to PostgreSQL
+    create_database_if_not_exists()
     print("Creating database tables...")
     create_db_and_tables()
     print("Database tables created.")
+    if SEARCH_BACKEND == "memory":
+        # Maps the latest snapshot, or builds the index on the first start
+        publication_search_index.current()
+    if SCRAPE_SCHEDULE:
+        scheduler.add_job(
+            scheduled_scrape_job,
+            CronTrigger.from_crontab(SCRAPE_SCHEDULE),
+            id="scheduled_scrape",
+            # A late or overdue run fires once, never alongside itself
+            max_instances=1,
+            coalesce=True,
+            misfire_grace_time=3600,
+            replace_existing=True,
+        )
+        scheduler.start()
     yield
+    if scheduler.running:
+        scheduler.shutdown(wait=False)
+    training_jobs.shutdown()
+    extraction_pool.shutdown()
+    # Close the pooled connections
+    await async_engine.dispose()
+    engine.dispose()
 
 
 app = FastAPI(lifespan=lifespan)
+app.add_middleware(RequestMetricsMiddleware)
 
 templates = Jinja2Templates(directory="app/templates")
 
-# HTTP client for scraping requests
-http_client = httpx.AsyncClient()
-
-# Background scheduler setup
-scheduler = BackgroundScheduler()
-
-
-# Scrape job triggered by scheduler
-@scheduler.scheduled_job("cron", day=1, hour=0, minute=0, second=0)
-async def monthly_scrape_job():
-    """Triggers /scrape endpoint once a month."""
-    async with http_client as client:
-        response = await client.get("http://127.0.0.1:8000/scrape")
-        print(
-            "Scrape triggered!"
-            if response.status_code == 200
-            else f"Error: {response.status_code}"
-        )
-
-
-# Start the scheduler
-scheduler.start()
-
-
 app.include_router(scrape.router)
 app.include_router(search.router)
 app.include_router(rss_scrape.router)
@@ -57,3 +104,11 @@ app.include_router(classifier.router)
 async def home_page(request: Request):
     """Renders the main home page with Task 1 and Task 2 buttons."""
     return templates.TemplateResponse("home.html", {"request": request})
+
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    """Exposes the metrics of this worker in the Prometheus text format."""
+    return PlainTextResponse(
+        metrics.exposition(), media_type=metrics.CONTENT_TYPE
+    )
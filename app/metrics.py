@@ -0,0 +1,271 @@
+import bisect
+import threading
+from typing import Generic, Sequence, TypeVar
+
+# Default histogram buckets (seconds), suited to request and inference latency
+LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+class Counter:
+    """Monotonically increasing value."""
+
+    def __init__(self, name: str, description: str = ""):
+        self.name = name
+        self.description = description
+        self._lock = threading.Lock()
+        self._value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+    def snapshot(self) -> float:
+        return self._value
+
+
+class Gauge(Counter):
+    """Value that can go up and down."""
+
+    def set(self, value: float):
+        with self._lock:
+            self._value = value
+
+    def dec(self, amount: float = 1.0):
+        self.inc(-amount)
+
+
+class Histogram:
+    """Cumulative-bucket histogram of observed values."""
+
+    def __init__(
+        self,
+        name: str,
+        description: str = "",
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self._sum = 0.0
+        self._count = 0
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def sum(self) -> float:
+        return self._sum
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts, total, count = list(self._counts), self._sum, self._count
+        cumulative, buckets = 0, {}
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            buckets[_format_bound(bound)] = cumulative
+        return {"count": count, "sum": total, "buckets": buckets}
+
+
+M = TypeVar("M", Counter, Gauge, Histogram)
+
+
+class MetricFamily(Generic[M]):
+    """
+    A metric split by label values, e.g. request latency per route: one child
+    metric per combination of values, created on first use.
+    """
+
+    def __init__(
+        self,
+        kind: type[M],
+        name: str,
+        description: str,
+        labels: Sequence[str],
+        **options,
+    ):
+        self.kind = kind
+        self.name = name
+        self.description = description
+        self.label_names = tuple(labels)
+        self._options = options
+        self._children: dict[tuple[str, ...], M] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str) -> M:
+        """The child metric of ``values``, one per label name, in order."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.label_names):
+                raise ValueError(
+                    f"{self.name} takes labels {self.label_names}, got {values}"
+                )
+            with self._lock:
+                child = self._children.setdefault(
+                    values,
+                    self.kind(self.name, self.description, **self._options),
+                )
+        return child
+
+    def children(self) -> list[tuple[dict[str, str], M]]:
+        with self._lock:
+            items = sorted(self._children.items())
+        return [
+            (dict(zip(self.label_names, values)), child)
+            for values, child in items
+        ]
+
+    def snapshot(self) -> dict:
+        return {
+            ",".join(f"{k}={v}" for k, v in labels.items()): child.snapshot()
+            for labels, child in self.children()
+        }
+
+
+# All metrics created through the helpers below, keyed by name
+REGISTRY: dict[str, Counter | Histogram | MetricFamily] = {}
+
+
+def _register(metric):
+    return REGISTRY.setdefault(metric.name, metric)
+
+
+def counter(name: str, description: str = "") -> Counter:
+    return _register(Counter(name, description))
+
+
+def gauge(name: str, description: str = "") -> Gauge:
+    return _register(Gauge(name, description))
+
+
+def histogram(
+    name: str, description: str = "", buckets: Sequence[float] = LATENCY_BUCKETS
+) -> Histogram:
+    return _register(Histogram(name, description, buckets))
+
+
+def counter_family(
+    name: str, description: str, labels: Sequence[str]
+) -> MetricFamily[Counter]:
+    return _register(MetricFamily(Counter, name, description, labels))
+
+
+def gauge_family(
+    name: str, description: str, labels: Sequence[str]
+) -> MetricFamily[Gauge]:
+    return _register(MetricFamily(Gauge, name, description, labels))
+
+
+def histogram_family(
+    name: str,
+    description: str,
+    labels: Sequence[str],
+    buckets: Sequence[float] = LATENCY_BUCKETS,
+) -> MetricFamily[Histogram]:
+    return _register(
+        MetricFamily(Histogram, name, description, labels, buckets=buckets)
+    )
+
+
+def snapshot(prefix: str = "") -> dict:
+    """Returns the current value of every registered metric."""
+    return {
+        name: metric.snapshot()
+        for name, metric in sorted(REGISTRY.items())
+        if name.startswith(prefix)
+    }
+
+
+# Content type of the Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_bound(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else str(bound)
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    """``k="v",...`` with the values escaped."""
+    return ",".join(
+        '{}="{}"'.format(
+            name,
+            str(value)
+            .replace("\\", "\\\\")
+            .replace("\n", "\\n")
+            .replace('"', '\\"'),
+        )
+        for name, value in labels.items()
+    )
+
+
+def _samples(name: str, labels: dict[str, str], metric) -> list[str]:
+    pairs = _format_labels(labels)
+    braced = "{" + pairs + "}" if pairs else ""
+    if not isinstance(metric, Histogram):
+        return [f"{name}{braced} {_format_value(metric.value)}"]
+    state = metric.snapshot()
+    le_prefix = pairs + "," if pairs else ""
+    lines = [
+        f'{name}_bucket{{{le_prefix}le="{le}"}} {count}'
+        for le, count in state["buckets"].items()
+    ]
+    lines.append(f"{name}_sum{braced} {_format_value(state['sum'])}")
+    lines.append(f"{name}_count{braced} {state['count']}")
+    return lines
+
+
+def exposition() -> str:
+    """
+    Renders every registered metric in the Prometheus text format. Values
+    are those of this process; with several workers each one is scraped
+    (or aggregated) separately.
+    """
+    lines = []
+    for name, metric in sorted(REGISTRY.items()):
+        kind = metric.kind if isinstance(metric, MetricFamily) else type(metric)
+        description = metric.description.replace("\\", "\\\\").replace(
+            "\n", "\\n"
+        )
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {kind.__name__.lower()}")
+        children = (
+            metric.children()
+            if isinstance(metric, MetricFamily)
+            else [({}, metric)]
+        )
+        for labels, child in children:
+            lines += _samples(name, labels, child)
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,212 @@
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Optional
+
+import joblib
+
+from app import metrics
+from app.config import MODEL_PATH, SNAPSHOT_DIR
+from app.snapshot import (
+    Snapshot,
+    current_version,
+    load_snapshot,
+    write_snapshot,
+)
+
+SNAPSHOT_NAME = "classifier"
+ARTIFACT_FILE = "artifact.joblib"
+
+model_load_time = metrics.histogram(
+    "classifier_model_load_seconds",
+    "Time to load the classifier artifact (snapshot or model file)",
+)
+
+
+class ModelNotFoundError(Exception):
+    """Raised when no trained model artifact exists on disk."""
+
+
+class ModelRegistry:
+    """
+    Process-wide cache for the trained classifier artifact.
+
+    The artifact is loaded once and served from memory. Every lookup does a
+    cheap ``os.stat`` of the model file (and reads the snapshot pointer) and
+    reloads only when either changed, so a new model published by ``/train``
+    is picked up without a restart.
+
+    When the current snapshot was taken from the model file on disk, it is
+    memory-mapped instead of unpickling the file: loading takes milliseconds
+    and every worker shares the same pages.
+    """
+
+    def __init__(
+        self, path: str = MODEL_PATH, snapshot_root: str = SNAPSHOT_DIR
+    ):
+        self.path = path
+        self.snapshot_root = snapshot_root
+        self._lock = threading.Lock()
+        self._artifact: Optional[dict[str, Any]] = None
+        self._version: Optional[tuple] = None
+
+    def _file_version(self) -> Optional[tuple]:
+        return _file_version(self.path)
+
+    def _load(self, version: tuple, snapshot_version: Optional[str]):
+        if snapshot_version is not None:
+            snapshot = load_snapshot(
+                SNAPSHOT_NAME, snapshot_version, self.snapshot_root
+            )
+            if snapshot and snapshot.meta.get("source") == list(version):
+                try:
+                    return artifact_from_snapshot(snapshot)
+                except FileNotFoundError:
+                    pass  # Pruned while mapping; the model file is complete
+        return joblib.load(self.path)
+
+    @property
+    def version(self) -> Optional[tuple]:
+        """Version of the artifact currently held in memory."""
+        return self._version
+
+    def get(self) -> dict[str, Any]:
+        """
+        Returns the loaded artifact, reloading it if the file on disk changed.
+
+        Raises:
+            ModelNotFoundError: If no model has been trained yet.
+        """
+        version = self._file_version()
+        if version is None:
+            raise ModelNotFoundError(
+                "Trained model not found. Please train the model first."
+            )
+
+        version = (
+            *version,
+            current_version(SNAPSHOT_NAME, self.snapshot_root),
+        )
+        if version != self._version:
+            with self._lock:
+                # Another thread may have reloaded while we waited for the lock
+                if version != self._version:
+                    start = time.perf_counter()
+                    artifact = self._load(version[:-1], version[-1])
+                    model_load_time.observe(time.perf_counter() - start)
+                    self._artifact, self._version = artifact, version
+
+        return self._artifact  # pyright: ignore
+
+    def invalidate(self):
+        """Drops the cached artifact so the next lookup reloads it."""
+        with self._lock:
+            self._artifact, self._version = None, None
+
+
+def load_model_file(path: str = MODEL_PATH) -> Optional[dict[str, Any]]:
+    """
+    Unpickles the model file itself rather than its snapshot, for training
+    code that needs the fitted vectorizer and estimators.
+    """
+    try:
+        return joblib.load(path)
+    except FileNotFoundError:
+        return None
+
+
+def _file_version(path: str) -> Optional[tuple]:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    # The inode changes on every atomic replace, mtime/size catch in-place edits
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def save_model_snapshot(
+    artifact: dict[str, Any],
+    source: tuple,
+    root: str = SNAPSHOT_DIR,
+) -> str:
+    """
+    Publishes a memory-mappable snapshot of ``artifact``.
+
+    A fitted ``TfidfVectorizer`` (or a compacted one) is stored as
+    vocabulary, column and idf arrays; the rest of the artifact is dumped
+    uncompressed with joblib so its NumPy arrays can be mapped too.
+    ``source`` is the version of the model file the snapshot was taken from.
+    """
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    from app.inference import SnapshotVectorizer
+
+    artifact = dict(artifact)
+    arrays, meta = {}, {"source": list(source)}
+    vectorizer = artifact.get("vectorizer")
+    if isinstance(vectorizer, TfidfVectorizer):
+        vectorizer = SnapshotVectorizer.from_vectorizer(vectorizer)
+    if isinstance(vectorizer, SnapshotVectorizer):
+        del artifact["vectorizer"]
+        arrays, meta["vectorizer_params"] = vectorizer.arrays, vectorizer.params
+    return write_snapshot(
+        SNAPSHOT_NAME,
+        arrays,
+        meta,
+        files={ARTIFACT_FILE: lambda path: joblib.dump(artifact, path)},
+        root=root,
+    )
+
+
+def artifact_from_snapshot(snapshot: Snapshot) -> dict[str, Any]:
+    from app.inference import SnapshotVectorizer
+
+    artifact = joblib.load(
+        os.path.join(snapshot.path, ARTIFACT_FILE), mmap_mode="r"
+    )
+    if "vectorizer_params" in snapshot.meta:
+        artifact["vectorizer"] = SnapshotVectorizer(
+            snapshot.arrays["terms"],
+            snapshot.arrays["columns"],
+            snapshot.arrays["idf"],
+            snapshot.meta["vectorizer_params"],
+        )
+    return artifact
+
+
+def publish_model(
+    artifact: dict[str, Any],
+    path: str = MODEL_PATH,
+    snapshot_root: str = SNAPSHOT_DIR,
+):
+    """
+    Atomically writes a model artifact to ``path`` and snapshots it.
+
+    The artifact is dumped to a temporary file in the same directory and moved
+    into place with ``os.replace``, so readers only ever see the old or the new
+    complete file, never a partially written one.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as tmp_file:
+            joblib.dump(artifact, tmp_file)
+            tmp_file.flush()
+            os.fsync(tmp_file.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    save_model_snapshot(
+        artifact, _file_version(path), snapshot_root  # pyright: ignore
+    )
+    model_registry.invalidate()
+
+
+# Shared registry used by the classifier endpoints
+model_registry = ModelRegistry()
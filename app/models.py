@@ -1,10 +1,20 @@
-from typing import Annotated, Dict, List, Optional
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
 
-from sqlalchemy import Column
+from sqlalchemy import Column, Computed, DateTime, text
 from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
-from sqlalchemy.orm import mapped_column
 from sqlmodel import Field, Index, SQLModel
 
+# Search document maintained by PostgreSQL itself: the title weighted A and
+# the author names from the ``authors`` JSONB weighted B
+PUBLICATION_SEARCH_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(jsonb_to_tsvector('english', "
+    "coalesce(jsonb_path_query_array(authors, '$[*].name'), '[]'::jsonb), "
+    "'[\"string\"]'), 'B')"
+)
+
 
 class Publication(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
@@ -14,15 +24,19 @@ class Publication(SQLModel, table=True):
         sa_column=Column(JSONB)
     )  # Store as JSON
     year: Optional[str] = None
-    search_vector: Annotated[
-        Optional[str],
-        mapped_column(TSVECTOR, nullable=False, server_default="''"),
-    ]
+    search_vector: Optional[str] = Field(
+        default=None,
+        sa_column=Column(
+            TSVECTOR, Computed(PUBLICATION_SEARCH_VECTOR, persisted=True)
+        ),
+    )
 
     __table_args__ = (
         Index(
             "publication_search_idx", "search_vector", postgresql_using="gin"
         ),
+        # Natural key used to upsert scraped publications
+        Index("publication_link_idx", "link"),
     )
 
     model_config = {"arbitrary_types_allowed": True}  # pyright: ignore
@@ -32,3 +46,71 @@ class Prediction(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     content: str
     category: str
+
+    __table_args__ = (
+        # Scraped documents are upserted on the hash of their content
+        Index("prediction_content_md5_idx", text("md5(content)")),
+    )
+
+
+class CrawlJobRun(SQLModel, table=True):
+    """One run of a crawl job; the table is the crawl history."""
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    job: str
+    trigger: str  # "scheduled" or "manual"
+    status: str = "running"  # "running", "succeeded" or "failed"
+    started_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_column=Column(DateTime(timezone=True), nullable=False),
+    )
+    finished_at: Optional[datetime] = Field(
+        default=None, sa_column=Column(DateTime(timezone=True))
+    )
+    duration_seconds: Optional[float] = None
+    # Counts and crawl statistics of a successful run
+    result: Optional[Dict] = Field(default=None, sa_column=Column(JSONB))
+    error: Optional[str] = None
+
+    __table_args__ = (
+        Index("crawljobrun_job_started_idx", "job", "started_at"),
+    )
+
+
+class TrainingJob(SQLModel, table=True):
+    """
+    A queued, running or finished training job. Kept in the database so any
+    worker can report or cancel a job accepted by another one.
+    """
+
+    id: str = Field(primary_key=True)
+    mode: str  # "full", "streaming" or "incremental"
+    # "queued", "running", "succeeded", "failed" or "cancelled"
+    status: str = "queued"
+    progress: float = 0.0
+    step: str = ""
+    total_samples: Optional[int] = None
+    result: Optional[str] = None
+    error: Optional[str] = None
+    created: float = Field(default_factory=time.time)
+    finished: Optional[float] = None
+    # Seconds spent in each step, once succeeded
+    phases: Dict = Field(default_factory=dict, sa_column=Column(JSONB))
+    # Set by any worker; the training process stops at its next check
+    cancel_requested: bool = False
+
+    __table_args__ = (Index("trainingjob_created_idx", "created"),)
+
+    def as_dict(self) -> dict:
+        return self.model_dump(exclude={"cancel_requested"})
+
+
+class TableGeneration(SQLModel, table=True):
+    """
+    How many times scraped data was committed to a table. Caches built from
+    the table in any worker process compare it with the generation they
+    were built at.
+    """
+
+    table_name: str = Field(primary_key=True)
+    generation: int = 0
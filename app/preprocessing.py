@@ -0,0 +1,77 @@
+import html
+import multiprocessing
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Sequence
+
+# Runs of anything but letters, digits, underscores and whitespace
+PUNCTUATION = re.compile(r"[^\w\s]+")
+
+
+def normalize_document(text: str) -> str:
+    """
+    Normalizes scraped text before it is stored: HTML entities (``&quot;``,
+    ``&amp;``, ...) decoded and whitespace collapsed to single spaces.
+    """
+    # str.split() splits on the same characters as the regex \s
+    return " ".join(html.unescape(text).split())
+
+
+def clean_text(text: str) -> str:
+    """
+    Normalizes a document for the classifier: whitespace collapsed,
+    punctuation removed and lowercased. Training and inference both go
+    through this function, so the model always sees the same text.
+    """
+    return PUNCTUATION.sub("", " ".join(text.split())).lower().strip()
+
+
+def _clean_chunk(texts: Sequence[str]) -> list[str]:
+    return [clean_text(text) for text in texts]
+
+
+def _is_series(texts) -> bool:
+    pandas = sys.modules.get("pandas")  # Never imported here
+    return pandas is not None and isinstance(texts, pandas.Series)
+
+
+def clean_texts(texts: Sequence[str], processes: int = 1, min_batch: int = 0):
+    """
+    ``clean_text`` of every document of a list or pandas Series.
+
+    Args:
+        texts: The documents; a Series gives a Series with the same index.
+        processes: Worker processes to split the batch across; with 1 or
+            fewer, or fewer than ``min_batch`` documents, everything is
+            cleaned in the calling process.
+        min_batch: Smallest batch worth starting worker processes for.
+
+    Returns:
+        list[str]: The cleaned documents, in order.
+    """
+    if processes > 1 and len(texts) >= max(min_batch, processes):
+        documents = list(texts)
+        size = -(-len(documents) // (processes * 4))
+        # Spawned (not forked) processes do not inherit server threads
+        with ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as pool:
+            cleaned = [
+                text
+                for chunk in pool.map(
+                    _clean_chunk,
+                    [
+                        documents[i : i + size]
+                        for i in range(0, len(documents), size)
+                    ],
+                )
+                for text in chunk
+            ]
+    else:
+        cleaned = _clean_chunk(texts)
+
+    if _is_series(texts):
+        return type(texts)(cleaned, index=texts.index, name=texts.name)
+    return cleaned
@@ -1,10 +1,21 @@
-import os
+from typing import TYPE_CHECKING, Dict, List
 
-import joblib
-from fastapi import APIRouter, Form, Request
+from fastapi import APIRouter, Form, HTTPException, Request
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel
 
+from app import metrics
+from app.batching import MicroBatcher
+from app.config import (
+    CLASSIFY_COALESCE_MAX_BATCH,
+    CLASSIFY_COALESCE_MAX_WAIT_MS,
+    CLASSIFY_MAX_BATCH_SIZE,
+)
+from app.model_registry import ModelNotFoundError, model_registry
+
+if TYPE_CHECKING:
+    from app.inference import DocumentPrediction
+
 # Create the FastAPI router
 router = APIRouter(
     tags=["Task 2"],
@@ -12,11 +23,44 @@ router = APIRouter(
 templates = Jinja2Templates(directory="app/templates")
 
 
+def _classify_texts(texts: list[str]) -> "list[DocumentPrediction]":
+    """Runs one vectorized prediction for texts coalesced from many requests."""
+    # scikit-learn and SciPy load with the first classification
+    from app.inference import predict_batch
+
+    return predict_batch(model_registry.get(), texts).documents()
+
+
+# Coalesces concurrent single-document requests into one model call
+classifier_batcher = MicroBatcher(
+    _classify_texts,
+    max_batch_size=CLASSIFY_COALESCE_MAX_BATCH,
+    max_wait_ms=CLASSIFY_COALESCE_MAX_WAIT_MS,
+    name="classifier_batcher",
+)
+
+
 # Define request schema (Only needed for API requests)
 class QueryInput(BaseModel):
     text: str
 
 
+class BatchQueryInput(BaseModel):
+    documents: List[QueryInput]
+
+
+class ClassificationResult(BaseModel):
+    label: str
+    confidence: float
+    probabilities: Dict[str, float]
+    known_terms: bool
+
+
+class BatchClassificationResponse(BaseModel):
+    total: int
+    results: List[ClassificationResult]
+
+
 @router.get("/task2", include_in_schema=False)
 async def show_classification_page(request: Request):
     """Renders the classification page."""
@@ -29,28 +73,13 @@ async def show_classification_page(request: Request):
 async def classify_text(request: Request, text: str = Form(...)):
     """Classifies the input text and returns classification + accuracy."""
 
-    MODEL_PATH = "app/trained_models/trained_model.pkl"
-
-    # Load the trained model and vectorizer
-    if not os.path.exists(MODEL_PATH):
-        return templates.TemplateResponse(
-            "classification.html",
-            {
-                "request": request,
-                "error": "Trained model not found. Please train the model first.",
-            },
-        )
-
-    loaded_data = joblib.load(MODEL_PATH)
-    model = loaded_data["model"]
-    vectorizer = loaded_data["vectorizer"]
-
     try:
-        # Transform the input text using the trained vectorizer
-        query_vectorized = vectorizer.transform([text])
+        # Batched together with other in-flight requests; the model itself
+        # is loaded in the batch worker thread, off the event loop
+        prediction = await classifier_batcher.submit(text)
 
-        # Ensure the input is not empty after vectorization
-        if query_vectorized.shape[1] == 0:
+        # Ensure the input matched at least one known term
+        if not prediction.known_terms:
             return templates.TemplateResponse(
                 "classification.html",
                 {
@@ -60,24 +89,29 @@ async def classify_text(request: Request, text: str = Form(...)):
                 },
             )
 
-        # Predict classification
-        probs = model.predict_proba(query_vectorized)[0]
-        prediction = model.predict(query_vectorized)[0]
+        probs = prediction.probabilities
 
         # Confidence: Probability of the predicted class
-        confidence_index = list(model.classes_).index(prediction)
-        confidence = probs[confidence_index]
+        confidence = probs.max()
 
         return templates.TemplateResponse(
             "classification.html",
             {
                 "request": request,
-                "classification": prediction,
+                "classification": prediction.label,
                 "accuracy": round(float(confidence * 100), 2),
-                "probabilities": dict(zip(model.classes_, probs)),
+                "probabilities": dict(zip(prediction.classes, probs)),
                 "text": text,
             },
         )
+    except ModelNotFoundError as e:
+        return templates.TemplateResponse(
+            "classification.html",
+            {
+                "request": request,
+                "error": str(e),
+            },
+        )
     except Exception as e:
         return templates.TemplateResponse(
             "classification.html",
@@ -87,3 +121,58 @@ async def classify_text(request: Request, text: str = Form(...)):
                 "text": text,
             },
         )
+
+
+@router.post("/api/classify", response_model=BatchClassificationResponse)
+def classify_batch(payload: BatchQueryInput):
+    """
+    Classifies a batch of documents in one vectorized pass.
+
+    Returns the predicted label and the per-class probabilities for every
+    document, in the order they were submitted.
+    """
+    total = len(payload.documents)
+    if total == 0:
+        raise HTTPException(status_code=400, detail="No documents provided.")
+    if total > CLASSIFY_MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {total} documents "
+            f"(maximum is {CLASSIFY_MAX_BATCH_SIZE}).",
+        )
+
+    try:
+        loaded_data = model_registry.get()
+    except ModelNotFoundError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    from app.inference import predict_batch
+
+    prediction = predict_batch(
+        loaded_data, [document.text for document in payload.documents]
+    )
+
+    results = [
+        ClassificationResult(
+            label=label,
+            confidence=round(float(probs.max()), 6),
+            probabilities={
+                cls: round(float(p), 6)
+                for cls, p in zip(prediction.classes, probs)
+            },
+            known_terms=bool(known),
+        )
+        for label, probs, known in zip(
+            prediction.labels,
+            prediction.probabilities,
+            prediction.known_terms,
+        )
+    ]
+
+    return BatchClassificationResponse(total=total, results=results)
+
+
+@router.get("/api/classify/metrics")
+async def classifier_metrics():
+    """Returns queue depth, batch size and wait time metrics of the coalescer."""
+    return metrics.snapshot(prefix="classifier_batcher")
@@ -1,16 +1,26 @@
-import time
+import asyncio
 from typing import cast
 
-import feedparser
-import pandas as pd
-import requests
-from bs4 import BeautifulSoup, Tag
 from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.database import get_db
+from app.config import (
+    EXTRACTION_ENGINE,
+    RSS_DOMAIN_CONCURRENCY,
+    RSS_DOMAIN_DELAY,
+)
+from app.database import get_async_db
+from app.extraction import extract_article, extraction_pool
+from app.http_cache import HttpCache
 from app.models import Prediction
-from app.services import clean_text, store_scraped_data
+from app.preprocessing import normalize_document
+from app.rss_pipeline import HEADERS, RssPipeline
+from app.services import (
+    CSVValidationError,
+    ScrapedDataWriter,
+    bulk_load_csv_async,
+    store_scraped_data,
+)
 
 router = APIRouter(
     tags=["Task 2"],
@@ -32,14 +42,12 @@ FOX_HEALTH_URL = "https://moxie.foxnews.com/google-publisher/health.xml"
 CSV_PATH = "train_data.csv"
 
 
-def get_full_article(url):
-    """Fetch full article content from a given URL"""
-    headers = {"User-Agent": "Mozilla/5.0"}
-    response = requests.get(url, headers=headers)
-    if response.status_code != 200:
-        return None
+def parse_article(page_html: str):
+    """Extract the full article text from an article page"""
+    # Reference parser, only used with EXTRACTION_ENGINE=bs4
+    from bs4 import BeautifulSoup, Tag
 
-    soup = BeautifulSoup(response.text, "html.parser")
+    soup = BeautifulSoup(page_html, "html.parser")
 
     # Extract full article text
     article_body = soup.find("article")
@@ -53,99 +61,139 @@ def get_full_article(url):
     return full_text.strip()
 
 
-def load_csv_to_db(file, db):
-    # Read CSV into DataFrame
-    df = pd.read_csv(file.file)
+# Article parser of the RSS pipeline; parse_article is the reference output
+parse_full_article = (
+    extract_article if EXTRACTION_ENGINE == "lxml" else parse_article
+)
+
 
-    # Check if required columns exist
-    required_columns = {"content", "category"}
-    if not required_columns.issubset(df.columns):
-        raise HTTPException(
-            status_code=400,
-            detail="CSV must contain 'content' and 'category' columns.",
-        )
+def get_full_article(url):
+    """Fetch full article content from a given URL"""
+    import requests
+
+    response = requests.get(url, headers=HEADERS)
+    if response.status_code != 200:
+        return None
 
-    # Convert DataFrame rows to database objects
-    predictions = [
-        Prediction(content=str(row["content"]), category=str(row["category"]))
-        for _, row in df.iterrows()
-    ]
+    return parse_full_article(response.text)
 
-    # Insert into the database
-    db.add_all(predictions)
-    db.commit()
 
-    return predictions
+def read_csv_records(path: str) -> list[dict]:
+    """Reads the labelled CSV as string records (pandas is loaded here)"""
+    import pandas as pd
+
+    df = pd.read_csv(path, usecols=["content", "category"])
+    return df.astype(str).to_dict("records")
+
+
+async def load_csv_to_db(file, db: AsyncSession):
+    """Stream a labelled CSV into the Prediction table with COPY"""
+    try:
+        counts = await bulk_load_csv_async(
+            db, file.file, Prediction, ["content", "category"]
+        )
+    except CSVValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    await db.commit()
+
+    return counts
 
 
 @router.post("/rss-scrape")
-def rss_data(session: Session = Depends(get_db)):
-    """Scrape news articles from multiple sources and store them."""
+async def rss_data(
+    refresh: bool = False, session: AsyncSession = Depends(get_async_db)
+):
+    """
+    Scrape news articles from multiple sources and store them.
+
+    Articles unchanged since the last scrape are skipped; ``refresh`` parses
+    and stores every article again.
+    """
     sources = {
         "Politics": [BBC_POLITICS_URL, CNN_POLITICS_URL, FOX_POLITICS_URL],
         "Business": [BBC_BUSINESS_URL, CNN_BUSINESS_URL, FOX_BUSINESS_URL],
         "Health": [BBC_HEALTH_URL, CNN_HEALTH_URL, FOX_HEALTH_URL],
     }
 
-    documents = []
     per_category_limit = 20
 
-    for category, urls in sources.items():
-        count = 0
-        for url in urls:
-            if count >= per_category_limit:
-                break  # Stop if per-category limit is reached
-            feed = feedparser.parse(url)
-            for entry in feed.entries:
-                if count >= per_category_limit:
-                    break  # Stop if per-category limit is reached
-
-                full_text = get_full_article(entry.link)
-                if full_text:
-                    documents.append(
-                        {"content": clean_text(full_text), "category": category}
-                    )
-                    count += 1
-                    print(f"✔ Fetched article: {entry.link}")
-
-                time.sleep(1)  # Sleep to avoid getting blocked
-
-    if documents:
-        store_scraped_data(session, Prediction, documents)
-
-        # Load CSV data after scraping
-        try:
-            with open(CSV_PATH, "rb") as csv_file:
-
-                class FakeUploadFile:
-                    def __init__(self, file):
-                        self.file = file
+    # Documents are upserted in batches as they are scraped, keyed on the
+    # hash of their content. The writer's sync session only does I/O inside
+    # run_sync, on the async session's connection.
+    writer = ScrapedDataWriter(
+        session.sync_session, Prediction, key="content", hash_key=True
+    )
+
+    async def write(batch: list[dict]):
+        await session.run_sync(lambda _: writer.write(batch))
+
+    cache = HttpCache(refresh=refresh)
+    pipeline = RssPipeline(
+        parse_full_article,
+        normalize_document,
+        per_domain_concurrency=RSS_DOMAIN_CONCURRENCY,
+        per_domain_delay=RSS_DOMAIN_DELAY,
+        cache=cache,
+        # Worker processes can only import the lxml extractor
+        executor=(
+            extraction_pool.executor() if EXTRACTION_ENGINE == "lxml" else None
+        ),
+    )
+    try:
+        stats = await pipeline.run(sources, per_category_limit, sink=write)
+    except Exception:
+        await session.rollback()
+        raise
 
-                csv_file_obj = FakeUploadFile(csv_file)
-                load_csv_to_db(csv_file_obj, session)  # Load CSV data
+    if not writer.total:
+        await session.rollback()
+    else:
+        await session.run_sync(lambda _: writer.commit())
 
-            print("✔ CSV data loaded successfully.")
+        # Load CSV data after scraping, skipping rows already stored
+        try:
+            records = await asyncio.to_thread(read_csv_records, CSV_PATH)
+            csv_counts = await session.run_sync(
+                lambda sync_session: store_scraped_data(
+                    sync_session,
+                    Prediction,
+                    records,
+                    key="content",
+                    hash_key=True,
+                )
+            )
+            print(f"✔ CSV data loaded successfully: {csv_counts}")
         except Exception as e:
             print(f"Error loading CSV: {e}")
 
+    # Articles only count as seen once their documents are stored
+    await asyncio.to_thread(cache.commit)
+
     return {
         "message": "Scraping completed successfully!",
-        "total_records": len(documents),
+        "total_records": writer.total,
+        **writer.counts,
+        "pipeline": stats.as_dict(),
+        "cache": cache.stats.as_dict(),
     }
 
 
 @router.post("/upload-csv")
 async def upload_csv(
-    file: UploadFile = File(...), db: Session = Depends(get_db)
+    file: UploadFile = File(...), db: AsyncSession = Depends(get_async_db)
 ):
     """Upload a CSV file and insert its data into the database."""
     try:
-        predictions = load_csv_to_db(file, db)
+        counts = await load_csv_to_db(file, db)
 
         return {
             "message": "CSV data inserted successfully!",
-            "total_records": len(predictions),
+            "total_records": counts["inserted"],
+            "skipped_records": counts["skipped"],
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,13 +1,26 @@
-import time
-from typing import cast
+import asyncio
+import html
+import re
+from typing import Optional, cast
 
-import cloudscraper
-from bs4 import BeautifulSoup, Tag
-from fastapi import APIRouter, Depends
-from sqlmodel import Session
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.database import get_db
+from app.config import (
+    EXTRACTION_ENGINE,
+    SCRAPE_CONCURRENCY,
+    SCRAPE_MAX_RETRIES,
+    SCRAPE_RATE_BURST,
+    SCRAPE_RATE_PER_HOST,
+    SEARCH_BACKEND,
+)
+from app.crawl_jobs import CrawlJobRunning, recent_runs, run_crawl_job
+from app.crawler import Crawler
+from app.database import get_async_db
+from app.extraction import extract_publications, extraction_pool
+from app.http_cache import HttpCache
 from app.models import Publication
+from app.search_index import publication_search_index
 from app.services import store_scraped_data
 
 router = APIRouter(
@@ -18,110 +31,244 @@ BASE_URL = "https://pureportal.coventry.ac.uk"
 URLS = [
     "/en/organisations/fbl-school-of-economics-finance-and-accounting/publications/"
 ]
+# Crawl job name of the publication scrape, in the crawl history
+PUBLICATIONS_JOB = "publications"
 
 
-def scrape_page(base_url: str, url: str):
-    """
-    Scrapes a single page and inserts data into the database.
-    """
-    try:
-        scraper = cloudscraper.create_scraper()  # Bypass Cloudflare
-        response = scraper.get(base_url + url)
+# Matches <a> tags carrying the "nextLink" class, whatever the attribute order
+NEXT_LINK_TAG = re.compile(
+    r"<a\b[^>]*\bclass=[\"'][^\"']*\bnextLink\b[^>]*>", re.IGNORECASE
+)
+HREF_ATTR = re.compile(r"\bhref=[\"']([^\"']*)[\"']", re.IGNORECASE)
 
-        soup = BeautifulSoup(response.text, "html.parser")
 
-        publications = []
+def create_session(pool_size: int = SCRAPE_CONCURRENCY):
+    """Creates a Cloudflare-aware session sized for the crawler pool."""
+    import cloudscraper
 
-        for div in soup.find_all("div", class_="result-container"):
-            div = cast(Tag, div)
+    scraper = cloudscraper.create_scraper()  # Bypass Cloudflare
+    for adapter in scraper.adapters.values():
+        adapter.init_poolmanager(pool_size, pool_size)
+    return scraper
 
-            title_tag = div.find("h3", class_="title")
-            link_tag = div.find("a")
-            year_tag = div.find("span", class_="date")
-            authors_tags = div.find_all("a", class_="link person")
 
-            title = title_tag.get_text(strip=True) if title_tag else "No Title"
-            link = (
-                str(link_tag["href"])
-                if isinstance(link_tag, Tag) and "href" in link_tag.attrs
-                else "No URL"
-            )
-            year = year_tag.text.strip() if year_tag else "No Year"
-            authors = (
-                [
-                    {
-                        "name": author.text.strip(),
-                        "link": (
-                            str(author["href"])
-                            if isinstance(author, Tag)
-                            and "href" in author.attrs
-                            else ""
-                        ),
-                    }
-                    for author in authors_tags
-                ]
-                if authors_tags
-                else []
-            )
+def find_next_page(page_html: str) -> str:
+    """Extracts the next page link without parsing the whole document."""
+    tag = NEXT_LINK_TAG.search(page_html)
+    href = HREF_ATTR.search(tag.group(0)) if tag else None
+    return html.unescape(href.group(1)) if href else ""
 
-            if not authors:
-                continue
 
-            publications.append(
+def parse_page(page_html: str):
+    """
+    Extracts the publications and the next page link from a results page.
+    """
+    # Reference parser, only used with EXTRACTION_ENGINE=bs4
+    from bs4 import BeautifulSoup, Tag
+
+    soup = BeautifulSoup(page_html, "html.parser")
+
+    publications = []
+
+    for div in soup.find_all("div", class_="result-container"):
+        div = cast(Tag, div)
+
+        title_tag = div.find("h3", class_="title")
+        link_tag = div.find("a")
+        year_tag = div.find("span", class_="date")
+        authors_tags = div.find_all("a", class_="link person")
+
+        title = title_tag.get_text(strip=True) if title_tag else "No Title"
+        link = (
+            str(link_tag["href"])
+            if isinstance(link_tag, Tag) and "href" in link_tag.attrs
+            else "No URL"
+        )
+        year = year_tag.text.strip() if year_tag else "No Year"
+        authors = (
+            [
                 {
-                    "title": title,
-                    "link": link,
-                    "authors": authors,
-                    "year": year,
+                    "name": author.text.strip(),
+                    "link": (
+                        str(author["href"])
+                        if isinstance(author, Tag) and "href" in author.attrs
+                        else ""
+                    ),
                 }
-            )
+                for author in authors_tags
+            ]
+            if authors_tags
+            else []
+        )
 
-        # Get next page link
-        next_tag = soup.find("a", class_="nextLink")
-        next_page = (
-            str(next_tag["href"])
-            if isinstance(next_tag, Tag) and "href" in next_tag.attrs
-            else ""
+        if not authors:
+            continue
+
+        publications.append(
+            {
+                "title": title,
+                "link": link,
+                "authors": authors,
+                "year": year,
+            }
         )
 
-        return publications, next_page
+    # Get next page link
+    next_tag = soup.find("a", class_="nextLink")
+    next_page = (
+        str(next_tag["href"])
+        if isinstance(next_tag, Tag) and "href" in next_tag.attrs
+        else ""
+    )
+
+    return publications, next_page
+
+
+# Results page parser of the crawler; parse_page is the reference output
+parse_publications = (
+    extract_publications if EXTRACTION_ENGINE == "lxml" else parse_page
+)
+
+
+def scrape_page(base_url: str, url: str, session=None):
+    """
+    Scrapes a single page and returns its publications and next page link.
+    """
+    try:
+        scraper = session or create_session(1)
+        response = scraper.get(base_url + url)
+
+        return parse_publications(response.text)
 
     except Exception as e:
         print(f"Error scraping data: {e}")
         return None, None
 
 
-@router.post("/scrape")
-def scrape_publications(
-    base_url: str = BASE_URL,
-    url: str = URLS[0],
-    session: Session = Depends(get_db),
+async def crawl_publications(
+    base_url: str,
+    urls: list[str],
+    session=None,
+    cache: Optional[HttpCache] = None,
 ):
     """
-    API endpoint to start scraping.
+    Crawls every results page reachable from ``urls`` concurrently.
+
+    With a ``cache``, pages unchanged since it was last committed are skipped.
+
+    Returns:
+        The scraped publications in page order and the crawl statistics.
     """
-    all_publications = []
+    crawler = Crawler(
+        session or create_session(SCRAPE_CONCURRENCY),
+        concurrency=SCRAPE_CONCURRENCY,
+        rate=SCRAPE_RATE_PER_HOST,
+        burst=SCRAPE_RATE_BURST,
+        max_retries=SCRAPE_MAX_RETRIES,
+        cache=cache,
+        # Results pages are numbered: keep every connection busy
+        lookahead=SCRAPE_CONCURRENCY - 1,
+        # Worker processes can only import the lxml extractor
+        executor=(
+            extraction_pool.executor() if EXTRACTION_ENGINE == "lxml" else None
+        ),
+    )
+    pages = await crawler.crawl(
+        [base_url + url for url in urls],
+        parse=parse_publications,
+        find_next=find_next_page,
+    )
 
-    while url:
-        print(f"Scraping: {url}")
-        scraped_data, next_url = scrape_page(base_url, url)
+    publications = [
+        pub for page_publications, _ in pages for pub in page_publications
+    ]
+    return publications, crawler.stats
 
-        if scraped_data:
-            all_publications.extend(scraped_data)
 
-        if next_url is None:
-            print("No more page to scrape.")
-            return
+async def crawl_and_store(
+    session: AsyncSession,
+    base_url: str = BASE_URL,
+    url: str = URLS[0],
+    refresh: bool = False,
+) -> dict:
+    """
+    Crawls the publication pages and stores new or changed publications.
+
+    Pages unchanged since the last crawl are skipped; ``refresh`` parses and
+    stores every page again.
 
-        url = next_url
-        time.sleep(2)  # Prevent rate-limiting
+    Returns:
+        dict: The number of publications scraped, inserted, updated and
+        unchanged, with the crawl and cache statistics.
+    """
+    cache = HttpCache(refresh=refresh)
+    all_publications, stats = await crawl_publications(
+        base_url, [url], cache=cache
+    )
+    print(
+        f"Scraped {stats.pages} pages in {stats.elapsed:.1f}s "
+        f"({stats.pages_per_second:.2f} pages/sec)"
+    )
 
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0}
     if all_publications:
-        store_scraped_data(
-            session, Publication, all_publications, search_field="search_vector"
+        # Only new or changed publications are written; their search vector
+        # is a generated column kept up to date by PostgreSQL
+        counts = await session.run_sync(
+            lambda sync_session: store_scraped_data(
+                sync_session, Publication, all_publications, key="link"
+            )
         )
+    # Pages only count as seen once their publications are stored
+    await asyncio.to_thread(cache.commit)
 
     return {
-        "message": "Scraping completed successfully!",
         "total_records": len(all_publications),
+        **counts,
+        "crawl": stats.as_dict(),
+        "cache": cache.stats.as_dict(),
     }
+
+
+@router.post("/scrape")
+async def scrape_publications(
+    background_tasks: BackgroundTasks,
+    base_url: str = BASE_URL,
+    url: str = URLS[0],
+    refresh: bool = False,
+):
+    """
+    API endpoint to start scraping.
+
+    Pages unchanged since the last scrape are skipped; ``refresh`` parses
+    and stores every page again. Only one crawl runs at a time across all
+    workers, scheduled or not.
+    """
+    try:
+        run = await run_crawl_job(
+            PUBLICATIONS_JOB,
+            "manual",
+            lambda session: crawl_and_store(session, base_url, url, refresh),
+        )
+    except CrawlJobRunning as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    result = run.result  # pyright: ignore
+    if SEARCH_BACKEND == "memory" and (result["inserted"] or result["updated"]):
+        background_tasks.add_task(publication_search_index.refresh)
+
+    return {
+        "message": "Scraping completed successfully!",
+        "run_id": run.id,  # pyright: ignore
+        "duration_seconds": run.duration_seconds,  # pyright: ignore
+        **result,
+    }
+
+
+@router.get("/scrape/runs")
+async def list_crawl_runs(
+    limit: int = Query(20, ge=1, le=100),
+    session: AsyncSession = Depends(get_async_db),
+):
+    """Returns the latest crawl runs, newest first, with their durations."""
+    return await recent_runs(session, limit)
@@ -1,80 +1,341 @@
+import asyncio
+import json
 import time
+from dataclasses import dataclass, field
+from typing import Literal, Optional
 
-from fastapi import APIRouter, Depends, Query, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from fastapi.responses import HTMLResponse
 from fastapi.templating import Jinja2Templates
-from sqlalchemy import cast, func, select
-from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy import REAL, and_, cast, func, join, or_, select, text, true
 from sqlalchemy.orm import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.database import get_db
+from app import metrics
+from app.config import (
+    SEARCH_BACKEND,
+    SEARCH_COUNT_CAP,
+    SEARCH_MAX_PAGE_SIZE,
+    SEARCH_PAGE_SIZE,
+)
+from app.database import get_async_db
 from app.models import Publication
+from app.search_cache import normalize_query, publication_search_cache
+from app.search_index import publication_search_index
+from app.services import table_generation
 
 router = APIRouter(
     tags=["Task 1"],
 )
 templates = Jinja2Templates(directory="app/templates")
 
+CountMode = Literal["none", "estimate", "exact"]
+Operator = Literal["or", "and"]
 
-@router.get("/task1", response_class=HTMLResponse, include_in_schema=False)
-def search_publications(
-    request: Request,
-    query: str = Query("", alias="query", description="Search query"),
-    db: Session = Depends(get_db),
-):
-    start_time = time.time()
-    # Format query for `to_tsquery`
-    formatted_query = " | ".join(
-        query.split()
-    )  # Converts "word1 word2" → "word1 | word2"
+search_latency = metrics.histogram_family(
+    "search_seconds", "Time to rank and load one page of results", ("backend",)
+)
 
-    # Explicitly cast `search_vector` to `TSVECTOR`
-    search_vector_casted = cast(Publication.search_vector, TSVECTOR)
 
-    stmt = (
+@dataclass
+class SearchPage:
+    results: list[dict] = field(default_factory=list)
+    has_more: bool = False
+    total: Optional[int] = None
+    total_is_exact: bool = False
+
+
+def format_query(query: str, operator: Operator = "or") -> str:
+    """Converts "word1 word2" → "word1 | word2" (or "&") for `to_tsquery`."""
+    return (" & " if operator == "and" else " | ").join(query.split())
+
+
+def encode_cursor(rank: float, publication_id: int) -> str:
+    return f"{rank!r}:{publication_id}"
+
+
+def decode_cursor(cursor: str) -> tuple[float, int]:
+    rank, publication_id = cursor.rsplit(":", 1)
+    return float(rank), int(publication_id)
+
+
+def count_matches(db: Session, formatted_query: str, mode: CountMode):
+    """
+    Counts the matching publications without fetching them.
+
+    ``estimate`` reads the planner's row estimate (no rows are touched);
+    ``exact`` counts index matches but stops at ``SEARCH_COUNT_CAP``.
+
+    Returns:
+        The count (or None for mode ``none``) and whether it is exact.
+    """
+    if mode == "none":
+        return None, False
+
+    if mode == "estimate":
+        plan = db.execute(
+            text(
+                "EXPLAIN (FORMAT JSON) SELECT 1 FROM publication "
+                "WHERE search_vector @@ to_tsquery('english', :query)"
+            ),
+            {"query": formatted_query},
+        ).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"]), False
+
+    match = select(Publication.id).where(
+        Publication.search_vector.op("@@")(
+            func.to_tsquery("english", formatted_query)
+        )
+    )
+    capped = match.limit(SEARCH_COUNT_CAP + 1).subquery()
+    total = db.execute(select(func.count()).select_from(capped)).scalar_one()
+    return min(total, SEARCH_COUNT_CAP), total <= SEARCH_COUNT_CAP
+
+
+def rank_publications(
+    db: Session,
+    formatted_query: str,
+    limit: int,
+    offset: int,
+    cursor: str,
+    count: CountMode,
+) -> tuple:
+    """
+    Returns the ``(id, rank)`` pairs of one result page, whether another page
+    follows, and the match count.
+
+    The query is parsed once and ``ts_rank`` is computed once per matching row;
+    PostgreSQL keeps only the top ``limit`` rows.
+    """
+    # Parsed once, joined ON true as a single-row FROM item
+    query = func.to_tsquery("english", formatted_query).alias("query")
+    tsquery = query.column
+
+    # Weighted title (A) and author names (B), backed by the GIN index
+    ranked = (
         select(
-            Publication,
-            func.ts_rank(
-                search_vector_casted,
-                func.to_tsquery("english", formatted_query),
-            ).label("rank"),
+            Publication.id,
+            func.ts_rank(Publication.search_vector, tsquery).label("rank"),
         )
-        .where(
-            search_vector_casted.op("@@")(
-                func.to_tsquery("english", formatted_query)
+        .select_from(join(Publication, query, true()))
+        .where(Publication.search_vector.op("@@")(tsquery))
+        .subquery()
+    )
+
+    stmt = select(ranked.c.id, ranked.c.rank)
+    if cursor:
+        after_rank, after_id = decode_cursor(cursor)
+        # ts_rank is a real: compared as a double, equal ranks would differ
+        after_rank = cast(after_rank, REAL)
+        stmt = stmt.where(
+            or_(
+                ranked.c.rank < after_rank,
+                and_(ranked.c.rank == after_rank, ranked.c.id > after_id),
             )
         )
-        .order_by(
-            func.ts_rank(
-                search_vector_casted,
-                func.to_tsquery("english", formatted_query),
-            ).desc()
+    stmt = (
+        stmt.order_by(ranked.c.rank.desc(), ranked.c.id)
+        .offset(offset)
+        .limit(limit + 1)  # One extra row tells whether another page exists
+    )
+
+    rows = [(row[0], row[1]) for row in db.execute(stmt)]
+    total, total_is_exact = count_matches(db, formatted_query, count)
+    return tuple(rows[:limit]), len(rows) > limit, total, total_is_exact
+
+
+def run_search(
+    db: Session,
+    query: str,
+    limit: int = SEARCH_PAGE_SIZE,
+    offset: int = 0,
+    cursor: str = "",
+    count: CountMode = "none",
+    use_cache: bool = True,
+    operator: Operator = "or",
+    backend: str = SEARCH_BACKEND,
+) -> SearchPage:
+    """
+    Returns one page of the top-ranked publications matching ``query``.
+
+    Pages are selected either by ``offset`` or, for deep paging, by a keyset
+    ``cursor`` from the last row of the previous page.
+
+    With the ``postgres`` backend ranked ids are cached per normalized query
+    and page, and the publications are then loaded by primary key. The
+    ``memory`` backend ranks and returns them from the in-process index,
+    without ``db``.
+    """
+    formatted_query = format_query(normalize_query(query), operator)
+    if not formatted_query:
+        return SearchPage(total=0, total_is_exact=True)
+
+    if backend == "memory":
+        ranked, has_more, total, total_is_exact = publication_search_index.rank(
+            formatted_query,
+            limit,
+            offset,
+            decode_cursor(cursor) if cursor else None,
+        )
+        ids = [publication_id for publication_id, _ in ranked]
+        return _search_page(
+            ranked,
+            publication_search_index.documents(ids),
+            has_more,
+            total if count != "none" else None,
+            total_is_exact and count != "none",
+        )
+
+    def compute_page():
+        return rank_publications(
+            db, formatted_query, limit, offset, cursor, count
+        )
+
+    key = (formatted_query, limit, offset, cursor, count)
+    ranked, has_more, total, total_is_exact = (
+        publication_search_cache.get_or_compute(
+            key, compute_page, table_generation(db, "publication")
         )
+        if use_cache
+        else compute_page()
     )
 
-    results = db.execute(stmt).all()
+    ids = [publication_id for publication_id, _ in ranked]
+    publications = {
+        publication.id: publication
+        for publication in db.execute(
+            select(Publication).where(
+                Publication.id.in_(ids)
+            )  # pyright: ignore
+        ).scalars()
+    }
+    return _search_page(ranked, publications, has_more, total, total_is_exact)
 
-    search_time = time.time() - start_time
-    total_results = len(results)
 
-    results = [
-        {
-            "title": row[0].title,
-            "authors": row[0].authors,
-            "link": row[0].link,
-            "year": row[0].year,
-            "rank": row[1],
-        }
-        for row in results
-    ]
+async def run_search_async(db: AsyncSession, query: str, **options):
+    """
+    ``run_search`` from the event loop. The ``postgres`` backend runs on the
+    async (asyncpg) session, its queries awaited instead of holding a
+    threadpool worker; the ``memory`` backend's BM25 scoring and index
+    refreshes are CPU work and run in a worker thread.
+    """
+    backend = options.get("backend", SEARCH_BACKEND)
+    start = time.perf_counter()
+    if backend == "memory":
+        page = await asyncio.to_thread(
+            run_search, None, query, **options  # pyright: ignore
+        )
+    else:
+        page = await db.run_sync(
+            lambda session: run_search(session, query, **options)
+        )
+    search_latency.labels(backend).observe(time.perf_counter() - start)
+    return page
+
+
+def _search_page(ranked, publications, has_more, total, total_is_exact):
+    return SearchPage(
+        results=[
+            {
+                "id": publication.id,
+                "title": publication.title,
+                "authors": publication.authors,
+                "link": publication.link,
+                "year": publication.year,
+                "rank": rank,
+            }
+            for publication_id, rank in ranked
+            # Skip rows deleted since the page was cached
+            if (publication := publications.get(publication_id))
+        ],
+        has_more=has_more,
+        total=total,
+        total_is_exact=total_is_exact,
+    )
+
+
+@router.get("/task1", response_class=HTMLResponse, include_in_schema=False)
+async def search_publications(
+    request: Request,
+    query: str = Query("", alias="query", description="Search query"),
+    page: int = Query(1, ge=1, description="Result page"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    start_time = time.perf_counter()
+
+    search = await run_search_async(
+        db,
+        query,
+        limit=SEARCH_PAGE_SIZE,
+        offset=(page - 1) * SEARCH_PAGE_SIZE,
+        count="exact",
+    )
+
+    search_time = time.perf_counter() - start_time
 
     return templates.TemplateResponse(
         "search.html",
         {
             "request": request,
             "query": query,
-            "results": results,
+            "results": search.results,
             "search_time": search_time,
-            "total_results": total_results,
+            "total_results": search.total,
+            "total_is_exact": search.total_is_exact,
+            "page": page,
+            "has_more": search.has_more,
         },
     )
+
+
+@router.get("/api/search")
+async def search_publications_json(
+    query: str = Query(..., description="Search query"),
+    limit: int = Query(SEARCH_PAGE_SIZE, ge=1, le=SEARCH_MAX_PAGE_SIZE),
+    cursor: str = Query("", description="next_cursor of the previous page"),
+    count: CountMode = Query("none", description="How to count all matches"),
+    operator: Operator = Query("or", description="Match any or all terms"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Searches publications and returns one page of ranked results as JSON.
+
+    Pass ``next_cursor`` back as ``cursor`` to fetch the following page.
+    """
+    start_time = time.perf_counter()
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+    search = await run_search_async(
+        db,
+        query,
+        limit=limit,
+        cursor=cursor,
+        count=count,
+        operator=operator,
+    )
+
+    last = search.results[-1] if search.results else None
+    return {
+        "query": query,
+        "results": search.results,
+        "next_cursor": (
+            encode_cursor(last["rank"], last["id"])
+            if last and search.has_more
+            else None
+        ),
+        "total": search.total,
+        "total_is_exact": search.total_is_exact,
+        "search_time": time.perf_counter() - start_time,
+    }
+
+
+@router.get("/api/search/cache")
+def search_cache_stats():
+    """Returns hit, miss and eviction counters of the search result cache."""
+    return publication_search_cache.stats()
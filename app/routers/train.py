@@ -1,63 +1,60 @@
-import re
+from fastapi import APIRouter, HTTPException, Query
 
-import joblib
-from fastapi import APIRouter, Depends
-from sklearn.calibration import CalibratedClassifierCV
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.naive_bayes import ComplementNB
-from sqlmodel import Session, select
-
-from app.database import get_db
-from app.models import Prediction
+from app.jobs import TrainingJob, TrainingMode, training_jobs
 
 router = APIRouter(
     tags=["Task 2"],
 )
 
-MODEL_PATH = "app/trained_models/trained_model.pkl"
-
-
-def clean_text(text: str) -> str:
-    """Preprocess text (remove special chars, convert to lowercase, etc.)."""
-    text = re.sub(r"\s+", " ", text)  # Remove excessive whitespace
-    text = re.sub(r"[^\w\s]", "", text)  # Remove punctuation
-    return text.lower().strip()
-
-
-@router.post("/train")
-def train_model(db: Session = Depends(get_db)):
-    """Train the Naïve Bayes classifier and save the trained model."""
-
-    results = db.exec(select(Prediction.content, Prediction.category)).all()
-    if not results:
-        return {"message": "No data available for training"}
 
-    texts, labels = zip(*results)
-    texts = [clean_text(text) for text in texts]  # Preprocess text
-
-    vectorizer = TfidfVectorizer(
-        ngram_range=(1, 3), stop_words="english", norm="l2"
-    )
+def _job_or_404(job: "TrainingJob | None") -> dict:
+    if job is None:
+        raise HTTPException(status_code=404, detail="Training job not found.")
+    return job.as_dict()
+
+
+@router.post("/train", status_code=202)
+def train_model(
+    mode: TrainingMode = Query(
+        "full",
+        description="full: TF-IDF fit in memory; streaming: out-of-core "
+        "hashing model for corpora larger than RAM; incremental: update the "
+        "current model with rows added since it was trained",
+    ),
+):
+    """
+    Queue training of the Naïve Bayes classifier as a background job.
+
+    The model is fitted in a separate process and published atomically once
+    done; poll ``status_url`` for progress.
+    """
+    job = training_jobs.submit(mode)
+    return {
+        "message": "Training job queued",
+        "job_id": job.id,
+        "status_url": f"/train/jobs/{job.id}",
+        **job.as_dict(),
+    }
 
-    X = vectorizer.fit_transform(texts)
 
-    model = ComplementNB(alpha=0.5)
+@router.get("/train/jobs")
+def list_training_jobs():
+    """Returns recent training jobs, oldest first."""
+    return [job.as_dict() for job in training_jobs.jobs()]
 
-    model.fit(X, labels)
 
-    # Calibrate probabilities
-    calibrated_model = CalibratedClassifierCV(model, cv=5)
-    calibrated_model.fit(X, labels)
+@router.get("/train/jobs/{job_id}")
+def training_job_status(job_id: str):
+    """Returns the status and progress (0 to 1) of a training job."""
+    return _job_or_404(training_jobs.get(job_id))
 
-    joblib.dump(
-        {
-            "model": calibrated_model,
-            "vectorizer": vectorizer,
-        },
-        MODEL_PATH,
-    )
 
-    return {
-        "message": "Model trained and saved successfully",
-        "total_samples": len(texts),
-    }
+@router.post("/train/jobs/{job_id}/cancel")
+def cancel_training_job(job_id: str):
+    """Cancels a queued or running training job; the model is not published."""
+    job = _job_or_404(training_jobs.cancel(job_id))
+    if job["status"] in ("succeeded", "failed"):
+        raise HTTPException(
+            status_code=409, detail=f"Training job already {job['status']}."
+        )
+    return job
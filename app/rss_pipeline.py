@@ -0,0 +1,316 @@
+import asyncio
+import inspect
+import time
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional, Union
+from urllib.parse import urlsplit
+
+import httpx
+
+from app import metrics
+from app.crawler import HostRateLimiter, timed
+from app.http_cache import CacheEntry, HttpCache
+
+HEADERS = {"User-Agent": "Mozilla/5.0"}
+
+# Receives batches of documents; coroutine functions are awaited, plain
+# functions run in a worker thread
+Sink = Callable[[list[dict]], Union[None, Awaitable[None]]]
+
+
+@dataclass
+class PipelineStats:
+    feeds: int = 0
+    articles_fetched: int = 0
+    failed_fetches: int = 0
+    documents: int = 0
+    bytes: int = 0
+    started_at: float = field(default_factory=time.perf_counter)
+    finished_at: Optional[float] = None
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished_at or time.perf_counter()) - self.started_at
+
+    @property
+    def articles_per_second(self) -> float:
+        return self.articles_fetched / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "feeds": self.feeds,
+            "articles_fetched": self.articles_fetched,
+            "failed_fetches": self.failed_fetches,
+            "documents": self.documents,
+            "bytes": self.bytes,
+            "elapsed_seconds": round(self.elapsed, 3),
+            "articles_per_second": round(self.articles_per_second, 3),
+        }
+
+
+rss_bytes_fetched = metrics.counter(
+    "rss_bytes_total", "Response bytes fetched by the RSS pipeline"
+)
+rss_articles_fetched = metrics.counter(
+    "rss_articles_total", "Articles fetched by the RSS pipeline"
+)
+rss_rate = metrics.gauge(
+    "rss_articles_per_second", "Articles fetched per second by the last run"
+)
+
+# Marks the end of the document stream for the writer task
+_DONE = object()
+
+
+class RssPipeline:
+    """
+    Concurrent feed fetch -> article fetch -> parse -> clean pipeline.
+
+    All requests share one pooled ``httpx.AsyncClient``. Each domain gets its
+    own concurrency limit and politeness delay (minimum spacing between
+    requests), and HTML parsing runs in worker threads. Finished documents are
+    handed to ``sink`` in small batches as they arrive.
+
+    Args:
+        parse_article: Extracts article text from HTML, or returns None.
+        clean: Normalizes the extracted text.
+        per_domain_concurrency: Requests in flight per domain.
+        per_domain_delay: Minimum seconds between requests to one domain.
+        cache: Revalidates feeds and articles with conditional requests.
+            Unchanged articles are skipped before parsing; unchanged feeds
+            are parsed from their stored body. The caller commits the cache.
+        executor: Runs ``parse_article`` (e.g. a process pool, which needs a
+            module-level function); worker threads by default.
+    """
+
+    def __init__(
+        self,
+        parse_article: Callable[[str], Optional[str]],
+        clean: Callable[[str], str],
+        per_domain_concurrency: int = 4,
+        per_domain_delay: float = 0.25,
+        timeout: float = 30.0,
+        cache: Optional[HttpCache] = None,
+        executor: Optional[Executor] = None,
+    ):
+        self.parse_article = parse_article
+        self.clean = clean
+        self.per_domain_concurrency = per_domain_concurrency
+        self.limiter = HostRateLimiter(
+            1 / per_domain_delay if per_domain_delay > 0 else float("inf"),
+            capacity=1,
+        )
+        self.timeout = timeout
+        self.cache = cache
+        self.executor = executor
+        self.stats = PipelineStats()
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+
+    def _semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        if host not in self._semaphores:
+            self._semaphores[host] = asyncio.Semaphore(
+                self.per_domain_concurrency
+            )
+        return self._semaphores[host]
+
+    async def _get(
+        self,
+        client: httpx.AsyncClient,
+        url: str,
+        cached: Optional[CacheEntry] = None,
+    ):
+        async with self._semaphore(url):
+            await self.limiter.acquire(url)
+            try:
+                response = await client.get(
+                    url, headers=HttpCache.request_headers(cached)
+                )
+            except httpx.HTTPError as e:
+                print(f"Error fetching {url}: {e}")
+                self.stats.failed_fetches += 1
+                return None
+
+        self.stats.bytes += len(response.content)
+        rss_bytes_fetched.inc(len(response.content))
+        if response.status_code == 304 and cached:
+            return response
+        if response.status_code != 200:
+            self.stats.failed_fetches += 1
+            return None
+        return response
+
+    async def _fetch_feed(self, client: httpx.AsyncClient, url: str) -> list:
+        cached = self.cache.lookup(url) if self.cache else None
+        response = await self._get(client, url, cached)
+        if response is None:
+            return []
+        content = response.content
+        if response.status_code == 304:
+            content = self.cache.reuse(cached)  # pyright: ignore
+            if content is None:  # Stored body lost, fetch it again
+                response = await self._get(client, url)
+                if response is None:
+                    return []
+                content = response.content
+        if self.cache:
+            self.cache.stage(url, content, response.headers)
+
+        import feedparser
+
+        feed = await asyncio.to_thread(feedparser.parse, content)
+        self.stats.feeds += 1
+        return list(feed.entries)
+
+    async def _fetch_document(
+        self, client: httpx.AsyncClient, link: str, category: str
+    ) -> Optional[dict]:
+        cached = self.cache.lookup(link) if self.cache else None
+        response = await self._get(client, link, cached)
+        if response is None:
+            return None
+        self.stats.articles_fetched += 1
+        rss_articles_fetched.inc()
+
+        if self.cache and self.cache.is_unchanged(
+            cached, response.status_code, response.content
+        ):
+            # Stored by an earlier scrape
+            self.cache.revalidated(cached, response.headers)  # pyright: ignore
+            return None
+
+        try:
+            parsed = asyncio.get_running_loop().run_in_executor(
+                self.executor, timed, self.parse_article, response.text
+            )
+            full_text, parse_seconds = await parsed
+        except Exception as e:
+            print(f"Error parsing {link}: {e}")
+            return None
+        if self.cache:
+            self.cache.stage(
+                link, response.content, response.headers, parse_seconds
+            )
+        if not full_text:
+            return None
+
+        print(f"✔ Fetched article: {link}")
+        return {"content": self.clean(full_text), "category": category}
+
+    async def _run_category(
+        self,
+        client: httpx.AsyncClient,
+        category: str,
+        feeds: list[asyncio.Task],
+        limit: int,
+        output: asyncio.Queue,
+    ):
+        # Keep feed order, but only ever fetch as many articles as still needed
+        count = 0
+        in_flight: set[asyncio.Task] = set()
+
+        async def wait_for_one():
+            nonlocal count, in_flight
+            done, in_flight = await asyncio.wait(
+                in_flight, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                document = task.result()
+                if document:
+                    count += 1
+                    await output.put(document)
+
+        for feed in feeds:
+            for entry in await feed:
+                while in_flight and count + len(in_flight) >= limit:
+                    await wait_for_one()
+                if count >= limit:
+                    break
+                link = entry.get("link")
+                if link:
+                    in_flight.add(
+                        asyncio.create_task(
+                            self._fetch_document(client, link, category)
+                        )
+                    )
+            if count >= limit:
+                break
+
+        while in_flight:
+            await wait_for_one()
+
+    async def _write(
+        self,
+        output: asyncio.Queue,
+        sink: Sink,
+        batch_size: int,
+    ):
+        batch: list[dict] = []
+        while True:
+            document = await output.get()
+            if document is not _DONE:
+                batch.append(document)
+                self.stats.documents += 1
+            if batch and (document is _DONE or len(batch) >= batch_size):
+                if inspect.iscoroutinefunction(sink):
+                    await sink(batch)
+                else:
+                    await asyncio.to_thread(sink, batch)
+                batch = []
+            if document is _DONE:
+                return
+
+    async def run(
+        self,
+        sources: dict[str, list[str]],
+        per_category_limit: int,
+        sink: Sink,
+        sink_batch_size: int = 10,
+    ) -> PipelineStats:
+        """
+        Scrapes up to ``per_category_limit`` articles for every category.
+
+        Args:
+            sources: Category name -> RSS feed URLs, in priority order.
+            per_category_limit: Maximum documents kept per category.
+            sink: Receives lists of ``{"content", "category"}`` documents.
+            sink_batch_size: Documents per ``sink`` call.
+        """
+        self.stats = PipelineStats()
+        self._semaphores = {}
+        output: asyncio.Queue = asyncio.Queue()
+
+        async with httpx.AsyncClient(
+            headers=HEADERS, timeout=self.timeout, follow_redirects=True
+        ) as client:
+            writer = asyncio.create_task(
+                self._write(output, sink, sink_batch_size)
+            )
+            try:
+                feeds = {
+                    url: asyncio.create_task(self._fetch_feed(client, url))
+                    for urls in sources.values()
+                    for url in urls
+                }
+                await asyncio.gather(
+                    *(
+                        self._run_category(
+                            client,
+                            category,
+                            [feeds[url] for url in urls],
+                            per_category_limit,
+                            output,
+                        )
+                        for category, urls in sources.items()
+                    )
+                )
+                for feed in feeds.values():
+                    feed.cancel()
+            finally:
+                await output.put(_DONE)
+                await writer
+
+        self.stats.finished_at = time.perf_counter()
+        rss_rate.set(self.stats.articles_per_second)
+        return self.stats
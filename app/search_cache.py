@@ -0,0 +1,136 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+from app import metrics
+from app.config import SEARCH_CACHE_MAX_BYTES, SEARCH_CACHE_TTL
+
+# Rough per-entry bookkeeping cost on top of the key and value themselves
+ENTRY_OVERHEAD = 200
+
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive form of a search query."""
+    return " ".join(query.lower().split())
+
+
+def _estimate_size(value: Any) -> int:
+    """Approximate memory used by a (nested) tuple/list/dict of scalars."""
+    size = sys.getsizeof(value)
+    if isinstance(value, (list, tuple)):
+        size += sum(_estimate_size(item) for item in value)
+    elif isinstance(value, dict):
+        size += sum(
+            _estimate_size(k) + _estimate_size(v) for k, v in value.items()
+        )
+    return size
+
+
+class SearchCache:
+    """
+    LRU + TTL cache of ranked search results, bounded by a memory budget.
+
+    Every entry is tagged with the generation of the table it was computed
+    from. Callers read the current generation from the database (see
+    ``services.table_generation``), so once any worker rewrites the table
+    stale entries are treated as misses and dropped.
+    """
+
+    def __init__(
+        self,
+        table: str,
+        max_bytes: int = SEARCH_CACHE_MAX_BYTES,
+        ttl: float = SEARCH_CACHE_TTL,
+    ):
+        self.table = table
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = metrics.counter("search_cache_hits_total", "Cache hits")
+        self.misses = metrics.counter(
+            "search_cache_misses_total", "Cache misses"
+        )
+        self.evictions = metrics.counter(
+            "search_cache_evictions_total", "Entries evicted or expired"
+        )
+        self.size = metrics.gauge("search_cache_bytes", "Estimated cache size")
+
+    def _drop(self, key: Hashable):
+        _, _, _, size = self._entries.pop(key)
+        self._bytes -= size
+        self.evictions.inc()
+
+    def get(self, key: Hashable, generation: int) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry_generation, expires_at, value, _ = entry
+                if (
+                    entry_generation == generation
+                    and expires_at > time.monotonic()
+                ):
+                    self._entries.move_to_end(key)
+                    self.hits.inc()
+                    return value
+                self._drop(key)
+            self.misses.inc()
+            return None
+
+    def put(self, key: Hashable, value: Any, generation: int):
+        size = _estimate_size(key) + _estimate_size(value) + ENTRY_OVERHEAD
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[3]
+            self._entries[key] = (
+                generation,
+                time.monotonic() + self.ttl,
+                value,
+                size,
+            )
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+            self.size.set(self._bytes)
+
+    def get_or_compute(
+        self, key: Hashable, compute: Callable[[], Any], generation: int
+    ) -> Any:
+        """
+        Returns the cached value for ``key``, computing it on a miss.
+
+        ``generation`` must be read before ``compute`` runs, so a concurrent
+        rewrite of the table is not masked.
+        """
+        value = self.get(key, generation)
+        if value is None:
+            value = compute()
+            self.put(key, value, generation)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.size.set(0)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": int(self.hits.value),
+            "misses": int(self.misses.value),
+            "evictions": int(self.evictions.value),
+        }
+
+
+# Shared cache of ranked publication search pages
+publication_search_cache = SearchCache("publication")
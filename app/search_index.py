@@ -0,0 +1,468 @@
+import json
+import re
+import threading
+import time
+from array import array
+from collections import Counter
+from functools import lru_cache
+from typing import Iterable, NamedTuple, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import select
+from sqlmodel import Session
+
+from app.config import SEARCH_INDEX_REFRESH_SECONDS, SNAPSHOT_DIR
+from app.database import engine
+from app.models import Publication
+from app.services import table_generation
+from app.snapshot import (
+    Snapshot,
+    current_version,
+    load_snapshot,
+    write_snapshot,
+)
+
+# Weights of the title and author fields, as ts_rank weighs labels A and B
+TITLE_WEIGHT = 1.0
+AUTHOR_WEIGHT = 0.4
+
+# Seconds between reads of the publication table generation by the memory
+# search backend, which otherwise needs no database access per search
+GENERATION_CHECK_SECONDS = 1.0
+
+# BM25 term-frequency saturation and document-length normalisation
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+# PostgreSQL's english.stop list, so both backends ignore the same words
+STOP_WORDS = frozenset("""
+    i me my myself we our ours ourselves you your yours yourself yourselves
+    he him his himself she her hers herself it its itself they them their
+    theirs themselves what which who whom this that these those am is are was
+    were be been being have has had having do does did doing a an the and but
+    if or because as until while of at by for with about against between into
+    through during before after above below to from up down in out on off over
+    under again further then once here there when where why how all any both
+    each few more most other some such no nor not only own same so than too
+    very s t can will just don should now
+    """.split())
+
+SNAPSHOT_NAME = "publication_index"
+
+# Arrays persisted in a snapshot, besides the encoded documents
+INDEX_ARRAYS = (
+    "terms",
+    "offsets",
+    "postings_docs",
+    "postings_tf",
+    "doc_ids",
+    "doc_lengths",
+)
+
+
+class IndexedPublication(NamedTuple):
+    id: int
+    title: str
+    authors: list
+    link: str
+    year: Optional[str]
+
+
+class StoredDocuments(Sequence):
+    """
+    Publications of a snapshot, JSON-encoded back to back in one byte array
+    and decoded only when a result is displayed.
+    """
+
+    def __init__(self, data: np.ndarray, offsets: np.ndarray):
+        self.data = data
+        self.offsets = offsets
+
+    @staticmethod
+    def encode(documents: Sequence[IndexedPublication]):
+        """Returns the ``(data, offsets)`` arrays of ``documents``."""
+        encoded = [json.dumps(list(doc)).encode() for doc in documents]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(doc) for doc in encoded], out=offsets[1:])
+        return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, position):
+        start, end = self.offsets[position], self.offsets[position + 1]
+        return IndexedPublication(*json.loads(self.data[start:end].tobytes()))
+
+
+@lru_cache(maxsize=1)
+def _stemmer():
+    # nltk takes over a second to import; loaded by the first tokenization
+    from nltk.stem.snowball import SnowballStemmer
+
+    return SnowballStemmer("english")
+
+
+@lru_cache(maxsize=100_000)
+def _stem(word: str) -> str:
+    return _stemmer().stem(word)
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased, stop-word filtered and Snowball-stemmed terms of ``text``."""
+    return [
+        _stem(word)
+        for word in TOKEN_PATTERN.findall(text.lower())
+        if word not in STOP_WORDS
+    ]
+
+
+def parse_query(formatted_query: str) -> tuple[list[str], bool]:
+    """
+    Splits a ``format_query`` string into its terms.
+
+    Returns:
+        The distinct terms and whether all of them must match (``&``).
+    """
+    require_all = "&" in formatted_query
+    terms = tokenize(formatted_query.replace("|", " ").replace("&", " "))
+    return list(dict.fromkeys(terms)), require_all
+
+
+class PublicationIndex:
+    """
+    Immutable BM25 inverted index over publication titles and author names.
+
+    Postings are stored CSR-style: the documents and weighted term
+    frequencies of term ``i`` are ``postings_docs[offsets[i]:offsets[i+1]]``
+    and ``postings_tf[...]``, with terms sorted for binary search.
+    """
+
+    def __init__(
+        self,
+        terms: np.ndarray,
+        offsets: np.ndarray,
+        postings_docs: np.ndarray,
+        postings_tf: np.ndarray,
+        doc_ids: np.ndarray,
+        doc_lengths: np.ndarray,
+        documents: Sequence[IndexedPublication],
+    ):
+        self.terms = terms
+        self.offsets = offsets
+        self.postings_docs = postings_docs
+        self.postings_tf = postings_tf
+        self.doc_ids = doc_ids
+        self.doc_lengths = doc_lengths
+        self.documents = documents
+        self.avg_length = float(doc_lengths.mean()) if len(doc_lengths) else 0
+
+    @classmethod
+    def build(cls, publications: Iterable[IndexedPublication]):
+        """Tokenizes and indexes ``publications``, given in ascending id."""
+        documents = []
+        doc_lengths = array("f")
+        term_ids: dict[str, int] = {}
+        posting_terms, posting_docs, posting_tfs = (
+            array("i"),
+            array("i"),
+            array("f"),
+        )
+
+        for doc, publication in enumerate(publications):
+            frequencies: Counter = Counter()
+            for term in tokenize(publication.title or ""):
+                frequencies[term] += TITLE_WEIGHT
+            for author in publication.authors or []:
+                for term in tokenize(author.get("name") or ""):
+                    frequencies[term] += AUTHOR_WEIGHT
+
+            for term, frequency in frequencies.items():
+                posting_terms.append(term_ids.setdefault(term, len(term_ids)))
+                posting_docs.append(doc)
+                posting_tfs.append(frequency)
+            documents.append(publication)
+            doc_lengths.append(sum(frequencies.values()))
+
+        # Renumber terms alphabetically, then group the postings by term; the
+        # stable sort keeps each posting list in document order
+        vocabulary = sorted(term_ids)
+        rank = np.empty(len(vocabulary), dtype=np.int32)
+        rank[[term_ids[term] for term in vocabulary]] = np.arange(
+            len(vocabulary), dtype=np.int32
+        )
+        terms_of_postings = rank[np.frombuffer(posting_terms, dtype=np.int32)]
+        order = np.argsort(terms_of_postings, kind="stable")
+
+        offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(
+            np.bincount(terms_of_postings, minlength=len(vocabulary)),
+            out=offsets[1:],
+        )
+
+        return cls(
+            terms=np.array(
+                [term.encode() for term in vocabulary], dtype=np.bytes_
+            ),
+            offsets=offsets,
+            postings_docs=np.frombuffer(posting_docs, dtype=np.int32)[order],
+            postings_tf=np.frombuffer(posting_tfs, dtype=np.float32)[order],
+            doc_ids=np.array([doc.id for doc in documents], dtype=np.int64),
+            doc_lengths=np.frombuffer(doc_lengths, dtype=np.float32).copy(),
+            documents=documents,
+        )
+
+    def save_snapshot(
+        self, root: str = SNAPSHOT_DIR, generation: int = -1
+    ) -> str:
+        """
+        Publishes the index as a memory-mappable snapshot, recording the
+        ``generation`` of the publication table it was built from.
+        """
+        data, offsets = StoredDocuments.encode(self.documents)
+        return write_snapshot(
+            SNAPSHOT_NAME,
+            {
+                **{name: getattr(self, name) for name in INDEX_ARRAYS},
+                "doc_data": data,
+                "doc_offsets": offsets,
+            },
+            {"documents": len(self), "generation": generation},
+            root=root,
+        )
+
+    @classmethod
+    def from_snapshot(cls, snapshot: Snapshot):
+        """Wraps the memory-mapped arrays of ``snapshot`` without copying."""
+        arrays = snapshot.arrays
+        return cls(
+            **{name: arrays[name] for name in INDEX_ARRAYS},
+            documents=StoredDocuments(
+                arrays["doc_data"], arrays["doc_offsets"]
+            ),
+        )
+
+    def __len__(self):
+        return len(self.documents)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the postings and per-document arrays."""
+        return sum(getattr(self, name).nbytes for name in INDEX_ARRAYS)
+
+    def _term_slice(self, term: str) -> Optional[slice]:
+        key = term.encode()
+        i = int(np.searchsorted(self.terms, key))
+        if i == len(self.terms) or self.terms[i] != key:
+            return None
+        return slice(int(self.offsets[i]), int(self.offsets[i + 1]))
+
+    def score(self, terms: list[str], require_all: bool = False):
+        """
+        BM25 scores of the documents matching ``terms``.
+
+        Returns:
+            The matching document positions and their scores.
+        """
+        slices = [self._term_slice(term) for term in terms]
+        found = [s for s in slices if s is not None]
+        if not found or (require_all and len(found) < len(slices)):
+            return np.empty(0, dtype=np.int32), np.empty(0)
+
+        n = len(self.documents)
+        docs = np.concatenate([self.postings_docs[s] for s in found])
+        contributions = []
+        for s in found:
+            tf = self.postings_tf[s].astype(np.float64)
+            lengths = self.doc_lengths[self.postings_docs[s]]
+            df = s.stop - s.start
+            idf = np.log1p((n - df + 0.5) / (df + 0.5))
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / self.avg_length)
+            contributions.append(idf * tf * (BM25_K1 + 1) / (tf + norm))
+
+        # Only the touched documents are aggregated, not the whole corpus
+        matched, inverse = np.unique(docs, return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(contributions))
+        if require_all and len(found) > 1:
+            complete = np.bincount(inverse) == len(found)
+            matched, scores = matched[complete], scores[complete]
+        return matched, scores
+
+    def search(
+        self,
+        terms: list[str],
+        limit: int,
+        offset: int = 0,
+        after: Optional[tuple[float, int]] = None,
+        require_all: bool = False,
+    ):
+        """
+        Returns one page of ``(id, rank)`` pairs ordered by rank, then id,
+        whether another page follows and the total number of matches.
+
+        Only the top ``offset + limit + 1`` scores are partially selected and
+        sorted; ``after`` is a ``(rank, id)`` keyset cursor.
+        """
+        matched, scores = self.score(terms, require_all)
+        ids = self.doc_ids[matched]
+        # Every match of the query, like count_matches, not what follows after
+        total = len(matched)
+        if after is not None:
+            after_rank, after_id = after
+            keep = (scores < after_rank) | (
+                (scores == after_rank) & (ids > after_id)
+            )
+            matched, scores, ids = matched[keep], scores[keep], ids[keep]
+
+        k = offset + limit + 1
+        if len(matched) > k:
+            # Everything scoring at least the k-th best, ties included
+            threshold = -np.partition(-scores, k - 1)[k - 1]
+            top = scores >= threshold
+            scores, ids = scores[top], ids[top]
+
+        order = np.lexsort((ids, -scores))[offset:k]
+        rows = [(int(ids[i]), float(scores[i])) for i in order]
+        return tuple(rows[:limit]), len(rows) > limit, total
+
+
+def load_publications(session: Session) -> Iterable[IndexedPublication]:
+    """Streams the indexed columns of every publication, ordered by id."""
+    stmt = (
+        select(
+            Publication.id,
+            Publication.title,
+            Publication.authors,
+            Publication.link,
+            Publication.year,
+        )
+        .order_by(Publication.id)
+        .execution_options(yield_per=10_000)
+    )
+    for row in session.execute(stmt):
+        yield IndexedPublication(*row)
+
+
+class MemorySearchBackend:
+    """
+    Serves publication search from an in-process ``PublicationIndex``.
+
+    Indexes are published as memory-mapped snapshots: a starting worker maps
+    the current snapshot instead of scanning the table, and all workers share
+    its pages. The index is rebuilt in a background thread once the
+    publication table changes in any worker (see
+    ``services.table_generation``, read at most every
+    ``GENERATION_CHECK_SECONDS``) or the snapshot is older than
+    ``SEARCH_INDEX_REFRESH_SECONDS``; a snapshot published by another worker
+    is mapped as soon as it appears. Searches keep using the previous index
+    meanwhile.
+    """
+
+    def __init__(self, refresh_seconds: float = SEARCH_INDEX_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self.index: Optional[PublicationIndex] = None
+        self.snapshot_version: Optional[str] = None
+        self.generation = -1
+        self.built_at = 0.0
+        self._lock = threading.Lock()
+        self._refreshing = threading.Event()
+        self._table_generation = -1
+        self._checked_at = float("-inf")
+
+    def table_generation(self) -> int:
+        """Generation of the publication table, polled from the database."""
+        now = time.monotonic()
+        if now - self._checked_at >= GENERATION_CHECK_SECONDS:
+            with Session(engine) as session:
+                self._table_generation = table_generation(
+                    session, "publication"
+                )
+            self._checked_at = now
+        return self._table_generation
+
+    def refresh(self):
+        """Rebuilds the index from the database, publishes and swaps it in."""
+        with self._lock:
+            start = time.perf_counter()
+            with Session(engine) as session:
+                # Read first: rows committed during the build bump it again
+                # and trigger another rebuild
+                generation = table_generation(session, "publication")
+                index = PublicationIndex.build(load_publications(session))
+            self.snapshot_version = index.save_snapshot(generation=generation)
+            self.index, self.generation = index, generation
+            self.built_at = time.time()
+            print(
+                f"Search index built: {len(index)} publications in "
+                f"{time.perf_counter() - start:.2f}s"
+            )
+        return index
+
+    def load(self, version: Optional[str] = None) -> Optional[PublicationIndex]:
+        """Maps a published snapshot (the current one by default)."""
+        snapshot = load_snapshot(SNAPSHOT_NAME, version)
+        if snapshot is None:
+            return None
+        with self._lock:
+            self.index = PublicationIndex.from_snapshot(snapshot)
+            self.snapshot_version = snapshot.version
+            self.generation = snapshot.meta.get("generation", -1)
+            self.built_at = snapshot.meta["created"]
+        return self.index
+
+    def _refresh_in_background(self):
+        try:
+            self.refresh()
+        finally:
+            self._refreshing.clear()
+
+    def current(self) -> PublicationIndex:
+        """Returns the index, scheduling a rebuild when it is stale."""
+        if self.index is None:
+            return self.load() or self.refresh()
+
+        if self._refreshing.is_set():
+            return self.index
+
+        version = current_version(SNAPSHOT_NAME)
+        if version is not None and version != self.snapshot_version:
+            return self.load(version) or self.index
+
+        stale = (
+            self.generation != self.table_generation()
+            or time.time() - self.built_at > self.refresh_seconds
+        )
+        if stale:
+            self._refreshing.set()
+            threading.Thread(
+                target=self._refresh_in_background, daemon=True
+            ).start()
+        return self.index
+
+    def rank(
+        self,
+        formatted_query: str,
+        limit: int,
+        offset: int,
+        after: Optional[tuple[float, int]],
+    ):
+        """Same page shape as ``rank_publications``; the count is exact."""
+        terms, require_all = parse_query(formatted_query)
+        ranked, has_more, total = self.current().search(
+            terms, limit, offset, after, require_all
+        )
+        return ranked, has_more, total, True
+
+    def documents(self, ids: list[int]) -> dict[int, IndexedPublication]:
+        index = self.current()
+        positions = np.searchsorted(index.doc_ids, ids)
+        return {
+            publication_id: index.documents[position]
+            for publication_id, position in zip(ids, positions.tolist())
+            if position < len(index)
+            and index.doc_ids[position] == publication_id
+        }
+
+
+publication_search_index = MemorySearchBackend()
@@ -1,45 +1,394 @@
-import html
-import re
+import asyncio
+import hashlib
+import io
+import json
+from typing import IO, Iterable, Iterator, Sequence
 
-from sqlalchemy.sql import text
-from sqlmodel import Session, SQLModel, delete
+from sqlalchemy import func, text, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import AdaptedConnection
+from sqlmodel import Session, SQLModel, delete, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models import TableGeneration
+
+# Rows per key lookup when comparing scraped data against the table
+UPSERT_LOOKUP_CHUNK = 1000
+
+# Rows per COPY batch when bulk loading CSV files
+CSV_CHUNK_ROWS = 50_000
+
+# The asyncpg adapter only starts its transaction on the first statement it
+# executes, and COPY goes straight to the driver: without a statement first,
+# every COPY would commit on its own
+BEGIN_DRIVER_TRANSACTION = text("SELECT 1")
+
+
+class CSVValidationError(ValueError):
+    """Raised when an uploaded CSV does not have the expected columns."""
+
+
+def table_generation(session: Session, table_name: str) -> int:
+    """
+    Returns how many times scraped data was committed to ``table_name``, by
+    any process.
+    """
+    generation = session.execute(
+        select(TableGeneration.generation).where(
+            TableGeneration.table_name == table_name
+        )
+    ).scalar()
+    return generation or 0
+
+
+def bump_table_generation(session: Session, table_name: str):
+    """
+    Increments the generation of ``table_name`` in the session's transaction,
+    so it becomes visible together with the data it describes.
+    """
+    stmt = insert(TableGeneration).values(table_name=table_name, generation=1)
+    session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["table_name"],
+            set_={"generation": TableGeneration.generation + 1},
+        )
+    )
 
 
 def store_scraped_data(
     session: Session,
     table: type[SQLModel],
     data: list[dict],
-    search_field: str = "",
-):
+    key: str = "",
+    hash_key: bool = False,
+) -> dict:
     """
-    Clears the table and inserts the given data to avoid duplicates.
+    Stores scraped data in the table.
+
+    Without ``key`` the table is cleared and all data is inserted again. With
+    ``key`` only new rows are inserted and rows whose values changed are
+    updated, matching rows on that natural key column.
 
     Args:
         session (Session): The database session.
         table (SQLModel): The SQLModel class representing the table.
         data (list[dict]): List of dictionaries containing the new data.
-        search_field (str, optional): The column name to update as a search vector.
+        key (str, optional): Natural key column used to upsert instead of replace.
+        hash_key (bool, optional): Match the key by its MD5 hash (long keys).
+
+    Returns:
+        dict: Number of inserted, updated and unchanged rows.
     """
-    # Delete all existing records
-    session.exec(delete(table))  # pyright: ignore
+    if key:
+        counts = _upsert(session, table, data, key, hash_key)
+    else:
+        # Delete all existing records
+        session.exec(delete(table))  # pyright: ignore
 
-    # Insert new records
-    new_records = [table(**item) for item in data]
-    session.add_all(new_records)
+        # Insert new records
+        new_records = [table(**item) for item in data]
+        session.add_all(new_records)
+
+        counts = {"inserted": len(new_records), "updated": 0, "unchanged": 0}
+
+    bump_table_generation(session, table.__tablename__)  # pyright: ignore
     session.commit()
 
-    # Update search vector if field is provided
-    if search_field:
-        session.exec(
-            text(
-                f"UPDATE {table.__tablename__} SET {search_field} = to_tsvector('english', title)"
-            )  # pyright: ignore
+    return counts
+
+
+def _upsert(
+    session: Session,
+    table: type[SQLModel],
+    data: list[dict],
+    key: str,
+    hash_key: bool,
+) -> dict:
+    """
+    Inserts new rows and updates changed rows, matched on the ``key`` column.
+    New rows are written with ``COPY``.
+
+    Returns:
+        The inserted/updated/unchanged counts.
+    """
+
+    def natural_key(value) -> str:
+        if hash_key:
+            return hashlib.md5(str(value).encode("utf-8")).hexdigest()
+        return value
+
+    # The last occurrence wins when the scrape returns the same key twice
+    incoming = {natural_key(item[key]): item for item in data}
+    fields = sorted({field for item in incoming.values() for field in item})
+
+    key_column = getattr(table, key)
+    lookup = func.md5(key_column) if hash_key else key_column
+    columns = [getattr(table, field) for field in fields]
+
+    existing: dict = {}
+    keys = list(incoming)
+    for start in range(0, len(keys), UPSERT_LOOKUP_CHUNK):
+        chunk = keys[start : start + UPSERT_LOOKUP_CHUNK]
+        rows = session.exec(
+            select(table.id, lookup, *columns).where(  # pyright: ignore
+                lookup.in_(chunk)
+            )
+        )
+        for row_id, row_key, *values in rows:
+            existing.setdefault(row_key, (row_id, dict(zip(fields, values))))
+
+    new_rows, changed_rows, unchanged = [], [], 0
+    for item_key, item in incoming.items():
+        if item_key not in existing:
+            new_rows.append(item)
+            continue
+
+        row_id, current = existing[item_key]
+        if any(current.get(field) != value for field, value in item.items()):
+            changed_rows.append({"id": row_id, **item})
+        else:
+            unchanged += 1
+
+    if new_rows:
+        copy_records(
+            session,
+            table,
+            fields,
+            ([item.get(field) for field in fields] for item in new_rows),
         )
-        session.commit()
+    if changed_rows:
+        session.execute(update(table), changed_rows)
+
+    counts = {
+        "inserted": len(new_rows),
+        "updated": len(changed_rows),
+        "unchanged": unchanged,
+    }
+    return counts
+
+
+class ScrapedDataWriter:
+    """
+    Streams scraped records into a table while the scrape is still running.
+
+    Each batch is upserted on ``key`` and flushed to the database as soon as it
+    arrives. Everything is committed together by ``commit``, so a failed scrape
+    leaves the previous contents in place.
+    """
+
+    def __init__(
+        self,
+        session: Session,
+        table: type[SQLModel],
+        key: str,
+        hash_key: bool = False,
+    ):
+        self.session = session
+        self.table = table
+        self.key = key
+        self.hash_key = hash_key
+        self.counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    def write(self, data: list[dict]):
+        counts = _upsert(
+            self.session, self.table, data, self.key, self.hash_key
+        )
+        for name, count in counts.items():
+            self.counts[name] += count
+        self.session.flush()
+
+    def commit(self):
+        bump_table_generation(
+            self.session, self.table.__tablename__  # pyright: ignore
+        )
+        self.session.commit()
+
+    def rollback(self):
+        self.session.rollback()
+
+
+def _copy_csv(
+    session: Session, table: type[SQLModel], columns: Sequence[str], buffer
+):
+    """Streams CSV-formatted ``buffer`` into ``table`` with ``COPY FROM STDIN``."""
+    # Use the DBAPI connection behind the session so COPY joins its transaction
+    connection = session.connection().connection
+    if isinstance(connection.dbapi_connection, AdaptedConnection):
+        # asyncpg, driven from AsyncSession.run_sync
+        session.execute(BEGIN_DRIVER_TRANSACTION)
+        connection.dbapi_connection.run_async(
+            lambda driver: _copy_csv_asyncpg(
+                driver, table, columns, buffer.read()
+            )
+        )
+        return
+
+    cursor = connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {table.__tablename__} ({', '.join(columns)}) "
+            "FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
+    finally:
+        cursor.close()
+
+
+async def _copy_csv_asyncpg(
+    driver, table: type[SQLModel], columns: Sequence[str], rows: str
+):
+    """``_copy_csv`` on a raw asyncpg connection."""
+    await driver.copy_to_table(
+        table.__tablename__,
+        source=io.BytesIO(rows.encode("utf-8")),
+        columns=list(columns),
+        format="csv",
+    )
+
+
+def _csv_field(value) -> str:
+    """
+    One field of a ``COPY`` CSV row. ``None`` is an empty unquoted field,
+    which COPY reads as NULL; everything else is quoted, so "" stays an empty
+    string.
+    """
+    if value is None:
+        return ""
+    if isinstance(value, (list, dict)):
+        value = json.dumps(value)
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def copy_records(
+    session: Session,
+    table: type[SQLModel],
+    columns: Sequence[str],
+    records: Iterable[Sequence],
+) -> int:
+    """
+    Bulk inserts plain value rows with ``COPY``, without building ORM objects.
+    Lists and dicts are written as JSON, for JSONB columns, and ``None`` as
+    NULL.
+
+    Returns:
+        int: The number of rows written.
+    """
+    buffer = io.StringIO()
+    count = 0
+    for record in records:
+        buffer.write(",".join(_csv_field(value) for value in record) + "\n")
+        count += 1
+    buffer.seek(0)
+
+    if count:
+        _copy_csv(session, table, columns, buffer)
+    return count
+
+
+def _csv_chunks(
+    file: IO, columns: Sequence[str], chunksize: int
+) -> Iterator[tuple[str, int, int]]:
+    """
+    Reads, validates and re-serialises a CSV file ``chunksize`` rows at a
+    time, for ``COPY``.
+
+    Yields:
+        The chunk's valid rows as headerless CSV, their number and the number
+        of skipped rows.
+    """
+    import pandas as pd  # Only CSV ingestion needs pandas
+
+    try:
+        chunks = pd.read_csv(
+            file,
+            usecols=list(columns),
+            dtype=str,
+            keep_default_na=False,
+            chunksize=chunksize,
+        )
+    except ValueError:
+        raise CSVValidationError(
+            f"CSV must contain {' and '.join(repr(c) for c in columns)} columns."
+        )
+
+    for chunk in chunks:
+        chunk = chunk[list(columns)]
+        valid = (chunk.apply(lambda column: column.str.strip()) != "").all(
+            axis=1
+        )
+        skipped = int((~valid).sum())
+        chunk = chunk[valid]
+        yield chunk.to_csv(index=False, header=False), len(chunk), skipped
+
+
+def bulk_load_csv(
+    session: Session,
+    file: IO,
+    table: type[SQLModel],
+    columns: Sequence[str],
+    chunksize: int = CSV_CHUNK_ROWS,
+) -> dict:
+    """
+    Streams a CSV file into a table in chunks using ``COPY``.
+
+    The file is never fully materialized: each chunk of ``chunksize`` rows is
+    validated and copied before the next one is read. Rows with an empty value
+    in any of ``columns`` are skipped. The caller commits the transaction.
+
+    Raises:
+        CSVValidationError: If the CSV does not contain all of ``columns``.
+
+    Returns:
+        dict: Number of inserted and skipped rows.
+    """
+    inserted = skipped = 0
+    for rows, count, invalid in _csv_chunks(file, columns, chunksize):
+        skipped += invalid
+        if count:
+            _copy_csv(session, table, columns, io.StringIO(rows))
+            inserted += count
+
+    return {"inserted": inserted, "skipped": skipped}
+
+
+async def bulk_load_csv_async(
+    session: AsyncSession,
+    file: IO,
+    table: type[SQLModel],
+    columns: Sequence[str],
+    chunksize: int = CSV_CHUNK_ROWS,
+) -> dict:
+    """
+    ``bulk_load_csv`` for async sessions: chunks are read and validated in a
+    worker thread and copied with asyncpg's ``copy_to_table``, so the event
+    loop is never blocked.
+
+    Every chunk is copied in the session's transaction: nothing is visible
+    until the caller commits, and a failed chunk leaves none of the rows.
+
+    Raises:
+        CSVValidationError: If the CSV does not contain all of ``columns``.
+
+    Returns:
+        dict: Number of inserted and skipped rows.
+    """
+    # The driver connection behind the session, so COPY joins its transaction
+    connection = await session.connection()
+    await connection.execute(BEGIN_DRIVER_TRANSACTION)
+    raw_connection = await connection.get_raw_connection()
+    driver = raw_connection.driver_connection
 
+    chunks = _csv_chunks(file, columns, chunksize)
+    inserted = skipped = 0
+    while chunk := await asyncio.to_thread(next, chunks, None):
+        rows, count, invalid = chunk
+        skipped += invalid
+        if count:
+            await _copy_csv_asyncpg(driver, table, columns, rows)
+            inserted += count
 
-def clean_text(text: str) -> str:
-    text = html.unescape(text)  # Convert &quot; &amp; etc. to normal characters
-    text = text.replace("\n", " ")  # Remove newlines
-    text = re.sub(r"\s+", " ", text).strip()  # Normalize spaces
-    return text
+    return {"inserted": inserted, "skipped": skipped}
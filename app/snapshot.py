@@ -0,0 +1,142 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+from typing import Any, NamedTuple, Optional
+
+import numpy as np
+
+from app.config import SNAPSHOT_DIR, SNAPSHOT_KEEP
+
+POINTER = "CURRENT"
+META_FILE = "meta.json"
+
+
+class Snapshot(NamedTuple):
+    version: str
+    path: str
+    arrays: dict[str, np.ndarray]  # read-only memory maps
+    meta: dict[str, Any]
+
+
+def _snapshot_root(name: str, root: str) -> str:
+    return os.path.join(root, name)
+
+
+def current_version(name: str, root: str = SNAPSHOT_DIR) -> Optional[str]:
+    """
+    Version published last for ``name``, or None if there is none.
+
+    Only a tiny pointer file is read, so this is cheap enough to call on
+    every lookup.
+    """
+    try:
+        with open(os.path.join(_snapshot_root(name, root), POINTER)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def write_snapshot(
+    name: str,
+    arrays: dict[str, np.ndarray],
+    meta: Optional[dict[str, Any]] = None,
+    files: Optional[dict[str, Any]] = None,
+    root: str = SNAPSHOT_DIR,
+) -> str:
+    """
+    Publishes a new version of snapshot ``name``.
+
+    Every array is saved as its own ``.npy`` file so it can be memory-mapped
+    on load; ``files`` maps extra file names to callables writing them into
+    the version directory. The version directory is completed under a
+    temporary name and renamed, then the ``CURRENT`` pointer is atomically
+    replaced, so readers only ever see complete snapshots.
+
+    Returns:
+        The new version.
+    """
+    snapshot_root = _snapshot_root(name, root)
+    os.makedirs(snapshot_root, exist_ok=True)
+
+    version = f"v{time.time_ns()}"
+    tmp_path = tempfile.mkdtemp(dir=snapshot_root, prefix=".tmp-")
+    try:
+        for key, array in arrays.items():
+            np.save(os.path.join(tmp_path, f"{key}.npy"), array)
+        for file_name, write in (files or {}).items():
+            write(os.path.join(tmp_path, file_name))
+        with open(os.path.join(tmp_path, META_FILE), "w") as f:
+            json.dump(
+                {
+                    **(meta or {}),
+                    "arrays": sorted(arrays),
+                    "created": time.time(),
+                },
+                f,
+            )
+        os.rename(tmp_path, os.path.join(snapshot_root, version))
+    except BaseException:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+
+    fd, tmp_pointer = tempfile.mkstemp(dir=snapshot_root, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        f.write(version)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_pointer, os.path.join(snapshot_root, POINTER))
+
+    _prune(snapshot_root, SNAPSHOT_KEEP)
+    return version
+
+
+def _prune(snapshot_root: str, keep: int):
+    """
+    Removes all but the ``keep`` newest versions. Processes still mapping a
+    removed version keep reading it; the pages are freed once unmapped.
+    """
+    versions = sorted(
+        (entry for entry in os.listdir(snapshot_root) if entry[0] == "v"),
+        key=lambda entry: int(entry[1:]),
+    )
+    for version in versions[:-keep]:
+        shutil.rmtree(os.path.join(snapshot_root, version), ignore_errors=True)
+
+
+def load_snapshot(
+    name: str, version: Optional[str] = None, root: str = SNAPSHOT_DIR
+) -> Optional[Snapshot]:
+    """
+    Memory-maps the arrays of snapshot ``name`` (by default the current
+    version). Nothing is read until the arrays are accessed, and the pages are
+    shared through the OS page cache by every process mapping them.
+
+    A version pruned by a newer publication before its files were opened is
+    replaced by the version published since.
+
+    Returns:
+        The snapshot, or None if none has been published.
+    """
+    version = version or current_version(name, root)
+    while version is not None:
+        try:
+            return _map_snapshot(name, version, root)
+        except FileNotFoundError:
+            newest = current_version(name, root)
+            if newest == version:
+                raise
+            version = newest
+    return None
+
+
+def _map_snapshot(name: str, version: str, root: str) -> Snapshot:
+    path = os.path.join(_snapshot_root(name, root), version)
+    with open(os.path.join(path, META_FILE)) as f:
+        meta = json.load(f)
+    arrays = {
+        key: np.load(os.path.join(path, f"{key}.npy"), mmap_mode="r")
+        for key in meta["arrays"]
+    }
+    return Snapshot(version, path, arrays, meta)
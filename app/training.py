@@ -0,0 +1,408 @@
+import copy
+from typing import Callable, Iterable, Optional, Sequence
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.calibration import CalibratedClassifierCV
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+from sklearn.feature_selection import chi2
+from sklearn.frozen import FrozenEstimator
+from sklearn.naive_bayes import ComplementNB
+from sklearn.preprocessing import normalize
+from sqlalchemy import func, select
+from sqlmodel import Session
+
+from app.config import (
+    PREPROCESS_POOL_MIN_BATCH,
+    TRAIN_CALIBRATION_ROWS,
+    TRAIN_CHUNK_ROWS,
+    TRAIN_CV_JOBS,
+    TRAIN_HASH_FEATURES,
+    TRAIN_MAX_FEATURES,
+    TRAIN_MAX_OOV_RATIO,
+    TRAIN_MIN_DF,
+    TRAIN_PREPROCESS_PROCESSES,
+    TRAIN_RECALIBRATION_ROWS,
+)
+from app.inference import CalibratedNBEngine, SnapshotVectorizer
+from app.models import Prediction
+from app.preprocessing import clean_texts
+
+# Every n-th streamed row is held out to calibrate the probabilities
+CALIBRATION_EVERY = 10
+
+# Called with the fraction done and the current step; may raise to abort
+ProgressCallback = Callable[[float, str], None]
+
+
+def _no_progress(fraction: float, step: str):
+    pass
+
+
+class RebuildRequired(Exception):
+    """Raised when a model can no longer be updated incrementally."""
+
+
+def select_features(
+    X,
+    labels,
+    min_df: int = TRAIN_MIN_DF,
+    max_features: int = TRAIN_MAX_FEATURES,
+) -> np.ndarray:
+    """
+    Columns of ``X`` worth keeping: those occurring in at least ``min_df``
+    documents, and of these the ``max_features`` with the highest chi2
+    statistic against the labels.
+
+    Returns:
+        np.ndarray: The kept column indices, in ascending order.
+    """
+    df = np.bincount(X.indices, minlength=X.shape[1])
+    features = np.flatnonzero(df >= min_df)
+    if len(features) > max_features:
+        scores = np.nan_to_num(chi2(X[:, features], labels)[0])
+        top = np.argpartition(-scores, max_features - 1)[:max_features]
+        features = np.sort(features[top])
+    return features
+
+
+def unigram_vocabulary(
+    vectorizer: TfidfVectorizer, X
+) -> tuple[np.ndarray, float]:
+    """
+    Words of a fitted vectorizer, before any pruning, and the share of them
+    expected to be unknown in new documents from the training distribution.
+
+    The expected share is the leave-one-out estimate over the training
+    matrix ``X``: of all (document, word) pairs, those whose word occurs in
+    no other document.
+
+    Returns:
+        The words as a sorted byte-string array, and the expected share.
+    """
+    names = vectorizer.get_feature_names_out()
+    columns = np.flatnonzero([" " not in name for name in names])
+    df = np.bincount(X.indices, minlength=X.shape[1])[columns]
+    pairs = int(df.sum())
+    baseline = float(np.sum(df == 1) / pairs) if pairs else 0.0
+    words = np.array([name.encode() for name in names[columns]], np.bytes_)
+    return np.sort(words), baseline
+
+
+def shrink_weights(model: CalibratedClassifierCV):
+    """Stores the per-class feature statistics of every fold as float32."""
+    for fold in model.calibrated_classifiers_:
+        estimator = fold.estimator
+        if isinstance(estimator, FrozenEstimator):
+            estimator = estimator.estimator
+        for name in ("feature_log_prob_", "feature_count_", "feature_all_"):
+            setattr(
+                estimator, name, getattr(estimator, name).astype(np.float32)
+            )
+
+
+def fit_classifier(
+    texts,
+    labels,
+    progress: Optional[ProgressCallback] = None,
+    n_jobs: Optional[int] = TRAIN_CV_JOBS,
+    compact: bool = True,
+) -> dict:
+    """
+    Fits the TF-IDF vectorizer and the calibrated Naïve Bayes model.
+
+    The 5 calibration folds are fitted in parallel on ``n_jobs`` cores. With
+    ``compact``, rare and uninformative n-grams are pruned before the model
+    is fitted (see ``select_features``), the vocabulary is stored as sorted
+    arrays (``SnapshotVectorizer``) and the model weights as float32.
+
+    The model is also collapsed into a ``CalibratedNBEngine`` (``"engine"``),
+    which ``predict_batch`` uses instead of the sklearn estimators.
+    """
+    progress = progress or _no_progress
+
+    progress(0.0, "cleaning")
+    # Same normalization as predict_batch applies at inference
+    texts = clean_texts(
+        texts, TRAIN_PREPROCESS_PROCESSES, PREPROCESS_POOL_MIN_BATCH
+    )
+
+    progress(0.1, "vectorizing")
+    vectorizer = TfidfVectorizer(
+        ngram_range=(1, 3), stop_words="english", norm="l2"
+    )
+
+    X = vectorizer.fit_transform(texts)
+    # Drift of new rows is measured against every word seen, not just those
+    # the pruning below keeps
+    unigrams, baseline_oov = unigram_vocabulary(vectorizer, X)
+
+    if compact:
+        progress(0.4, "pruning")
+        features = select_features(X, labels)
+        # Re-normalising the kept columns gives exactly what the pruned
+        # vectorizer produces: the idf of a term does not change
+        X = normalize(X[:, features])
+        vectorizer = SnapshotVectorizer.from_vectorizer(vectorizer, features)
+
+    model = ComplementNB(alpha=0.5)
+
+    # Calibrate probabilities; each fold fits its own clone of the model
+    progress(0.5, "fitting")
+    calibrated_model = CalibratedClassifierCV(model, cv=5, n_jobs=n_jobs)
+    calibrated_model.fit(X, labels)
+    if compact:
+        shrink_weights(calibrated_model)
+    progress(1.0, "fitted")
+
+    return {
+        "model": calibrated_model,
+        "vectorizer": vectorizer,
+        "engine": CalibratedNBEngine.from_model(calibrated_model),
+        "unigrams": unigrams,
+        "baseline_oov": baseline_oov,
+    }
+
+
+def training_classes(session: Session) -> list[str]:
+    """Distinct categories, needed up front by ``partial_fit``."""
+    return sorted(
+        session.execute(select(Prediction.category).distinct()).scalars()
+    )
+
+
+def training_watermark(session: Session) -> int:
+    """Highest ``Prediction.id``; a model trained up to it records it."""
+    return session.execute(select(func.max(Prediction.id))).scalar() or 0
+
+
+def iter_training_chunks(
+    session: Session,
+    chunk_size: int = TRAIN_CHUNK_ROWS,
+    after_id: int = 0,
+    up_to_id: Optional[int] = None,
+) -> Iterable[Sequence[tuple[str, str]]]:
+    """
+    Streams ``(content, category)`` rows with ``after_id < id <= up_to_id``
+    in chunks through a server-side cursor, so only one chunk is held in
+    memory at a time.
+    """
+    stmt = select(Prediction.content, Prediction.category).where(
+        Prediction.id > after_id  # pyright: ignore
+    )
+    if up_to_id is not None:
+        stmt = stmt.where(Prediction.id <= up_to_id)  # pyright: ignore
+    result = session.execute(stmt.execution_options(yield_per=chunk_size))
+    yield from result.partitions()
+
+
+def streaming_vectorizer(n_features: int = TRAIN_HASH_FEATURES):
+    """
+    Stateless counterpart of the TF-IDF vectorizer: n-grams are hashed into a
+    fixed number of columns, so nothing has to be learnt before transforming.
+    """
+    return HashingVectorizer(
+        ngram_range=(1, 3),
+        stop_words="english",
+        n_features=n_features,
+        alternate_sign=False,  # Naïve Bayes needs non-negative features
+        norm="l2",
+    )
+
+
+def fit_streaming(
+    chunks: Iterable[Sequence[tuple[str, str]]],
+    classes: Sequence[str],
+    n_features: int = TRAIN_HASH_FEATURES,
+    calibration_rows: int = TRAIN_CALIBRATION_ROWS,
+    total_rows: Optional[int] = None,
+    progress: Optional[ProgressCallback] = None,
+) -> dict:
+    """
+    Fits the classifier out of core, one chunk of rows at a time.
+
+    Each chunk is cleaned, hashed and fed to ``ComplementNB.partial_fit``.
+    Every ``CALIBRATION_EVERY``-th row (up to ``calibration_rows``) is held
+    out instead, and the probabilities are calibrated on those rows once the
+    model is frozen, replacing the 5-fold cross-validation of the in-memory
+    trainer.
+
+    Args:
+        chunks: Iterable of ``(text, label)`` row chunks.
+        classes: Every label that can occur.
+        total_rows: Expected number of rows, to report progress.
+        progress: Called after every chunk.
+
+    Returns:
+        dict: An artifact with the same keys as ``fit_classifier``'s.
+    """
+    progress = progress or _no_progress
+    vectorizer = streaming_vectorizer(n_features)
+    model = ComplementNB(alpha=0.5)
+    held_out_X, held_out_y = [], []
+    seen = 0
+
+    for chunk in chunks:
+        texts = clean_texts([text for text, _ in chunk])
+        labels = np.array([label for _, label in chunk])
+
+        # Rows 0, n, 2n, ... of the stream, up to ``calibration_rows`` of them
+        position = np.arange(seen, seen + len(texts))
+        calibrate = (position % CALIBRATION_EVERY == 0) & (
+            position // CALIBRATION_EVERY < calibration_rows
+        )
+        seen += len(texts)
+
+        X = vectorizer.transform(texts)
+        if calibrate.any():
+            held_out_X.append(X[calibrate])
+            held_out_y.append(labels[calibrate])
+        if not calibrate.all():
+            model.partial_fit(
+                X[~calibrate], labels[~calibrate], classes=classes
+            )
+        if total_rows:
+            progress(0.95 * min(seen / total_rows, 1.0), "fitting")
+
+    progress(0.95, "calibrating")
+    calibrated_model = CalibratedClassifierCV(
+        FrozenEstimator(model), method="sigmoid"
+    )
+    calibrated_model.fit(sp.vstack(held_out_X), np.concatenate(held_out_y))
+    shrink_weights(calibrated_model)
+    progress(1.0, "fitted")
+
+    return {
+        "model": calibrated_model,
+        "vectorizer": vectorizer,
+        "engine": CalibratedNBEngine.from_model(calibrated_model),
+    }
+
+
+def oov_counts(
+    vectorizer, texts: Sequence[str], unigrams: Optional[np.ndarray] = None
+) -> tuple[int, int]:
+    """
+    Counts the distinct words of each of ``texts`` missing from the training
+    vocabulary: ``unigrams`` from ``unigram_vocabulary`` or, for artifacts
+    without them, the vectorizer's own (possibly pruned) vocabulary. Only
+    unigrams are considered: most longer n-grams of any new text are unseen
+    even when its vocabulary is not.
+
+    Returns:
+        The numbers of unknown and of all (document, word) pairs; ``(0, 0)``
+        for hashing vectorizers, which have no vocabulary to drift from.
+    """
+    if unigrams is not None:
+
+        def known(terms):
+            keys = np.array([term.encode() for term in terms], np.bytes_)
+            positions = np.searchsorted(unigrams, keys)
+            positions[positions == len(unigrams)] = 0
+            return unigrams[positions] == keys
+
+    elif isinstance(vectorizer, SnapshotVectorizer):
+        known = vectorizer.contains
+    elif isinstance(vectorizer, TfidfVectorizer):
+        vocabulary = vectorizer.vocabulary_
+
+        def known(terms):
+            return [term in vocabulary for term in terms]
+
+    else:
+        return 0, 0
+
+    analyze = vectorizer.build_analyzer()
+    unknown = total = 0
+    for text in texts:
+        terms = list({term for term in analyze(text) if " " not in term})
+        total += len(terms)
+        if terms:
+            unknown += len(terms) - int(np.sum(known(terms)))
+    return unknown, total
+
+
+def update_classifier(
+    artifact: dict,
+    texts: Sequence[str],
+    labels: Sequence[str],
+    watermark: int,
+    max_oov_ratio: float = TRAIN_MAX_OOV_RATIO,
+    recalibration_rows: int = TRAIN_RECALIBRATION_ROWS,
+) -> dict:
+    """
+    Folds newly labelled rows into a trained artifact without refitting.
+
+    Every calibration fold's ComplementNB adds the rows to its per-class
+    feature counts with ``partial_fit``. With at least ``recalibration_rows``
+    new rows, the sigmoid calibrators are refitted on the folds' predictions
+    for those rows made *before* the update, which no fold has seen. The
+    vectorizer (vocabulary and idf) is kept as is.
+
+    Args:
+        artifact: An artifact from ``fit_classifier`` or ``fit_streaming``.
+        texts: Rows added after ``artifact["watermark"]``.
+        watermark: Highest ``Prediction.id`` among the new rows.
+
+    Raises:
+        RebuildRequired: If the rows bring a new class, or the share of
+            words unknown to the vocabulary since the last full fit exceeds
+            the share expected from the training corpus
+            (``artifact["baseline_oov"]``) by more than ``max_oov_ratio``.
+
+    Returns:
+        dict: The updated artifact (the given one is not modified).
+    """
+    texts = clean_texts(texts)
+    labels = np.asarray(labels)
+    model, vectorizer = artifact["model"], artifact["vectorizer"]
+
+    new_classes = {str(label) for label in labels} - {
+        str(c) for c in model.classes_
+    }
+    if new_classes:
+        raise RebuildRequired(f"new categories: {sorted(new_classes)}")
+
+    unknown, total = oov_counts(vectorizer, texts, artifact.get("unigrams"))
+    unknown += artifact.get("oov_terms", 0)
+    total += artifact.get("seen_terms", 0)
+    baseline = artifact.get("baseline_oov", 0.0)
+    if total and unknown / total - baseline > max_oov_ratio:
+        raise RebuildRequired(
+            f"{unknown / total:.0%} of new words are out of vocabulary "
+            f"(expected {baseline:.0%})"
+        )
+
+    model = copy.deepcopy(model)
+    X = vectorizer.transform(texts)
+    recalibrate = len(texts) >= recalibration_rows
+
+    for fold in model.calibrated_classifiers_:
+        estimator = fold.estimator
+        if isinstance(estimator, FrozenEstimator):
+            estimator = estimator.estimator
+
+        if recalibrate:
+            proba = estimator.predict_proba(X)
+            # Binary models have a single calibrator, for the second class
+            columns = (
+                [1]
+                if len(estimator.classes_) == 2
+                else range(len(estimator.classes_))
+            )
+            for column, calibrator in zip(columns, fold.calibrators):
+                calibrator.fit(
+                    proba[:, column],
+                    (labels == estimator.classes_[column]).astype(int),
+                )
+
+        estimator.partial_fit(X, labels)
+
+    return {
+        **artifact,
+        "model": model,
+        "engine": CalibratedNBEngine.from_model(model),
+        "watermark": watermark,
+        "oov_terms": unknown,
+        "seen_terms": total,
+    }
@@ -0,0 +1,66 @@
+"""
+Throughput of the batch classification path versus the per-request form path.
+
+Usage:
+    python -m benchmarks.bench_classify_batch [--documents 20000]
+"""
+
+import argparse
+
+from app.inference import predict_batch
+from app.training import fit_classifier
+from benchmarks.common import (
+    load_training_corpus,
+    report,
+    synthetic_documents,
+    timer,
+)
+
+
+def classify_one_by_one(artifact, texts):
+    """Mirrors the original ``/task2`` handler: two model passes per text."""
+    model, vectorizer = artifact["model"], artifact["vectorizer"]
+    for text in texts:
+        X = vectorizer.transform([text])
+        model.predict_proba(X)
+        model.predict(X)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--documents", type=int, default=20000)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    artifact = fit_classifier(*load_training_corpus())
+    texts = [text for text, _ in synthetic_documents(args.documents)]
+
+    timings: dict[str, float] = {}
+    sample = texts[: min(len(texts), 2000)]
+    with timer(timings, "per_request"):
+        classify_one_by_one(artifact, sample)
+    with timer(timings, "batch"):
+        for start in range(0, len(texts), args.batch_size):
+            predict_batch(artifact, texts[start : start + args.batch_size])
+
+    report(
+        "Classification throughput",
+        [
+            (
+                "per-request form path",
+                len(sample) / timings["per_request"],
+                "docs/s",
+            ),
+            ("batch API path", len(texts) / timings["batch"], "docs/s"),
+            (
+                "speedup",
+                (len(texts) / timings["batch"])
+                / (len(sample) / timings["per_request"]),
+                "x",
+            ),
+        ],
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Pages/sec of the concurrent publication crawler against a local portal fixture.
+
+Compares the original sequential loop (fresh session per page, no sleep) with
+the pooled crawler following next-page links one at a time and with numbered
+pages queued ahead (``lookahead``), so several pages are in flight.
+
+The crawler runs with the per-host rate limit of the app
+(``SCRAPE_RATE_PER_HOST``/``SCRAPE_RATE_BURST``) unless ``--rate`` and
+``--burst`` say otherwise: at the default of 1 request/s the limiter, not the
+concurrency, bounds the crawl rate, and queueing pages ahead only pays off
+once the rate exceeds ``concurrency / latency``.
+
+Before timing, both crawler runs must return every page, in page order, and
+nothing past the last one.
+
+Usage:
+    python -m benchmarks.bench_crawler [--pages 20] [--latency 0.05]
+    python -m benchmarks.bench_crawler --rate 50 --latency 0.2
+    python -m benchmarks.bench_crawler --saved-pages path/to/saved/pages
+"""
+
+import argparse
+import asyncio
+import time
+
+from app.config import SCRAPE_RATE_BURST, SCRAPE_RATE_PER_HOST
+from app.crawler import Crawler
+from app.routers.scrape import create_session, find_next_page, parse_page
+from benchmarks.common import report
+from benchmarks.portal_fixture import (
+    LISTING_PATH,
+    load_saved_pages,
+    serve_pages,
+    synthetic_page,
+)
+
+
+def sequential_crawl(base_url: str) -> int:
+    """The pre-crawler loop: one new session and one blocking parse per page."""
+    url, pages = LISTING_PATH, 0
+    while url:
+        response = create_session(1).get(base_url + url)
+        _, url = parse_page(response.text)
+        pages += 1
+    return pages
+
+
+def crawl(base_url: str, args, lookahead: int) -> tuple[list, Crawler]:
+    crawler = Crawler(
+        create_session(args.concurrency),
+        concurrency=args.concurrency,
+        rate=args.rate,
+        burst=args.burst,
+        lookahead=lookahead,
+    )
+    results = asyncio.run(
+        crawler.crawl(
+            [base_url + LISTING_PATH],
+            parse=parse_page,
+            find_next=find_next_page,
+        )
+    )
+    return results, crawler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=SCRAPE_RATE_PER_HOST)
+    parser.add_argument("--burst", type=float, default=SCRAPE_RATE_BURST)
+    parser.add_argument("--saved-pages", default="")
+    args = parser.parse_args()
+
+    pages = (
+        load_saved_pages(args.saved_pages)
+        if args.saved_pages
+        else [synthetic_page(i, args.pages) for i in range(args.pages)]
+    )
+    expected = [parse_page(page) for page in pages]
+
+    with serve_pages(pages, latency=args.latency) as base_url:
+        start = time.perf_counter()
+        sequential_pages = sequential_crawl(base_url)
+        sequential_rate = sequential_pages / (time.perf_counter() - start)
+
+        chained, chain_crawler = crawl(base_url, args, lookahead=0)
+        ahead, ahead_crawler = crawl(
+            base_url, args, lookahead=args.concurrency - 1
+        )
+
+    assert chained == expected, "crawler following links missed pages"
+    assert ahead == expected, "crawler queueing pages ahead missed pages"
+    assert ahead_crawler.stats.failed_pages == 0
+
+    latency_ms = args.latency * 1000
+    report(
+        f"Publication crawl ({len(pages)} pages, {latency_ms:.0f} ms latency, "
+        f"{args.rate:g} requests/s per host)",
+        [
+            ("sequential loop (no rate limit)", sequential_rate, "pages/s"),
+            (
+                "crawler, next links only",
+                chain_crawler.stats.pages_per_second,
+                "pages/s",
+            ),
+            (
+                f"crawler, {args.concurrency - 1} pages ahead",
+                ahead_crawler.stats.pages_per_second,
+                "pages/s",
+            ),
+            (
+                "pages fetched past the last one",
+                ahead_crawler.stats.pages_past_end,
+                "pages",
+            ),
+        ],
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Memory and wall time of CSV ingestion: the original ``iterrows`` + ORM path
+versus the chunked ``COPY`` loader.
+
+Needs the database configured in ``.env``. Every load runs in a transaction
+that is rolled back, so the Prediction table is left untouched.
+
+Usage:
+    python -m benchmarks.bench_csv_ingest [--rows 1000000] [--legacy-rows 100000]
+"""
+
+import argparse
+import csv
+import os
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+from sqlmodel import Session
+
+from app.database import engine
+from app.models import Prediction
+from app.services import bulk_load_csv
+from benchmarks.common import report, synthetic_documents
+
+
+def write_synthetic_csv(path: str, rows: int):
+    with open(path, "w", newline="", encoding="utf-8") as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(["content", "category"])
+        writer.writerows(synthetic_documents(rows))
+
+
+def legacy_load(session: Session, path: str):
+    """The original ``load_csv_to_db`` body."""
+    df = pd.read_csv(path)
+    predictions = [
+        Prediction(content=str(row["content"]), category=str(row["category"]))
+        for _, row in df.iterrows()
+    ]
+    session.add_all(predictions)
+    session.flush()
+
+
+def copy_load(session: Session, path: str):
+    with open(path, "rb") as csv_file:
+        bulk_load_csv(session, csv_file, Prediction, ["content", "category"])
+
+
+def measure(load, path: str) -> tuple[float, float]:
+    """Returns wall time (s) and peak traced memory (MiB) of one load."""
+    with Session(engine) as session:
+        tracemalloc.start()
+        start = time.perf_counter()
+        load(session, path)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        session.rollback()
+    return elapsed, peak / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--legacy-rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        legacy_csv = os.path.join(directory, "legacy.csv")
+        copy_csv = os.path.join(directory, "copy.csv")
+        write_synthetic_csv(legacy_csv, args.legacy_rows)
+        write_synthetic_csv(copy_csv, args.rows)
+
+        legacy_time, legacy_memory = measure(legacy_load, legacy_csv)
+        copy_time, copy_memory = measure(copy_load, copy_csv)
+
+    report(
+        "CSV ingestion",
+        [
+            (f"iterrows + ORM ({args.legacy_rows:,} rows)", legacy_time, "s"),
+            ("iterrows + ORM rate", args.legacy_rows / legacy_time, "rows/s"),
+            ("iterrows + ORM peak memory", legacy_memory, "MiB"),
+            (f"chunked COPY ({args.rows:,} rows)", copy_time, "s"),
+            ("chunked COPY rate", args.rows / copy_time, "rows/s"),
+            ("chunked COPY peak memory", copy_memory, "MiB"),
+        ],
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Throughput and p99 latency of concurrent publication searches through the
+sync session (run in the threadpool, as FastAPI runs ``def`` endpoints) and
+through the async asyncpg session used by ``/api/search``.
+
+Needs the database configured in ``.env``. Searches run against the
+synthetic ``bench`` schema of ``bench_search``, which is built first and
+dropped afterwards unless ``--keep`` is given.
+
+Usage:
+    python -m benchmarks.bench_db_concurrency [--rows 200000] [--requests 2000]
+"""
+
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import text
+from sqlmodel import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.config import DB_MAX_OVERFLOW, DB_POOL_SIZE
+from app.database import async_engine, async_session_maker, engine
+from app.routers.search import run_search, run_search_async
+from benchmarks.bench_search import QUERIES, SCHEMA, build_table, percentile
+from benchmarks.common import report
+
+SEARCH_PATH = text(f"SET LOCAL search_path TO {SCHEMA}, public")
+
+
+def sync_search(query: str):
+    with Session(engine) as session:
+        session.execute(SEARCH_PATH)
+        run_search(session, query, use_cache=False)
+
+
+async def threadpool_search(query: str):
+    await run_in_threadpool(sync_search, query)
+
+
+async def async_search(query: str):
+    async with async_session_maker() as session:
+        await session.execute(SEARCH_PATH)
+        await run_search_async(session, query, use_cache=False)
+
+
+async def load(search, queries: list[str], requests: int, concurrency: int):
+    """Runs ``requests`` searches, ``concurrency`` at a time."""
+    semaphore = asyncio.Semaphore(concurrency)
+    samples = []
+
+    async def one(index: int):
+        async with semaphore:
+            start = time.perf_counter()
+            await search(queries[index % len(queries)])
+            samples.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(index) for index in range(requests)))
+    return requests / (time.perf_counter() - start), percentile(samples, 99)
+
+
+async def run(args) -> list:
+    queries = [query for group in QUERIES.values() for query in group]
+    rows = []
+    for concurrency in args.concurrency:
+        for name, search in (
+            ("threadpool", threadpool_search),
+            ("asyncpg", async_search),
+        ):
+            throughput, p99 = await load(
+                search, queries, args.requests, concurrency
+            )
+            rows += [
+                (f"{name}, {concurrency} concurrent", throughput, "req/s"),
+                (f"{name}, {concurrency} concurrent p99", p99, "ms"),
+            ]
+    await async_engine.dispose()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--requests", type=int, default=2_000)
+    parser.add_argument(
+        "--concurrency", type=int, nargs="+", default=[10, 50, 200]
+    )
+    parser.add_argument("--keep", action="store_true")
+    args = parser.parse_args()
+
+    with Session(engine) as session:
+        build_table(session, args.rows)
+
+    rows = asyncio.run(run(args))
+
+    if not args.keep:
+        with Session(engine) as session:
+            session.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+            session.commit()
+
+    report(
+        f"Concurrent searches ({args.rows:,} rows, pool "
+        f"{DB_POOL_SIZE}+{DB_MAX_OVERFLOW} connections)",
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
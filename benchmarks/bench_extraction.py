@@ -0,0 +1,168 @@
+"""
+Documents/sec of the lxml extraction engine against the BeautifulSoup
+``html.parser`` code it replaces, for publication results pages and news
+articles, in-process and through the extraction process pool.
+
+Before timing, the script checks that both engines return identical output
+on every fixture: synthetic portal pages, synthetic news articles, edge
+cases (comments, scripts, entities, odd class attributes, missing fields)
+and optionally pages saved from the real portal (``--saved-pages``, as for
+``bench_crawler``) or article pages (``--saved-articles``, any ``*.html``).
+
+Usage:
+    python -m benchmarks.bench_extraction [--pages 200] [--processes 4]
+"""
+
+import argparse
+import glob
+import random
+import time
+
+from app.extraction import ExtractionPool, extract_article, extract_publications
+from app.routers.rss_scrape import parse_article
+from app.routers.scrape import parse_page
+from benchmarks.common import report
+from benchmarks.news_fixture import article_page
+from benchmarks.portal_fixture import load_saved_pages, synthetic_page
+
+EDGE_CASE_PAGES = [
+    "",
+    "<html><body><p>No results</p></body></html>",
+    # Comments, scripts, entities and whitespace in the fields
+    """<div class="rendering result-container  extra">
+      <h3 class="title x"> A <!-- hidden --> <b>Study&amp;</b><script>var
+      x = 1;</script>&nbsp;of <i>growth</i> </h3>
+      <a class="link  person" href="/en/persons/a?x=1&amp;y=2"> Ann <em>Lee</em>
+      </a><a class="person link" href="/ignored">Not an author</a>
+      <span class="date"> 2021 <style>.x {}</style></span></div>""",
+    # Missing title, link href and date; authors without href
+    """<div class="result-container"><a>no href</a>
+      <a class="link person">Bob</a></div>
+      <div class="result-container"><h3 class="title">No authors</h3></div>""",
+    # Nested containers and a relative next link with an entity
+    """<div class="result-container"><div class="result-container">
+      <h3 class="title">Inner</h3><a class="link person" href="/p1">C</a>
+      </div><a class="link person" href="/p2">D</a></div>
+      <a class="nextLink" href="/en/publications/?page=2&amp;format=">Next</a>""",
+]
+
+EDGE_CASE_ARTICLES = [
+    "",
+    "<html><body><p>No article element</p></body></html>",
+    "<article></article>",
+    """<article><h1>Title</h1><p> First <!-- c --> paragraph &amp; more</p>
+      <div><p>Nested <a href="#">link</a> text</p></div>
+      <p><script>track()</script>Second&nbsp;one </p><p></p></article>
+      <article><p>Second article is ignored</p></article>""",
+]
+
+
+def check_identical(name: str, reference, extract, documents: list[str]):
+    for index, document in enumerate(documents):
+        expected, actual = reference(document), extract(document)
+        assert (
+            expected == actual
+        ), f"{name} #{index} differs:\n{expected!r}\n!=\n{actual!r}"
+
+
+def rate(extract, documents: list[str], runs: int) -> float:
+    """Best documents/sec over ``runs`` passes."""
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        extract(documents)
+        best = min(best, time.perf_counter() - start)
+    return len(documents) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--articles", type=int, default=1_000)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--saved-pages", default="")
+    parser.add_argument("--saved-articles", default="")
+    args = parser.parse_args()
+
+    pages = [synthetic_page(i, args.pages) for i in range(args.pages)]
+    rng = random.Random(0)
+    articles = [
+        article_page(f"Story {i}", rng.randint(3, 20), rng).decode()
+        for i in range(args.articles)
+    ]
+
+    saved_pages = load_saved_pages(args.saved_pages) if args.saved_pages else []
+    saved_articles = []
+    for path in sorted(glob.glob(f"{args.saved_articles}/*.html")):
+        with open(path, encoding="utf-8") as article:
+            saved_articles.append(article.read())
+
+    check_identical(
+        "results page",
+        parse_page,
+        extract_publications,
+        EDGE_CASE_PAGES + saved_pages + pages,
+    )
+    check_identical(
+        "article",
+        parse_article,
+        extract_article,
+        EDGE_CASE_ARTICLES + saved_articles + articles,
+    )
+    print(
+        f"Identical output on {len(EDGE_CASE_PAGES + saved_pages + pages)} "
+        f"results pages and "
+        f"{len(EDGE_CASE_ARTICLES + saved_articles + articles)} articles"
+    )
+
+    pool = ExtractionPool(processes=args.processes, min_batch=1)
+    pool.map(extract_article, articles[: args.processes])  # Start workers
+    rows = []
+    for kind, documents, reference, extract in (
+        (
+            "results pages",
+            saved_pages or pages,
+            parse_page,
+            extract_publications,
+        ),
+        ("articles", articles, parse_article, extract_article),
+    ):
+        rows += [
+            (
+                f"{kind}: BeautifulSoup html.parser",
+                rate(
+                    lambda docs, reference=reference: [
+                        reference(d) for d in docs
+                    ],
+                    documents,
+                    1,
+                ),
+                "docs/s",
+            ),
+            (
+                f"{kind}: lxml + compiled XPath",
+                rate(
+                    lambda docs, extract=extract: [extract(d) for d in docs],
+                    documents,
+                    args.runs,
+                ),
+                "docs/s",
+            ),
+            (
+                f"{kind}: lxml, {args.processes} processes",
+                rate(
+                    lambda docs, extract=extract: pool.map(extract, docs),
+                    documents,
+                    args.runs,
+                ),
+                "docs/s",
+            ),
+        ]
+    pool.shutdown()
+
+    report("HTML extraction", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Bytes downloaded and parse time saved by the scraper HTTP cache, against
+local portal and news site fixtures.
+
+The publication crawl runs three times on one cache: cold (empty cache),
+warm (nothing changed) and after ``--changed`` pages were edited; once
+against a server sending ETags (unchanged pages come back as 304) and once
+against one that does not (unchanged pages are recognised by their content
+hash after downloading). The RSS pipeline runs cold and warm; the warm run
+skips the articles of the cold one and moves on to further feed entries.
+The script fails if a run returns an unchanged page or misses a changed one.
+
+Usage:
+    python -m benchmarks.bench_http_cache [--pages 40] [--changed 3]
+"""
+
+import argparse
+import asyncio
+import tempfile
+
+from app.crawler import Crawler
+from app.http_cache import HttpCache
+from app.preprocessing import normalize_document
+from app.routers.rss_scrape import parse_article
+from app.routers.scrape import create_session, find_next_page, parse_page
+from app.rss_pipeline import RssPipeline
+from benchmarks.common import report
+from benchmarks.fixture_server import serve
+from benchmarks.news_fixture import serve_news_sites
+from benchmarks.portal_fixture import LISTING_PATH, page_routes, synthetic_page
+
+PER_CATEGORY_LIMIT = 20
+
+
+def crawl(base_url: str, root: str, concurrency: int):
+    """One crawl on the cache in ``root``, committed afterwards."""
+    cache = HttpCache(root)
+    crawler = Crawler(
+        create_session(concurrency),
+        concurrency=concurrency,
+        rate=1000,
+        burst=concurrency,
+        cache=cache,
+    )
+    results = asyncio.run(
+        crawler.crawl(
+            [base_url + LISTING_PATH],
+            parse=parse_page,
+            find_next=find_next_page,
+        )
+    )
+    cache.commit()
+    return results, crawler.stats, cache.stats
+
+
+def scrape_news(sources: dict, root: str):
+    cache = HttpCache(root)
+    documents: list[dict] = []
+    pipeline = RssPipeline(
+        parse_article, normalize_document, per_domain_delay=0, cache=cache
+    )
+    stats = asyncio.run(
+        pipeline.run(sources, PER_CATEGORY_LIMIT, sink=documents.extend)
+    )
+    cache.commit()
+    return documents, stats, cache.stats
+
+
+def run_rows(name: str, fetched: int, crawl_stats, cache_stats) -> list:
+    return [
+        (f"{name}: pages parsed", fetched, ""),
+        (f"{name}: bytes downloaded", crawl_stats.bytes / 1024, "KiB"),
+        (f"{name}: bytes saved", cache_stats.bytes_saved / 1024, "KiB"),
+        (
+            f"{name}: parse time saved",
+            cache_stats.parse_seconds_saved * 1000,
+            "ms",
+        ),
+        (f"{name}: wall time", crawl_stats.elapsed * 1000, "ms"),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--changed", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    pages = [synthetic_page(i, args.pages) for i in range(args.pages)]
+    rows = []
+    for etags in (True, False):
+        server = "etag" if etags else "no etag"
+        routes = page_routes(pages)
+        with tempfile.TemporaryDirectory() as root, serve(
+            routes, latency=args.latency, etags=etags
+        ) as base_url:
+            for run in ("cold", "warm", "changed"):
+                if run == "changed":
+                    # Same pagination, new publications
+                    for i in range(args.changed):
+                        routes[f"{LISTING_PATH}?page={i}"] = (
+                            "text/html; charset=utf-8",
+                            synthetic_page(i, args.pages, seed=1).encode(),
+                        )
+                    routes[LISTING_PATH] = routes[f"{LISTING_PATH}?page=0"]
+
+                results, crawl_stats, cache_stats = crawl(
+                    base_url, root, args.concurrency
+                )
+                expected = {
+                    "cold": args.pages,
+                    "warm": 0,
+                    "changed": args.changed,
+                }[run]
+                assert len(results) == expected, (
+                    f"{server} {run}: parsed {len(results)} pages, "
+                    f"expected {expected}"
+                )
+                assert crawl_stats.pages == args.pages, "pagination broken"
+                rows += run_rows(
+                    f"portal ({server}), {run}",
+                    len(results),
+                    crawl_stats,
+                    cache_stats,
+                )
+
+    with tempfile.TemporaryDirectory() as root, serve_news_sites(
+        latency=args.latency, etags=True
+    ) as sources:
+        seen: set[str] = set()
+        for run in ("cold", "warm"):
+            documents, pipeline_stats, cache_stats = scrape_news(sources, root)
+            contents = {document["content"] for document in documents}
+            assert not contents & seen, "unchanged articles were kept"
+            seen |= contents
+            rows += run_rows(
+                f"rss, {run}", len(documents), pipeline_stats, cache_stats
+            )
+
+    report(f"Scraper HTTP cache ({args.pages} portal pages)", rows)
+
+
+if __name__ == "__main__":
+    main()
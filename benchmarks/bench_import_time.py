@@ -0,0 +1,159 @@
+"""
+Import time of the application, as paid by every uvicorn worker on a cold
+start, with a per-module breakdown from ``python -X importtime``.
+
+Each measurement imports ``app.main`` in a fresh interpreter; the fastest of
+``--runs`` is reported: the total, the app modules and the third-party
+packages by self time. The second table shows what the routes defer to their
+first use (scikit-learn for the classifier, pandas for CSV ingestion, ...),
+measured on top of an imported app.
+
+The script fails if importing the app loads one of those deferred packages,
+opens a database connection, or (with ``--budget-ms``) takes longer than the
+budget.
+
+Usage:
+    python -m benchmarks.bench_import_time [--runs 5] [--budget-ms 2000]
+"""
+
+import argparse
+import subprocess
+import sys
+from collections import defaultdict
+from typing import NamedTuple
+
+from benchmarks.common import report
+
+# Loaded on first use of the routes that need them, never at import
+DEFERRED = {
+    "classifier (app.inference)": "app.inference",
+    "training (app.training)": "app.training",
+    "CSV ingestion (pandas)": "pandas",
+    "search tokenizer (nltk)": "nltk.stem.snowball",
+    "reference parsers (bs4)": "bs4",
+    "portal session (cloudscraper)": "cloudscraper",
+    "RSS feeds (feedparser)": "feedparser",
+}
+DEFERRED_PACKAGES = {
+    "sklearn",
+    "scipy",
+    "pandas",
+    "nltk",
+    "bs4",
+    "cloudscraper",
+    "feedparser",
+    "requests",
+}
+
+# Fails the import if anything connects to PostgreSQL
+NO_CONNECT = """
+import psycopg2
+
+def refuse(*args, **kwargs):
+    raise SystemExit("app.main connected to the database at import")
+
+psycopg2.connect = refuse
+import app.main
+"""
+
+
+class ImportTime(NamedTuple):
+    module: str
+    self_us: int
+    cumulative_us: int
+    # Imported by the code itself rather than by another module
+    top_level: bool
+
+
+def import_times(code: str) -> list[ImportTime]:
+    """Runs ``code`` in a fresh interpreter; returns its import timings."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    timings = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        timings.append(
+            ImportTime(
+                name.strip(),
+                int(self_us),
+                int(cumulative_us),
+                not name.startswith("  "),
+            )
+        )
+    return timings
+
+
+def fastest(code: str, module: str, runs: int) -> list[ImportTime]:
+    """The timings of the run importing ``module`` the fastest."""
+    return min(
+        (import_times(code) for _ in range(runs)),
+        key=lambda timings: next(
+            t.cumulative_us for t in timings if t.module == module
+        ),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    subprocess.run([sys.executable, "-c", NO_CONNECT], check=True)
+
+    timings = fastest("import app.main", "app.main", args.runs)
+    loaded = {t.module.split(".")[0] for t in timings}
+    assert (
+        not loaded & DEFERRED_PACKAGES
+    ), f"app.main imports {', '.join(sorted(loaded & DEFERRED_PACKAGES))}"
+    total_ms = next(
+        t.cumulative_us / 1000 for t in timings if t.module == "app.main"
+    )
+
+    # App modules with everything they import first; packages by self time
+    app_rows = [
+        (t.module, t.cumulative_us / 1000, "ms")
+        for t in sorted(timings, key=lambda t: -t.cumulative_us)
+        if t.module.startswith("app.") and t.module != "app.main"
+    ]
+    by_package: dict[str, int] = defaultdict(int)
+    for t in timings:
+        if not t.module.startswith(("app", "encodings")):
+            by_package[t.module.split(".")[0]] += t.self_us
+    package_rows = [
+        (package, self_us / 1000, "ms")
+        for package, self_us in sorted(
+            by_package.items(), key=lambda item: -item[1]
+        )[: args.top]
+    ]
+    report(
+        f"Importing app.main: {total_ms:,.0f} ms; app modules, cumulative",
+        app_rows[: args.top],
+    )
+    report("Packages, self time", package_rows)
+
+    deferred_rows = []
+    for name, module in DEFERRED.items():
+        timings = import_times(f"import app.main; import {module}")
+        # Parent packages of the module are imported (and listed) first
+        after_app = [t.module for t in timings].index("app.main") + 1
+        cost = sum(t.cumulative_us for t in timings[after_app:] if t.top_level)
+        deferred_rows.append((name, cost / 1000, "ms"))
+    report("Deferred to first use", deferred_rows)
+
+    if args.budget_ms is not None:
+        assert total_ms <= args.budget_ms, (
+            f"importing app.main took {total_ms:.0f} ms, "
+            f"budget {args.budget_ms:.0f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
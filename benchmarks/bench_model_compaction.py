@@ -0,0 +1,104 @@
+"""
+Artifact size, load time and accuracy of the compacted classifier (pruned
+n-grams, array vocabulary, float32 weights) against the uncompressed one.
+
+Usage:
+    python -m benchmarks.bench_model_compaction [--docs 100000]
+"""
+
+import argparse
+import os
+import tempfile
+
+import numpy as np
+
+from app.inference import predict_batch
+from app.model_registry import ModelRegistry, publish_model
+from app.training import fit_classifier
+from benchmarks.bench_snapshot_load import best_of
+from benchmarks.common import report, synthetic_documents
+
+TEST_SEED = 1
+
+
+def directory_size(path: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path)
+        for name in names
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, default=100_000)
+    parser.add_argument("--test-rows", type=int, default=20_000)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    texts, labels = zip(*synthetic_documents(args.docs))
+    test_texts, test_labels = zip(
+        *synthetic_documents(args.test_rows, seed=TEST_SEED)
+    )
+
+    rows = []
+    accuracies = {}
+    with tempfile.TemporaryDirectory() as root:
+        for name, compact in (("uncompressed", False), ("compacted", True)):
+            artifact = fit_classifier(texts, labels, compact=compact)
+            path = os.path.join(root, name, "trained_model.pkl")
+            snapshots = os.path.join(root, name, "snapshots")
+            publish_model(artifact, path, snapshot_root=snapshots)
+
+            empty = os.path.join(root, "empty")
+            predicted = predict_batch(artifact, test_texts).labels
+            accuracies[name] = float(
+                np.mean(np.array(predicted) == np.array(test_labels))
+            )
+            rows += [
+                (
+                    f"{name}: features",
+                    len(
+                        artifact["model"]
+                        .calibrated_classifiers_[0]
+                        .estimator.feature_log_prob_[0]
+                    ),
+                    "",
+                ),
+                (f"{name}: model file", os.path.getsize(path) / 2**20, "MiB"),
+                (f"{name}: snapshot", directory_size(snapshots) / 2**20, "MiB"),
+                (
+                    f"{name}: unpickle",
+                    best_of(
+                        args.runs,
+                        lambda path=path, empty=empty: ModelRegistry(
+                            path, empty
+                        ).get(),
+                    ),
+                    "ms",
+                ),
+                (
+                    f"{name}: map snapshot",
+                    best_of(
+                        args.runs,
+                        lambda path=path, snapshots=snapshots: ModelRegistry(
+                            path, snapshots
+                        ).get(),
+                    ),
+                    "ms",
+                ),
+                (f"{name}: test accuracy", accuracies[name] * 100, "%"),
+            ]
+
+    rows.append(
+        (
+            "accuracy delta (compacted - uncompressed)",
+            (accuracies["compacted"] - accuracies["uncompressed"]) * 100,
+            "pp",
+        )
+    )
+    report(f"Model compaction ({args.docs:,} training docs)", rows)
+
+
+if __name__ == "__main__":
+    main()
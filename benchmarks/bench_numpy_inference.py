@@ -0,0 +1,135 @@
+"""
+Latency of the NumPy inference engine (``CalibratedNBEngine``) against the
+sklearn ``CalibratedClassifierCV.predict_proba`` it replaces, for single
+documents and for batches.
+
+Before timing, the engine's probabilities are checked against sklearn's for
+the in-memory, streaming, incrementally updated and a binary model; the
+script fails if they differ by more than ``--tolerance``.
+
+Usage:
+    python -m benchmarks.bench_numpy_inference [--docs 50000] [--batch 1000]
+"""
+
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from app.inference import predict_batch
+from app.training import fit_classifier, fit_streaming, update_classifier
+from benchmarks.common import report, synthetic_documents
+
+TEST_SEED = 1
+
+
+def check_engine(name: str, artifact: dict, texts, tolerance: float) -> float:
+    """Largest absolute difference between engine and sklearn probabilities."""
+    assert artifact["engine"] is not None, f"{name}: no engine was compiled"
+    X = artifact["vectorizer"].transform(texts)
+    expected = artifact["model"].predict_proba(X)
+    actual = artifact["engine"].predict_proba(X)
+    difference = float(np.abs(expected - actual).max())
+    assert (
+        difference <= tolerance
+    ), f"{name}: probabilities differ by {difference}"
+    return difference
+
+
+def median_ms(runs: int, func) -> float:
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, default=50_000)
+    parser.add_argument("--batch", type=int, default=1_000)
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--tolerance", type=float, default=1e-9)
+    args = parser.parse_args()
+
+    corpus = synthetic_documents(args.docs)
+    test_texts, _ = zip(*synthetic_documents(args.batch, seed=TEST_SEED))
+    texts, labels = zip(*corpus)
+
+    artifact = fit_classifier(texts, labels)
+    classes = sorted(set(labels))
+    split = len(corpus) * 9 // 10
+    artifacts = {
+        "in-memory": artifact,
+        "streaming": fit_streaming(
+            (corpus[i : i + 10_000] for i in range(0, len(corpus), 10_000)),
+            classes,
+        ),
+        "incremental": update_classifier(
+            fit_classifier(texts[:split], labels[:split]),
+            texts[split:],
+            labels[split:],
+            watermark=len(corpus),
+        ),
+        "binary": fit_classifier(
+            *zip(*[row for row in corpus if row[1] in classes[:2]])
+        ),
+    }
+
+    rows = [
+        (
+            f"max |engine - sklearn|: {name}",
+            check_engine(name, model, test_texts, args.tolerance) * 1e12,
+            "x 1e-12",
+        )
+        for name, model in artifacts.items()
+    ]
+
+    model, engine = artifact["model"], artifact["engine"]
+    sklearn_artifact = {**artifact, "engine": None}
+    X = artifact["vectorizer"].transform(test_texts)
+    single = X[:1]
+    rows += [
+        (
+            "single: sklearn predict_proba",
+            median_ms(args.runs, lambda: model.predict_proba(single)),
+            "ms",
+        ),
+        (
+            "single: engine predict_proba",
+            median_ms(args.runs, lambda: engine.predict_proba(single)),
+            "ms",
+        ),
+        (
+            f"batch of {args.batch:,}: sklearn predict_proba",
+            median_ms(max(1, args.runs // 10), lambda: model.predict_proba(X)),
+            "ms",
+        ),
+        (
+            f"batch of {args.batch:,}: engine predict_proba",
+            median_ms(max(1, args.runs // 10), lambda: engine.predict_proba(X)),
+            "ms",
+        ),
+        (
+            "single: predict_batch with sklearn",
+            median_ms(
+                args.runs,
+                lambda: predict_batch(sklearn_artifact, test_texts[:1]),
+            ),
+            "ms",
+        ),
+        (
+            "single: predict_batch with engine",
+            median_ms(
+                args.runs, lambda: predict_batch(artifact, test_texts[:1])
+            ),
+            "ms",
+        ),
+    ]
+    report(f"NumPy inference ({args.docs:,} training docs)", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Documents/sec of the shared text preprocessing (``app/preprocessing.py``)
+against the per-document ``re.sub`` code it replaces: the classifier
+normalization of training and inference, and the normalization of scraped
+documents before they are stored.
+
+Before timing, the script checks that:
+
+- both normalizations return exactly what the code they replace returned,
+  on edge cases (punctuation between spaces, Unicode whitespace and
+  punctuation, final sigma, entities) and on the corpus;
+- the batch API gives the same result for a list, a pandas Series (keeping
+  its index) and worker processes;
+- inference normalizes like training: ``predict_batch`` on raw texts gives
+  the probabilities of the model on the texts cleaned the way the training
+  texts were, while the raw texts alone would give different features.
+
+Usage:
+    python -m benchmarks.bench_preprocessing [--documents 50000] [--processes 4]
+"""
+
+import argparse
+import html
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.inference import predict_batch
+from app.preprocessing import clean_text, clean_texts, normalize_document
+from app.training import fit_classifier
+from benchmarks.common import load_training_corpus, report, synthetic_documents
+
+EDGE_CASES = [
+    "",
+    "   ",
+    "Don't stop -- it's the U.S.A.'s co-operative!",
+    "a . b , c",
+    "Tabs\tand\nnew\r\nlines and Unicode spaces",
+    "ΟΔΟΣ ΣΟΦΟΣ. Σ",
+    "Ünïcödé «quotes» — dashes… and ½ ² numbers_with_underscores",
+    "&quot;Entities&quot; &amp; &lt;tags&gt; &#39;kept&#39; &nbsp;here",
+    "emoji 🙂 and\x00nul and \x1cseparators\x1f",
+]
+
+
+def reference_clean_text(text: str) -> str:
+    """Classifier normalization as training did it before."""
+    text = re.sub(r"\s+", " ", text)  # Remove excessive whitespace
+    text = re.sub(r"[^\w\s]", "", text)  # Remove punctuation
+    return text.lower().strip()
+
+
+def reference_normalize_document(text: str) -> str:
+    """Scraped document normalization as ingestion did it before."""
+    text = html.unescape(text)  # Convert &quot; &amp; etc. to normal characters
+    text = text.replace("\n", " ")  # Remove newlines
+    text = re.sub(r"\s+", " ", text).strip()  # Normalize spaces
+    return text
+
+
+def check_identical(name: str, reference, normalize, texts: list[str]):
+    for index, text in enumerate(texts):
+        expected, actual = reference(text), normalize(text)
+        assert (
+            expected == actual
+        ), f"{name} #{index} differs:\n{expected!r}\n!=\n{actual!r}"
+
+
+def check_batches(texts: list[str], processes: int):
+    expected = [clean_text(text) for text in texts]
+    assert clean_texts(texts) == expected
+    series = pd.Series(texts, index=range(10, 10 + len(texts)), name="content")
+    cleaned = clean_texts(series)
+    assert isinstance(cleaned, pd.Series) and cleaned.name == "content"
+    assert cleaned.index.equals(series.index) and list(cleaned) == expected
+    assert clean_texts(texts, processes=processes) == expected
+
+
+def check_inference(texts: list[str], labels: list[str]):
+    artifact = fit_classifier(texts, labels)
+    vectorizer, engine = artifact["vectorizer"], artifact["engine"]
+    raw = [text for text, _ in synthetic_documents(500, seed=1)] + EDGE_CASES
+
+    expected = engine.predict_proba(
+        vectorizer.transform([reference_clean_text(text) for text in raw])
+    )
+    actual = predict_batch(artifact, raw).probabilities
+    assert np.allclose(expected, actual, rtol=0, atol=1e-12)
+
+    # What inference used to see: punctuation splits words differently
+    uncleaned = vectorizer.transform(raw)
+    cleaned = vectorizer.transform(clean_texts(raw))
+    return int((uncleaned != cleaned).sum(axis=1).astype(bool).sum())
+
+
+def rate(func, texts, runs: int) -> float:
+    """Best documents/sec over ``runs`` passes."""
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        func(texts)
+        best = min(best, time.perf_counter() - start)
+    return len(texts) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--documents", type=int, default=50_000)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    corpus_texts, corpus_labels = load_training_corpus()
+    texts = [text for text, _ in synthetic_documents(args.documents)]
+    # Scraped documents carry entities and layout whitespace
+    scraped = [
+        f"<p>&quot;{text[:40]}&quot;</p>\n\n  {text[40:]} &amp; more\t"
+        for text in texts
+    ]
+
+    check_identical(
+        "clean_text",
+        reference_clean_text,
+        clean_text,
+        EDGE_CASES + corpus_texts + texts,
+    )
+    check_identical(
+        "normalize_document",
+        reference_normalize_document,
+        normalize_document,
+        EDGE_CASES + corpus_texts + scraped,
+    )
+    check_batches(EDGE_CASES + texts[:1000], args.processes)
+    changed = check_inference(corpus_texts, corpus_labels)
+    print(
+        "Identical normalization on "
+        f"{len(EDGE_CASES + corpus_texts + texts):,} documents; inference "
+        f"matches training ({changed} of {500 + len(EDGE_CASES)} raw "
+        "documents had different features without cleaning)"
+    )
+
+    series = pd.Series(texts)
+    report(
+        "Text preprocessing",
+        [
+            (
+                "classifier: re.sub per document",
+                rate(
+                    lambda docs: [reference_clean_text(d) for d in docs],
+                    texts,
+                    args.runs,
+                ),
+                "docs/s",
+            ),
+            (
+                "classifier: clean_texts (list)",
+                rate(clean_texts, texts, args.runs),
+                "docs/s",
+            ),
+            (
+                "classifier: clean_texts (Series)",
+                rate(clean_texts, series, args.runs),
+                "docs/s",
+            ),
+            (
+                f"classifier: {args.processes} processes, with startup",
+                rate(
+                    lambda docs: clean_texts(docs, processes=args.processes),
+                    texts,
+                    1,
+                ),
+                "docs/s",
+            ),
+            (
+                "scraped: re.sub per document",
+                rate(
+                    lambda docs: [
+                        reference_normalize_document(d) for d in docs
+                    ],
+                    scraped,
+                    args.runs,
+                ),
+                "docs/s",
+            ),
+            (
+                "scraped: normalize_document",
+                rate(
+                    lambda docs: [normalize_document(d) for d in docs],
+                    scraped,
+                    args.runs,
+                ),
+                "docs/s",
+            ),
+        ],
+    )
+
+
+if __name__ == "__main__":
+    main()
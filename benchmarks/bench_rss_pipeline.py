@@ -0,0 +1,86 @@
+"""
+Wall time of the concurrent RSS pipeline versus the original sequential loop,
+against local stand-in news sites.
+
+Usage:
+    python -m benchmarks.bench_rss_pipeline [--latency 0.05] [--sleep 0]
+
+``--sleep 1`` reproduces the original one-second pause after every entry.
+"""
+
+import argparse
+import asyncio
+import time
+
+import feedparser
+
+from app.preprocessing import normalize_document
+from app.routers.rss_scrape import get_full_article, parse_article
+from app.rss_pipeline import RssPipeline
+from benchmarks.common import report
+from benchmarks.news_fixture import serve_news_sites
+
+PER_CATEGORY_LIMIT = 20
+
+
+def sequential_scrape(sources: dict[str, list[str]], sleep: float) -> int:
+    """The original ``rss_data`` loop, minus the database writes."""
+    documents = []
+    for category, urls in sources.items():
+        count = 0
+        for url in urls:
+            if count >= PER_CATEGORY_LIMIT:
+                break
+            for entry in feedparser.parse(url).entries:
+                if count >= PER_CATEGORY_LIMIT:
+                    break
+                full_text = get_full_article(entry.link)
+                if full_text:
+                    documents.append(
+                        {
+                            "content": normalize_document(full_text),
+                            "category": category,
+                        }
+                    )
+                    count += 1
+                time.sleep(sleep)
+    return len(documents)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--sleep", type=float, default=0.0)
+    parser.add_argument("--domain-delay", type=float, default=0.0)
+    parser.add_argument("--domain-concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    with serve_news_sites(latency=args.latency) as sources:
+        start = time.perf_counter()
+        sequential_documents = sequential_scrape(sources, args.sleep)
+        sequential_time = time.perf_counter() - start
+
+        written: list[dict] = []
+        pipeline = RssPipeline(
+            parse_article,
+            normalize_document,
+            per_domain_concurrency=args.domain_concurrency,
+            per_domain_delay=args.domain_delay,
+        )
+        stats = asyncio.run(
+            pipeline.run(sources, PER_CATEGORY_LIMIT, sink=written.extend)
+        )
+
+    assert len(written) == sequential_documents, "pipeline lost documents"
+    report(
+        f"RSS scrape ({sequential_documents} documents)",
+        [
+            ("sequential loop", sequential_time, "s"),
+            ("async pipeline", stats.elapsed, "s"),
+            ("speedup", sequential_time / stats.elapsed, "x"),
+        ],
+    )
+
+
+if __name__ == "__main__":
+    main()
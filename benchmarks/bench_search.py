@@ -0,0 +1,124 @@
+"""
+p50/p99 latency of the paginated ``/task1`` search over a synthetic
+publication table, for common and rare terms.
+
+Needs the database configured in ``.env``. The synthetic table is built in a
+scratch ``bench`` schema (same columns, generated search vector and indexes as
+``publication``) and dropped afterwards unless ``--keep`` is given.
+
+Usage:
+    python -m benchmarks.bench_search [--rows 1000000] [--runs 200]
+"""
+
+import argparse
+import statistics
+import time
+
+from sqlalchemy import text
+from sqlmodel import Session
+
+from app.database import engine
+from app.routers.search import run_search
+from benchmarks.common import report
+from benchmarks.portal_fixture import WORDS
+
+SCHEMA = "bench"
+
+# Rare words are mixed into roughly one title in a thousand
+RARE_WORDS = ["quasiconcavity", "heteroskedastic", "cointegration"]
+
+QUERIES = {
+    "common": ["market", "finance risk", "economic growth"],
+    "rare": RARE_WORDS,
+}
+
+
+def build_table(session: Session, rows: int):
+    """Fills ``bench.publication`` with ``rows`` synthetic publications."""
+    words = "ARRAY[" + ", ".join(f"'{word}'" for word in WORDS) + "]"
+    rare = "ARRAY[" + ", ".join(f"'{word}'" for word in RARE_WORDS) + "]"
+    session.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    session.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    session.execute(
+        text(
+            f"CREATE TABLE {SCHEMA}.publication "
+            "(LIKE public.publication INCLUDING ALL)"
+        )
+    )
+    # Skewed word choice (power of random()) gives realistic term frequencies
+    session.execute(
+        text(f"""
+            INSERT INTO {SCHEMA}.publication (title, link, authors, year)
+            SELECT
+                (SELECT string_agg(
+                    ({words})[1 + floor(power(random(), 2) * {len(WORDS)})::int],
+                    ' ')
+                 FROM generate_series(1, 6 + g % 7))
+                || CASE WHEN random() < 0.001
+                   THEN ' ' || ({rare})[1 + g % {len(RARE_WORDS)}] ELSE '' END,
+                '/en/publications/bench-' || g,
+                jsonb_build_array(jsonb_build_object(
+                    'name', 'Author ' || (g % 50000), 'link', '')),
+                (1990 + g % 35)::text
+            FROM generate_series(1, :rows) AS g
+            """),
+        {"rows": rows},
+    )
+    session.execute(text(f"ANALYZE {SCHEMA}.publication"))
+    session.commit()
+
+
+def percentile(samples: list[float], q: float) -> float:
+    return (
+        statistics.quantiles(samples, n=100)[q - 1]
+        if len(samples) > 1
+        else samples[0]
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--keep", action="store_true")
+    args = parser.parse_args()
+
+    with Session(engine) as session:
+        build_table(session, args.rows)
+        session.execute(text(f"SET search_path TO {SCHEMA}, public"))
+
+        rows = []
+        for kind, queries in QUERIES.items():
+            for count in ("none", "exact"):
+                samples = []
+                for run in range(args.runs):
+                    start = time.perf_counter()
+                    run_search(
+                        session, queries[run % len(queries)], count=count
+                    )
+                    samples.append((time.perf_counter() - start) * 1000)
+                rows.append(
+                    (
+                        f"{kind} terms, count={count} p50",
+                        percentile(samples, 50),
+                        "ms",
+                    )
+                )
+                rows.append(
+                    (
+                        f"{kind} terms, count={count} p99",
+                        percentile(samples, 99),
+                        "ms",
+                    )
+                )
+
+        session.execute(text("SET search_path TO public"))
+        if not args.keep:
+            session.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+            session.commit()
+
+    report(f"Publication search ({args.rows:,} rows, top 10)", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Latency and memory of the in-memory BM25 index against PostgreSQL full-text
+search, on the same synthetic publications.
+
+The corpus is the ``publication`` table (e.g. restored from ``dump.sql``)
+scaled up to ``--rows`` by resampling its title words and author names; with
+an empty or unreachable database the portal fixture words are used instead.
+The Postgres side loads the corpus into a scratch ``bench`` schema (dropped
+afterwards) and is skipped with ``--memory-only``.
+
+Usage:
+    python -m benchmarks.bench_search_backends [--rows 1000000] [--runs 200]
+"""
+
+import argparse
+import random
+import time
+import tracemalloc
+
+from sqlalchemy import text
+from sqlmodel import Session
+
+from app.database import engine
+from app.models import Publication
+from app.routers.search import format_query, run_search
+from app.search_index import (
+    IndexedPublication,
+    PublicationIndex,
+    load_publications,
+    parse_query,
+)
+from app.services import copy_records
+from benchmarks.bench_search import QUERIES, RARE_WORDS, SCHEMA, percentile
+from benchmarks.common import report
+from benchmarks.portal_fixture import WORDS
+
+COLUMNS = ["id", "title", "link", "authors", "year"]
+
+
+def seed_vocabulary() -> tuple[list[str], list[str]]:
+    """Title words and author names of the stored publications, if any."""
+    words, authors = [], []
+    try:
+        with Session(engine) as session:
+            for publication in load_publications(session):
+                words.extend(publication.title.split())
+                authors.extend(a["name"] for a in publication.authors or [])
+    except Exception as e:
+        print(f"Database not available ({e.__class__.__name__}), using WORDS")
+    if not words:
+        words = WORDS
+        authors = [f"Author {i}" for i in range(50_000)]
+    return words, authors
+
+
+def synthetic_publications(rows: int, seed: int = 0):
+    words, authors = seed_vocabulary()
+    rng = random.Random(seed)
+    for i in range(1, rows + 1):
+        title = rng.choices(words, k=rng.randint(6, 12))
+        # Rare words are mixed into roughly one title in a thousand
+        if rng.random() < 0.001:
+            title.append(RARE_WORDS[i % len(RARE_WORDS)])
+        yield IndexedPublication(
+            id=i,
+            title=" ".join(title),
+            authors=[
+                {"name": name, "link": ""}
+                for name in rng.sample(authors, k=rng.randint(1, 3))
+            ],
+            link=f"/en/publications/bench-{i}",
+            year=str(1990 + i % 35),
+        )
+
+
+def time_queries(search, runs: int) -> list[tuple[str, float, str]]:
+    """p50/p99 milliseconds of ``search(query, operator)`` per query kind."""
+    rows = []
+    for kind, queries in QUERIES.items():
+        for operator in ("or", "and"):
+            samples = []
+            for run in range(runs):
+                start = time.perf_counter()
+                search(queries[run % len(queries)], operator)
+                samples.append((time.perf_counter() - start) * 1000)
+            for q in (50, 99):
+                rows.append(
+                    (
+                        f"{kind} terms, {operator} p{q}",
+                        percentile(samples, q),
+                        "ms",
+                    )
+                )
+    return rows
+
+
+def bench_memory(publications: list, runs: int):
+    start = time.perf_counter()
+    index = PublicationIndex.build(publications)
+    build_seconds = time.perf_counter() - start
+
+    # Traced separately, tracemalloc slows the build down several times
+    tracemalloc.start()
+    PublicationIndex.build(publications)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    def search(query, operator):
+        terms, require_all = parse_query(format_query(query, operator))
+        index.search(terms, limit=10, require_all=require_all)
+
+    return [
+        ("index build", build_seconds, "s"),
+        ("postings + arrays", index.nbytes / 2**20, "MiB"),
+        ("peak memory while building", peak / 2**20, "MiB"),
+        *time_queries(search, runs),
+    ]
+
+
+def bench_postgres(publications: list, runs: int):
+    with Session(engine) as session:
+        session.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        session.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        session.execute(
+            text(
+                f"CREATE TABLE {SCHEMA}.publication "
+                "(LIKE public.publication INCLUDING ALL)"
+            )
+        )
+        session.execute(text(f"SET search_path TO {SCHEMA}, public"))
+        start = time.perf_counter()
+        copy_records(
+            session,
+            Publication,  # resolves to bench.publication on the search path
+            COLUMNS,
+            ((p.id, p.title, p.link, p.authors, p.year) for p in publications),
+        )
+        session.execute(text(f"ANALYZE {SCHEMA}.publication"))
+        session.commit()
+        load_seconds = time.perf_counter() - start
+        size = session.execute(
+            text(f"SELECT pg_total_relation_size('{SCHEMA}.publication')")
+        ).scalar_one()
+
+        def search(query, operator):
+            run_search(
+                session,
+                query,
+                operator=operator,
+                use_cache=False,
+                backend="postgres",
+            )
+
+        rows = [
+            ("load + generate vectors + index", load_seconds, "s"),
+            ("table + indexes on disk", size / 2**20, "MiB"),
+            *time_queries(search, runs),
+        ]
+        session.execute(text("SET search_path TO public"))
+        session.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+        session.commit()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--memory-only", action="store_true")
+    args = parser.parse_args()
+
+    publications = list(synthetic_publications(args.rows))
+
+    report(
+        f"In-memory BM25 index ({args.rows:,} rows, top 10)",
+        bench_memory(publications, args.runs),
+    )
+    if not args.memory_only:
+        report(
+            f"PostgreSQL full-text search ({args.rows:,} rows, top 10)",
+            bench_postgres(publications, args.runs),
+        )
+
+
+if __name__ == "__main__":
+    main()
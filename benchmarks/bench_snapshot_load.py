@@ -0,0 +1,96 @@
+"""
+Cold-start cost of the classifier and the publication search index:
+unpickling the model and rebuilding the index from rows, against mapping
+their snapshots.
+
+Works in a scratch directory; no database needed.
+
+Usage:
+    python -m benchmarks.bench_snapshot_load [--docs 50000] [--rows 200000]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from app.model_registry import ModelRegistry, publish_model
+from app.search_index import SNAPSHOT_NAME, PublicationIndex
+from app.snapshot import load_snapshot
+from app.training import fit_classifier
+from benchmarks.bench_search_backends import synthetic_publications
+from benchmarks.common import report, synthetic_documents
+
+
+def best_of(runs: int, fn) -> float:
+    """Fastest of ``runs`` calls, in milliseconds."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, default=50_000)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        model_path = os.path.join(root, "trained_model.pkl")
+        texts, labels = zip(*synthetic_documents(args.docs))
+        publish_model(
+            fit_classifier(list(texts), list(labels)),
+            model_path,
+            snapshot_root=root,
+        )
+
+        publications = list(synthetic_publications(args.rows))
+        start = time.perf_counter()
+        index = PublicationIndex.build(publications)
+        build_ms = (time.perf_counter() - start) * 1000
+        index.save_snapshot(root)
+
+        # A fresh registry per run, as in a newly started worker; an empty
+        # snapshot directory forces unpickling the model file
+        empty = os.path.join(root, "empty")
+        rows = [
+            (
+                "classifier: unpickle model",
+                best_of(
+                    args.runs,
+                    lambda: ModelRegistry(model_path, empty).get(),
+                ),
+                "ms",
+            ),
+            (
+                "classifier: map snapshot",
+                best_of(
+                    args.runs, lambda: ModelRegistry(model_path, root).get()
+                ),
+                "ms",
+            ),
+            ("search index: build from rows", build_ms, "ms"),
+            (
+                "search index: map snapshot",
+                best_of(
+                    args.runs,
+                    lambda: PublicationIndex.from_snapshot(
+                        load_snapshot(SNAPSHOT_NAME, root=root)
+                    ),
+                ),
+                "ms",
+            ),
+        ]
+
+    report(
+        f"Cold start ({args.docs:,} training docs, {args.rows:,} publications)",
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Incremental model updates against full rebuilds on a growing corpus.
+
+Starts from a model trained on ``--base`` synthetic documents, then adds
+``--steps`` batches of ``--batch`` new documents. Each batch is folded in with
+``update_classifier`` and, for comparison, the model is rebuilt from scratch
+on the whole corpus; both are scored on a separate synthetic test set.
+
+Before timing, the script checks on ``train_data.csv`` itself that real rows
+of the training distribution are folded in incrementally: a model fitted on
+most of the corpus must accept the held-out rest without a rebuild, while a
+batch of words it has never seen must force one. Every synthetic batch must
+be an update too.
+
+Usage:
+    python -m benchmarks.bench_train_incremental [--base 50000] [--batch 2000]
+"""
+
+import argparse
+import random
+import time
+
+import numpy as np
+
+from app.inference import predict_batch
+from app.training import RebuildRequired, fit_classifier, update_classifier
+from benchmarks.common import (
+    load_training_corpus,
+    report,
+    synthetic_documents,
+)
+
+TEST_SEED = 1
+
+# Share of train_data.csv the in-distribution check fits on
+FIT_SHARE = 0.8
+
+
+def check_in_distribution():
+    texts, labels = load_training_corpus()
+    rows = list(zip(texts, labels))
+    random.Random(0).shuffle(rows)
+    cut = int(len(rows) * FIT_SHARE)
+    artifact = fit_classifier(*zip(*rows[:cut]))
+
+    new_texts, new_labels = zip(*rows[cut:])
+    try:
+        updated = update_classifier(
+            artifact, new_texts, new_labels, watermark=len(rows)
+        )
+    except RebuildRequired as e:
+        raise AssertionError(f"held-out rows forced a rebuild: {e}")
+    oov = updated["oov_terms"] / updated["seen_terms"]
+
+    unseen = [f"qzx{i} vorbl{i} ptarn{i}" for i in range(len(new_texts))]
+    try:
+        update_classifier(artifact, unseen, new_labels, watermark=len(rows))
+    except RebuildRequired:
+        pass
+    else:
+        raise AssertionError("unseen words were folded in incrementally")
+    return artifact["baseline_oov"], oov
+
+
+def accuracy(artifact, texts, labels) -> float:
+    predicted = predict_batch(artifact, texts).labels
+    return float(np.mean(np.array(predicted) == np.array(labels))) * 100
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--base", type=int, default=50_000)
+    parser.add_argument("--batch", type=int, default=2_000)
+    parser.add_argument("--steps", type=int, default=5)
+    parser.add_argument("--test-rows", type=int, default=10_000)
+    args = parser.parse_args()
+
+    baseline, held_out = check_in_distribution()
+    print(
+        f"train_data.csv: held-out rows updated incrementally "
+        f"({held_out:.0%} unknown words, {baseline:.0%} expected)"
+    )
+
+    corpus = synthetic_documents(args.base + args.batch * args.steps)
+    test_texts, test_labels = zip(
+        *synthetic_documents(args.test_rows, seed=TEST_SEED)
+    )
+
+    texts, labels = zip(*corpus[: args.base])
+    incremental = fit_classifier(texts, labels)
+    incremental["watermark"] = args.base
+
+    rows = []
+    for step in range(1, args.steps + 1):
+        end = args.base + step * args.batch
+        new_texts, new_labels = zip(*corpus[end - args.batch : end])
+
+        start = time.perf_counter()
+        try:
+            incremental = update_classifier(
+                incremental, new_texts, new_labels, watermark=end
+            )
+        except RebuildRequired as e:
+            raise AssertionError(f"step {step} forced a rebuild: {e}")
+        update_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        rebuilt = fit_classifier(*zip(*corpus[:end]))
+        rebuild_seconds = time.perf_counter() - start
+
+        oov = incremental.get("oov_terms", 0) / max(
+            incremental.get("seen_terms", 0), 1
+        )
+        rows += [
+            (f"step {step} ({end:,} rows): update", update_seconds, "s"),
+            (f"step {step}: full rebuild", rebuild_seconds, "s"),
+            (
+                f"step {step}: speed-up",
+                rebuild_seconds / update_seconds,
+                "x",
+            ),
+            (f"step {step}: out-of-vocabulary words", oov * 100, "%"),
+            (
+                f"step {step}: accuracy incremental",
+                accuracy(incremental, test_texts, test_labels),
+                "%",
+            ),
+            (
+                f"step {step}: accuracy rebuilt",
+                accuracy(rebuilt, test_texts, test_labels),
+                "%",
+            ),
+        ]
+
+    report(
+        f"Incremental updates ({args.base:,} rows + {args.steps} x "
+        f"{args.batch:,})",
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
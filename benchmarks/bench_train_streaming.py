@@ -0,0 +1,88 @@
+"""
+Peak RSS and wall time of the in-memory trainer (``/train``) against the
+streaming trainer (``/train?mode=streaming``) on a synthetic corpus, plus the
+accuracy of both models on a separate synthetic test set.
+
+Each trainer runs in a fresh child process so its peak RSS is measured on its
+own. The streaming trainer consumes the corpus chunk by chunk from a
+generator, as it would from the server-side cursor; no database is needed.
+
+Usage:
+    python -m benchmarks.bench_train_streaming [--rows 2000000] [--skip-full]
+"""
+
+import argparse
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import numpy as np
+
+from app.inference import predict_batch
+from app.training import fit_classifier, fit_streaming
+from benchmarks.common import (
+    iter_synthetic_documents,
+    load_training_corpus,
+    report,
+    synthetic_documents,
+)
+
+TEST_SEED = 1
+
+
+def chunked(rows, size: int):
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+def run_trainer(mode: str, rows: int, chunk_size: int, test_rows: int):
+    """Trains in this (child) process; returns seconds, peak MiB, accuracy."""
+    start = time.perf_counter()
+    if mode == "full":
+        texts, labels = zip(*synthetic_documents(rows))
+        artifact = fit_classifier(texts, labels)
+        del texts, labels
+    else:
+        classes = sorted(set(load_training_corpus()[1]))
+        artifact = fit_streaming(
+            chunked(iter_synthetic_documents(rows), chunk_size), classes
+        )
+    seconds = time.perf_counter() - start
+    # ru_maxrss is in KiB on Linux
+    peak_mib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    texts, labels = zip(*synthetic_documents(test_rows, seed=TEST_SEED))
+    predicted = predict_batch(artifact, texts).labels
+    accuracy = float(np.mean(np.array(predicted) == np.array(labels)))
+    return seconds, peak_mib, accuracy
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    parser.add_argument("--test-rows", type=int, default=20_000)
+    parser.add_argument("--skip-full", action="store_true")
+    args = parser.parse_args()
+
+    modes = ["streaming"] if args.skip_full else ["full", "streaming"]
+    rows = []
+    for mode in modes:
+        # A new process per trainer, so peaks are not shared
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            seconds, peak_mib, accuracy = pool.submit(
+                run_trainer, mode, args.rows, args.chunk_size, args.test_rows
+            ).result()
+        rows += [
+            (f"{mode}: wall time", seconds, "s"),
+            (f"{mode}: peak RSS", peak_mib, "MiB"),
+            (f"{mode}: test accuracy", accuracy * 100, "%"),
+        ]
+
+    report(f"Training on {args.rows:,} synthetic documents", rows)
+
+
+if __name__ == "__main__":
+    main()
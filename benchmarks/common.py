@@ -0,0 +1,60 @@
+"""Shared helpers for the benchmark scripts."""
+
+import csv
+import random
+import time
+from contextlib import contextmanager
+
+TRAIN_DATA_PATH = "train_data.csv"
+
+
+def load_training_corpus(path: str = TRAIN_DATA_PATH):
+    """Returns the (texts, labels) pairs from the labelled CSV corpus."""
+    with open(path, newline="", encoding="utf-8") as csv_file:
+        rows = [
+            (row["content"], row["category"])
+            for row in csv.DictReader(csv_file)
+        ]
+    texts, labels = zip(*rows)
+    return list(texts), list(labels)
+
+
+def iter_synthetic_documents(
+    n: int, seed: int = 0, path: str = TRAIN_DATA_PATH
+):
+    """
+    Generates ``n`` labelled documents by resampling words of the training
+    corpus within each category, so the vocabulary stays realistic.
+    """
+    texts, labels = load_training_corpus(path)
+    words_by_label: dict[str, list[str]] = {}
+    for text, label in zip(texts, labels):
+        words_by_label.setdefault(label, []).extend(text.split())
+
+    rng = random.Random(seed)
+    categories = sorted(words_by_label)
+    for _ in range(n):
+        label = rng.choice(categories)
+        words = rng.choices(words_by_label[label], k=rng.randint(8, 40))
+        yield " ".join(words), label
+
+
+def synthetic_documents(n: int, seed: int = 0, path: str = TRAIN_DATA_PATH):
+    """List of ``n`` documents from ``iter_synthetic_documents``."""
+    return list(iter_synthetic_documents(n, seed, path))
+
+
+@contextmanager
+def timer(results: dict, name: str):
+    """Stores the wall time of the enclosed block in ``results[name]``."""
+    start = time.perf_counter()
+    yield
+    results[name] = time.perf_counter() - start
+
+
+def report(title: str, rows: list[tuple[str, float, str]]):
+    """Prints a small aligned table of benchmark results."""
+    print(f"\n{title}")
+    print("-" * len(title))
+    for name, value, unit in rows:
+        print(f"{name:<40} {value:>14,.2f} {unit}")
@@ -0,0 +1,339 @@
+"""
+Synthetic Publication and Prediction corpora at fixed scales, seeded from the
+rows of ``dump.sql`` and ``train_data.csv`` so titles, authors, years and news
+vocabulary keep the distributions of the real data.
+
+``dump.sql`` is read directly, whether it is a ``pg_dump`` custom-format
+archive (as shipped) or a plain SQL dump with ``COPY ... FROM stdin`` blocks,
+so no ``pg_restore`` is needed to build a corpus.
+"""
+
+import json
+import random
+import re
+import zlib
+from dataclasses import dataclass
+from itertools import islice
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+from benchmarks.common import TRAIN_DATA_PATH, load_training_corpus
+
+DUMP_PATH = "dump.sql"
+
+ARCHIVE_MAGIC = b"PGDMP"
+# Data block marker of a custom-format archive (BLK_DATA in pg_backup_custom.c)
+BLOCK_DATA = 1
+# Archive versions (major, minor) whose layout ``read_archive`` knows
+ARCHIVE_VERSIONS = ((1, 14),)
+
+
+class Scale(NamedTuple):
+    publications: int
+    predictions: int
+
+
+SCALES = {
+    "small": Scale(10_000, 5_000),
+    "medium": Scale(100_000, 50_000),
+    "large": Scale(1_000_000, 500_000),
+}
+
+
+class Table(NamedTuple):
+    columns: list[str]
+    rows: list[list[Optional[str]]]
+
+
+COPY_STATEMENT = re.compile(r"COPY (?:\w+\.)?(\w+) \(([^)]*)\) FROM stdin;")
+COPY_ESCAPE = re.compile(r"\\(x[0-9a-fA-F]{1,2}|[0-7]{1,3}|.)")
+COPY_ESCAPES = {
+    "b": "\b",
+    "f": "\f",
+    "n": "\n",
+    "r": "\r",
+    "t": "\t",
+    "v": "\v",
+}
+
+
+def _unescape(match: re.Match) -> str:
+    escape = match.group(1)
+    if escape[0] == "x" and len(escape) > 1:
+        return chr(int(escape[1:], 16))
+    if escape[0].isdigit():
+        return chr(int(escape, 8))
+    return COPY_ESCAPES.get(escape, escape)
+
+
+def parse_copy_rows(data: str) -> list[list[Optional[str]]]:
+    """Rows of COPY text-format ``data``; ``\\N`` fields are None."""
+    rows = []
+    for line in data.split("\n"):
+        if not line or line == "\\.":
+            continue
+        rows.append(
+            [
+                None if field == "\\N" else COPY_ESCAPE.sub(_unescape, field)
+                for field in line.split("\t")
+            ]
+        )
+    return rows
+
+
+class _ArchiveReader:
+    """Reads the primitives of a custom-format archive from its bytes."""
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.pos = len(ARCHIVE_MAGIC)
+        major, minor, _, self.int_size, self.offset_size, archive_format = (
+            self.byte() for _ in range(6)
+        )
+        if (major, minor) not in ARCHIVE_VERSIONS or archive_format != 1:
+            raise ValueError(
+                f"Unsupported pg_dump archive {major}.{minor} "
+                f"(format {archive_format})"
+            )
+
+    def byte(self) -> int:
+        self.pos += 1
+        return self.data[self.pos - 1]
+
+    def bytes(self, size: int) -> bytes:
+        self.pos += size
+        return self.data[self.pos - size : self.pos]
+
+    def int(self) -> int:
+        negative = self.byte()
+        value = int.from_bytes(self.bytes(self.int_size), "little")
+        return -value if negative else value
+
+    def str(self) -> Optional[str]:
+        size = self.int()
+        return None if size < 0 else self.bytes(size).decode("utf-8")
+
+    def offset(self) -> int:
+        self.byte()  # Whether the offset is set (the entry's data state)
+        return int.from_bytes(self.bytes(self.offset_size), "little")
+
+    def data_block(self, offset: int, compressed: bool) -> bytes:
+        """The table data of the block at ``offset``, decompressed."""
+        self.pos = offset
+        if self.byte() != BLOCK_DATA:
+            raise ValueError(f"No data block at offset {offset}")
+        self.int()  # Dump id
+        chunks = []
+        while size := self.int():
+            chunks.append(self.bytes(size))
+        data = b"".join(chunks)
+        return zlib.decompressobj().decompress(data) if compressed else data
+
+
+def read_archive(data: bytes) -> dict[str, Table]:
+    """Table data of a ``pg_dump -Fc`` archive, by table name."""
+    archive = _ArchiveReader(data)
+    compression = archive.int()
+    for _ in range(7):  # Creation date
+        archive.int()
+    for _ in range(3):  # Database name, server and pg_dump versions
+        archive.str()
+
+    data_entries = []
+    for _ in range(archive.int()):
+        archive.int()  # Dump id
+        archive.int()  # Whether it has data
+        fields = [archive.str() for _ in range(4)]  # Table oid, oid, tag, desc
+        archive.int()  # Section
+        # Definition, drop and copy statements, namespace, tablespace, table
+        # access method, owner and the obsolete "with oids"
+        fields += [archive.str() for _ in range(8)]
+        while archive.str() is not None:  # Dependencies
+            pass
+        offset = archive.offset()
+        if fields[3] == "TABLE DATA":
+            data_entries.append((fields[6], offset))
+
+    tables = {}
+    for copy_statement, offset in data_entries:
+        match = COPY_STATEMENT.match(copy_statement or "")
+        if match is None:
+            continue
+        block = archive.data_block(offset, compressed=compression != 0)
+        tables[match.group(1)] = Table(
+            [column.strip() for column in match.group(2).split(",")],
+            parse_copy_rows(block.decode("utf-8")),
+        )
+    return tables
+
+
+def read_plain_dump(sql: str) -> dict[str, Table]:
+    """Table data of the ``COPY ... FROM stdin`` blocks of a plain SQL dump."""
+    tables = {}
+    for match in COPY_STATEMENT.finditer(sql):
+        end = sql.find("\n\\.\n", match.end())
+        block = sql[match.end() + 1 : end if end >= 0 else len(sql)]
+        tables[match.group(1)] = Table(
+            [column.strip() for column in match.group(2).split(",")],
+            parse_copy_rows(block),
+        )
+    return tables
+
+
+def read_dump(path: str = DUMP_PATH) -> dict[str, Table]:
+    """Table data of the dump at ``path``, in either format."""
+    with open(path, "rb") as dump:
+        data = dump.read()
+    if data.startswith(ARCHIVE_MAGIC):
+        return read_archive(data)
+    return read_plain_dump(data.decode("utf-8"))
+
+
+def records(table: Optional[Table]) -> list[dict]:
+    if table is None:
+        return []
+    return [dict(zip(table.columns, row)) for row in table.rows]
+
+
+@dataclass
+class CorpusSeed:
+    """What the synthetic rows are sampled from."""
+
+    title_words: list[str]
+    authors: list[dict]
+    years: list[str]
+    words_by_category: dict[str, list[str]]
+
+    def query_terms(self, count: int = 50) -> dict[str, list[str]]:
+        """
+        Search terms of the corpus: the ``count`` most frequent title words
+        (``common``) and as many of the least frequent (``rare``).
+        """
+        frequency: dict[str, int] = {}
+        for word in self.title_words:
+            word = word.strip(".,:;()?!\"'").lower()
+            if len(word) > 4 and word.isalpha():
+                frequency[word] = frequency.get(word, 0) + 1
+        ranked = sorted(frequency, key=lambda word: (-frequency[word], word))
+        return {"common": ranked[:count], "rare": ranked[-count:]}
+
+
+def load_seed(
+    dump_path: str = DUMP_PATH, train_path: str = TRAIN_DATA_PATH
+) -> CorpusSeed:
+    tables = read_dump(dump_path)
+    publications = records(tables.get("publication"))
+    if not publications:
+        raise ValueError(f"No publication rows in {dump_path}")
+
+    authors = [
+        author
+        for publication in publications
+        for author in json.loads(publication["authors"] or "[]")
+    ]
+    words_by_category: dict[str, list[str]] = {}
+    texts, labels = load_training_corpus(train_path)
+    for prediction in records(tables.get("prediction")):
+        texts.append(prediction["content"] or "")
+        labels.append(prediction["category"] or "")
+    for text, label in zip(texts, labels):
+        if label:
+            words_by_category.setdefault(label, []).extend(text.split())
+
+    return CorpusSeed(
+        title_words=[
+            word for p in publications for word in (p["title"] or "").split()
+        ],
+        authors=authors,
+        years=[p["year"] for p in publications if p["year"]],
+        words_by_category=words_by_category,
+    )
+
+
+def iter_publications(
+    seed: CorpusSeed, n: int, rng_seed: int = 0
+) -> Iterator[tuple[str, str, list[dict], str]]:
+    """``n`` synthetic (title, link, authors, year) publication rows."""
+    rng = random.Random(rng_seed)
+    for i in range(n):
+        yield (
+            " ".join(rng.choices(seed.title_words, k=rng.randint(5, 14))),
+            f"/en/publications/bench-{i}",
+            rng.sample(
+                seed.authors, k=min(rng.randint(1, 4), len(seed.authors))
+            ),
+            rng.choice(seed.years),
+        )
+
+
+def iter_predictions(
+    seed: CorpusSeed, n: int, rng_seed: int = 0
+) -> Iterator[tuple[str, str]]:
+    """
+    ``n`` synthetic (content, category) documents, resampling the words of
+    each category like ``common.iter_synthetic_documents``.
+    """
+    rng = random.Random(rng_seed)
+    categories = sorted(seed.words_by_category)
+    for _ in range(n):
+        category = rng.choice(categories)
+        words = rng.choices(
+            seed.words_by_category[category], k=rng.randint(8, 40)
+        )
+        yield " ".join(words), category
+
+
+def batched(rows: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(rows)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def seed_database(
+    seed: CorpusSeed, scale: Scale, rng_seed: int = 0, batch_size: int = 50_000
+) -> Scale:
+    """
+    Replaces the publication and prediction tables of the configured
+    database with a corpus of ``scale``.
+
+    Returns:
+        Scale: The rows written to each table.
+    """
+    from sqlalchemy import text
+    from sqlmodel import Session
+
+    from app.database import (
+        create_database_if_not_exists,
+        create_db_and_tables,
+        engine,
+    )
+    from app.models import Prediction, Publication
+    from app.services import copy_records
+
+    create_database_if_not_exists()
+    create_db_and_tables()
+    written = []
+    with Session(engine) as session:
+        session.execute(
+            text("TRUNCATE publication, prediction RESTART IDENTITY")
+        )
+        for table, columns, rows in (
+            (
+                Publication,
+                ["title", "link", "authors", "year"],
+                iter_publications(seed, scale.publications, rng_seed),
+            ),
+            (
+                Prediction,
+                ["content", "category"],
+                iter_predictions(seed, scale.predictions, rng_seed),
+            ),
+        ):
+            count = 0
+            for batch in batched(rows, batch_size):
+                count += copy_records(session, table, columns, batch)
+                print(f"{table.__tablename__}: {count:,} rows")
+            written.append(count)
+        session.commit()
+        session.execute(text("ANALYZE publication, prediction"))
+        session.commit()
+    return Scale(*written)
@@ -0,0 +1,59 @@
+"""Minimal threaded HTTP server for canned benchmark fixtures."""
+
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+@contextmanager
+def serve(
+    routes: dict[str, tuple[str, bytes]],
+    latency: float = 0.0,
+    etags: bool = False,
+):
+    """
+    Serves ``routes`` (request path including query -> (content type, body))
+    on a random local port for the duration of the block.
+
+    With ``etags`` every response carries an ETag (hash of the body), and
+    requests revalidating it get ``304 Not Modified``.
+
+    Yields:
+        The base URL of the server, e.g. ``http://127.0.0.1:54321``.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path not in routes:
+                self.send_error(404)
+                return
+            time.sleep(latency)
+            content_type, body = routes[self.path]
+            etag = f'"{hashlib.md5(body).hexdigest()}"'
+            if etags and self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            if etags:
+                self.send_header("ETag", etag)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}"
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,483 @@
+"""
+Reproducible end-to-end load test of the HTTP endpoints against a local
+PostgreSQL, with machine-readable results that can be diffed between commits.
+
+``seed`` replaces the publication and prediction tables of the configured
+database with a synthetic corpus of the chosen scale (see
+``benchmarks/corpus.py``; always the same rows for a scale and seed). To avoid
+wiping real data it refuses unless ``DB_NAME`` contains "bench" or
+``--force`` is given.
+
+``run`` drives every scenario at each ``--concurrency`` with closed-loop
+clients (each sends its next request when the previous one returns) and
+writes throughput and p50/p95/p99 latency to
+``benchmarks/results/<commit>-<scale>.json``. Scenarios run in a fixed order:
+``train`` first and once, so the classifier scenarios have a model, and
+``ingest_csv`` last, because it grows the prediction table. With
+``--start-server`` the app is started under uvicorn for the run.
+
+``compare`` prints the change of every (scenario, concurrency) pair between
+two result files and, with ``--fail-on-regression``, exits with status 1 when
+throughput drops or p95 latency rises by more than ``--threshold`` percent.
+
+Usage:
+    python -m benchmarks.loadtest seed --scale small
+    python -m benchmarks.loadtest run --scale small --start-server \\
+        [--concurrency 1 8 32] [--requests 500] [--scenarios search_api ...]
+    python -m benchmarks.loadtest compare base.json head.json [--threshold 10]
+"""
+
+import argparse
+import asyncio
+import csv
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Callable, NamedTuple, Optional
+
+import httpx
+
+from benchmarks.bench_search import percentile
+from benchmarks.corpus import SCALES, CorpusSeed, iter_predictions, load_seed
+
+RESULTS_DIR = os.path.join("benchmarks", "results")
+TRAINING_TIMEOUT_S = 3600
+
+# In the order they run: training first so the classifier has a model, CSV
+# ingestion last as it grows the prediction table
+SCENARIOS = (
+    "train",
+    "search_api",
+    "search_page",
+    "classify_form",
+    "classify_batch",
+    "ingest_csv",
+)
+
+CLASSIFY_BATCH_SIZE = 32
+CSV_UPLOAD_ROWS = 200
+
+
+class Request(NamedTuple):
+    method: str
+    url: str
+    options: dict
+
+
+@dataclass
+class Result:
+    scenario: str
+    concurrency: int
+    requests: int
+    errors: int
+    elapsed_s: float
+    throughput_rps: float
+    latency_mean_ms: float
+    latency_p50_ms: float
+    latency_p95_ms: float
+    latency_p99_ms: float
+    latency_max_ms: float
+
+
+def make_scenarios(
+    seed: CorpusSeed, rng_seed: int
+) -> dict[str, Callable[[random.Random], Request]]:
+    """Request builders of the load scenarios, by name."""
+    terms = seed.query_terms()
+    # Mostly common terms, as typed into the search box; rare ones are cheap
+    queries = terms["common"] * 4 + terms["rare"]
+    documents = [
+        content for content, _ in iter_predictions(seed, 1_000, rng_seed)
+    ]
+
+    def search_query(rng: random.Random) -> str:
+        return " ".join(rng.sample(queries, k=rng.randint(1, 3)))
+
+    def csv_upload(rng: random.Random) -> bytes:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(["content", "category"])
+        writer.writerows(
+            iter_predictions(seed, CSV_UPLOAD_ROWS, rng.randrange(2**32))
+        )
+        return buffer.getvalue().encode("utf-8")
+
+    return {
+        "search_api": lambda rng: Request(
+            "GET", "/api/search", {"params": {"query": search_query(rng)}}
+        ),
+        "search_page": lambda rng: Request(
+            "GET",
+            "/task1",
+            {
+                "params": {
+                    "query": search_query(rng),
+                    "page": rng.choice((1, 1, 1, 2, 5)),
+                }
+            },
+        ),
+        "classify_form": lambda rng: Request(
+            "POST", "/task2", {"data": {"text": rng.choice(documents)}}
+        ),
+        "classify_batch": lambda rng: Request(
+            "POST",
+            "/api/classify",
+            {
+                "json": {
+                    "documents": [
+                        {"text": text}
+                        for text in rng.sample(documents, CLASSIFY_BATCH_SIZE)
+                    ]
+                }
+            },
+        ),
+        "ingest_csv": lambda rng: Request(
+            "POST",
+            "/upload-csv",
+            {"files": {"file": ("bench.csv", csv_upload(rng), "text/csv")}},
+        ),
+    }
+
+
+def summarize(
+    scenario: str,
+    concurrency: int,
+    latencies: list[float],
+    errors: int,
+    elapsed: float,
+) -> Result:
+    latencies_ms = [latency * 1000 for latency in latencies] or [0.0]
+    return Result(
+        scenario=scenario,
+        concurrency=concurrency,
+        requests=len(latencies),
+        errors=errors,
+        elapsed_s=round(elapsed, 3),
+        throughput_rps=round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        latency_mean_ms=round(sum(latencies_ms) / len(latencies_ms), 3),
+        latency_p50_ms=round(percentile(latencies_ms, 50), 3),
+        latency_p95_ms=round(percentile(latencies_ms, 95), 3),
+        latency_p99_ms=round(percentile(latencies_ms, 99), 3),
+        latency_max_ms=round(max(latencies_ms), 3),
+    )
+
+
+async def drive(
+    client: httpx.AsyncClient,
+    build: Callable[[random.Random], Request],
+    concurrency: int,
+    requests: int,
+    rng_seed: int,
+) -> tuple[list[float], int, float]:
+    """
+    Sends ``requests`` requests from ``concurrency`` closed-loop workers.
+
+    Returns:
+        The latency of every request in seconds, the number of errors
+        (exceptions and 4xx/5xx responses) and the wall time.
+    """
+    latencies: list[float] = []
+    errors = 0
+    remaining = requests
+
+    async def worker(rng: random.Random):
+        nonlocal errors, remaining
+        while remaining > 0:
+            remaining -= 1
+            request = build(rng)
+            start = time.perf_counter()
+            try:
+                response = await client.request(
+                    request.method, request.url, **request.options
+                )
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            latencies.append(time.perf_counter() - start)
+            errors += failed
+
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(worker(random.Random(f"{rng_seed}-{i}")) for i in range(concurrency))
+    )
+    return latencies, errors, time.perf_counter() - start
+
+
+async def train(client: httpx.AsyncClient, poll_interval: float) -> Result:
+    """Time from queueing a full training job to its completion."""
+    start = time.perf_counter()
+    response = await client.post("/train", params={"mode": "full"})
+    response.raise_for_status()
+    status_url = response.json()["status_url"]
+    while True:
+        job = (await client.get(status_url)).json()
+        if job["status"] in ("succeeded", "failed", "cancelled"):
+            break
+        if time.perf_counter() - start > TRAINING_TIMEOUT_S:
+            raise TimeoutError(f"Training did not finish: {job}")
+        await asyncio.sleep(poll_interval)
+    elapsed = time.perf_counter() - start
+    return summarize(
+        "train", 1, [elapsed], int(job["status"] != "succeeded"), elapsed
+    )
+
+
+async def run_scenarios(args, seed: CorpusSeed) -> list[Result]:
+    scenarios = make_scenarios(seed, args.seed)
+    results = []
+    limits = httpx.Limits(max_connections=max(args.concurrency))
+    async with httpx.AsyncClient(
+        base_url=args.base_url, limits=limits, timeout=args.timeout
+    ) as client:
+        for name in SCENARIOS:
+            if name not in args.scenarios:
+                continue
+            if name == "train":
+                print("train ...")
+                results.append(await train(client, args.poll_interval))
+                continue
+            for concurrency in args.concurrency:
+                print(f"{name} x{concurrency} ...")
+                await drive(
+                    client, scenarios[name], concurrency, args.warmup, -1
+                )
+                latencies, errors, elapsed = await drive(
+                    client,
+                    scenarios[name],
+                    concurrency,
+                    args.requests,
+                    args.seed,
+                )
+                results.append(
+                    summarize(name, concurrency, latencies, errors, elapsed)
+                )
+    return results
+
+
+def wait_until_up(base_url: str, process: subprocess.Popen, timeout: float):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(
+                f"Server exited with status {process.returncode}"
+            )
+        try:
+            if httpx.get(f"{base_url}/", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise TimeoutError(f"Server at {base_url} did not start in {timeout}s")
+
+
+def start_server(args) -> subprocess.Popen:
+    url = httpx.URL(args.base_url)
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "app.main:app",
+            "--host",
+            url.host,
+            "--port",
+            str(url.port or 80),
+            "--workers",
+            str(args.workers),
+            "--log-level",
+            "warning",
+        ]
+    )
+    try:
+        wait_until_up(args.base_url, process, args.startup_timeout)
+    except Exception:
+        process.terminate()
+        raise
+    return process
+
+
+def git(*command: str) -> str:
+    try:
+        return subprocess.run(
+            ["git", *command], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def run_metadata(args) -> dict:
+    return {
+        "commit": git("rev-parse", "HEAD") or "unknown",
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "scale": args.scale,
+        "corpus": SCALES[args.scale]._asdict(),
+        "seed": args.seed,
+        "base_url": args.base_url,
+        "workers": args.workers if args.start_server else None,
+        "requests": args.requests,
+        "warmup": args.warmup,
+        "search_backend": os.getenv("SEARCH_BACKEND", "postgres"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def run(args):
+    seed = load_seed()
+    server = start_server(args) if args.start_server else None
+    try:
+        results = asyncio.run(run_scenarios(args, seed))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    meta = run_metadata(args)
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{meta['commit'][:12]}-{args.scale}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as results_file:
+        json.dump(
+            {"meta": meta, "results": [asdict(r) for r in results]},
+            results_file,
+            indent=2,
+        )
+
+    print(
+        f"\n{'scenario':<16} {'conc':>4} {'req/s':>10} {'p50 ms':>10} "
+        f"{'p95 ms':>10} {'p99 ms':>10} {'errors':>7}"
+    )
+    for r in results:
+        print(
+            f"{r.scenario:<16} {r.concurrency:>4} {r.throughput_rps:>10,.1f} "
+            f"{r.latency_p50_ms:>10,.1f} {r.latency_p95_ms:>10,.1f} "
+            f"{r.latency_p99_ms:>10,.1f} {r.errors:>7}"
+        )
+    print(f"\nResults written to {output}")
+
+
+def seed_corpus(args):
+    name = os.getenv("DB_NAME", "")
+    if "bench" not in name and not args.force:
+        sys.exit(
+            f"Refusing to replace the tables of database {name!r}: use a "
+            "database whose name contains 'bench', or pass --force"
+        )
+    from benchmarks.corpus import seed_database
+
+    start = time.perf_counter()
+    written = seed_database(load_seed(), SCALES[args.scale], args.seed)
+    print(
+        f"Seeded {written.publications:,} publications and "
+        f"{written.predictions:,} predictions in "
+        f"{time.perf_counter() - start:,.1f} s"
+    )
+
+
+def change(base: float, head: float) -> Optional[float]:
+    """Relative change from ``base`` to ``head``, in percent."""
+    return (head - base) / base * 100 if base else None
+
+
+def compare(args):
+    def load(path: str) -> tuple[dict, dict]:
+        with open(path, encoding="utf-8") as results_file:
+            data = json.load(results_file)
+        return data["meta"], {
+            (r["scenario"], r["concurrency"]): r for r in data["results"]
+        }
+
+    base_meta, base = load(args.base)
+    head_meta, head = load(args.head)
+    print(
+        f"base {base_meta['commit'][:12]} ({base_meta['scale']}) -> "
+        f"head {head_meta['commit'][:12]} ({head_meta['scale']})\n"
+    )
+    print(
+        f"{'scenario':<16} {'conc':>4} {'req/s':>10} {'change':>8} "
+        f"{'p95 ms':>10} {'change':>8}"
+    )
+
+    regressions = []
+    for key in sorted(base.keys() & head.keys()):
+        before, after = base[key], head[key]
+        throughput = change(before["throughput_rps"], after["throughput_rps"])
+        p95 = change(before["latency_p95_ms"], after["latency_p95_ms"])
+        if (throughput is not None and throughput < -args.threshold) or (
+            p95 is not None and p95 > args.threshold
+        ):
+            regressions.append(key)
+        print(
+            f"{key[0]:<16} {key[1]:>4} {after['throughput_rps']:>10,.1f} "
+            f"{throughput if throughput is not None else 0:>+7.1f}% "
+            f"{after['latency_p95_ms']:>10,.1f} "
+            f"{p95 if p95 is not None else 0:>+7.1f}%"
+            + ("  regression" if key in regressions else "")
+        )
+    for key in sorted(base.keys() ^ head.keys()):
+        only_in = args.base if key in base else args.head
+        print(f"{key[0]:<16} {key[1]:>4} only in {only_in}")
+
+    if regressions and args.fail_on_regression:
+        sys.exit(f"{len(regressions)} regression(s) above {args.threshold:g}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    seed_parser = commands.add_parser("seed", help="Load a synthetic corpus")
+    seed_parser.add_argument("--scale", choices=SCALES, default="small")
+    seed_parser.add_argument("--seed", type=int, default=0)
+    seed_parser.add_argument("--force", action="store_true")
+    seed_parser.set_defaults(handler=seed_corpus)
+
+    run_parser = commands.add_parser("run", help="Run the load scenarios")
+    run_parser.add_argument("--scale", choices=SCALES, default="small")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    run_parser.add_argument("--start-server", action="store_true")
+    run_parser.add_argument("--workers", type=int, default=1)
+    run_parser.add_argument("--startup-timeout", type=float, default=60)
+    run_parser.add_argument(
+        "--scenarios",
+        nargs="+",
+        default=list(SCENARIOS),
+        choices=SCENARIOS,
+    )
+    run_parser.add_argument(
+        "--concurrency", type=int, nargs="+", default=[1, 8, 32]
+    )
+    run_parser.add_argument("--requests", type=int, default=500)
+    run_parser.add_argument("--warmup", type=int, default=50)
+    run_parser.add_argument("--timeout", type=float, default=60)
+    run_parser.add_argument("--poll-interval", type=float, default=0.5)
+    run_parser.add_argument("--output", default="")
+    run_parser.set_defaults(handler=run)
+
+    compare_parser = commands.add_parser("compare", help="Diff two runs")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("head")
+    compare_parser.add_argument("--threshold", type=float, default=10)
+    compare_parser.add_argument("--fail-on-regression", action="store_true")
+    compare_parser.set_defaults(handler=compare)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Local stand-in for the news sites scraped by ``/rss-scrape``.
+
+Each "domain" is its own server (and port) with one RSS feed per category and
+canned article pages linked from the feed.
+"""
+
+import random
+from contextlib import ExitStack, contextmanager
+
+from benchmarks.fixture_server import serve
+from benchmarks.portal_fixture import WORDS
+
+CATEGORIES = ("Politics", "Business", "Health")
+
+
+def article_page(title: str, paragraphs: int, rng: random.Random) -> bytes:
+    body = "".join(
+        f"<p>{' '.join(rng.choices(WORDS, k=rng.randint(20, 60)))}.</p>"
+        for _ in range(paragraphs)
+    )
+    return (
+        (
+            "<!DOCTYPE html><html><head><title>{0}</title></head><body>"
+            "<nav><p>Menu</p></nav><article><h1>{0}</h1>{1}</article>"
+            "<footer><p>Footer</p></footer></body></html>"
+        )
+        .format(title, body)
+        .encode()
+    )
+
+
+def feed(base_url: str, category: str, items: int) -> bytes:
+    entries = "".join(
+        f"<item><title>{category} story {i}</title>"
+        f"<link>{base_url}/article/{category}-{i}.html</link></item>"
+        for i in range(items)
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+        f"<title>{category}</title>{entries}</channel></rss>"
+    ).encode()
+
+
+@contextmanager
+def serve_news_sites(
+    domains: int = 3,
+    items: int = 30,
+    latency: float = 0.05,
+    etags: bool = False,
+):
+    """
+    Starts ``domains`` fake news sites.
+
+    Yields:
+        Category -> feed URLs, shaped like the ``sources`` of ``rss_data``.
+    """
+    rng = random.Random(0)
+    sources: dict[str, list[str]] = {category: [] for category in CATEGORIES}
+    with ExitStack() as stack:
+        for _ in range(domains):
+            routes: dict[str, tuple[str, bytes]] = {}
+            base_url = stack.enter_context(
+                serve(routes, latency=latency, etags=etags)
+            )
+            for category in CATEGORIES:
+                routes[f"/feed/{category}.xml"] = (
+                    "application/rss+xml",
+                    feed(base_url, category, items),
+                )
+                for i in range(items):
+                    routes[f"/article/{category}-{i}.html"] = (
+                        "text/html; charset=utf-8",
+                        article_page(f"{category} story {i}", 8, rng),
+                    )
+                sources[category].append(f"{base_url}/feed/{category}.xml")
+        yield sources
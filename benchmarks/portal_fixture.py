@@ -0,0 +1,84 @@
+"""
+Local stand-in for the Pure Portal publication listing.
+
+Serves either synthetic results pages or pages saved from the real portal
+(``page-0.html``, ``page-1.html``, ... in a directory) at
+``/publications/?page=N`` with an optional artificial latency.
+"""
+
+import os
+import random
+
+from benchmarks.fixture_server import serve
+
+LISTING_PATH = "/publications/"
+
+WORDS = (
+    "market finance risk policy economic growth bank capital trade labour "
+    "inflation monetary fiscal firm accounting audit investment climate "
+    "energy health innovation regional household credit crisis evidence"
+).split()
+
+
+def synthetic_page(
+    page: int, pages: int, per_page: int = 50, seed: int = 0
+) -> str:
+    """Builds one results page shaped like the portal markup."""
+    rng = random.Random(seed * 100_003 + page)
+    results = []
+    for i in range(per_page):
+        title = " ".join(rng.choices(WORDS, k=rng.randint(4, 12))).capitalize()
+        authors = "".join(
+            f'<a rel="Person" href="/en/persons/p{rng.randint(1, 5000)}" '
+            f'class="link person"><span>Author {rng.randint(1, 5000)}</span></a>, '
+            for _ in range(rng.randint(1, 4))
+        )
+        results.append(f"""
+<li class="list-result-item">
+  <div class="result-container">
+    <div class="rendering rendering_researchoutput">
+      <h3 class="title"><a rel="ContributionToJournal" class="link"
+        href="/en/publications/pub-{page}-{i}"><span>{title}</span></a></h3>
+      {authors}
+      <span class="date">{rng.randint(1990, 2025)}</span>
+      <p class="type">Research output: Contribution to journal &rsaquo; Article</p>
+    </div>
+  </div>
+</li>""")
+    next_link = ""
+    if page + 1 < pages:
+        href = f"{LISTING_PATH}?page={page + 1}"
+        next_link = (
+            f'<li class="next"><a class="nextLink" href="{href}">Next</a></li>'
+        )
+
+    return f"""<!DOCTYPE html>
+<html><head><title>Publications</title></head>
+<body><div id="main-content"><ul class="list-results">{"".join(results)}</ul>
+<nav class="pages"><ul>{next_link}</ul></nav></div></body></html>"""
+
+
+def load_saved_pages(directory: str) -> list[str]:
+    """Loads ``page-N.html`` files saved from the real portal, in order."""
+    pages = []
+    while os.path.exists(os.path.join(directory, f"page-{len(pages)}.html")):
+        with open(
+            os.path.join(directory, f"page-{len(pages)}.html"), encoding="utf-8"
+        ) as f:
+            pages.append(f.read())
+    return pages
+
+
+def page_routes(pages: list[str]) -> dict[str, tuple[str, bytes]]:
+    """Routes of ``pages`` at ``/publications/?page=N``."""
+    routes = {
+        f"{LISTING_PATH}?page={i}": ("text/html; charset=utf-8", page.encode())
+        for i, page in enumerate(pages)
+    }
+    routes[LISTING_PATH] = routes[f"{LISTING_PATH}?page=0"]
+    return routes
+
+
+def serve_pages(pages: list[str], latency: float = 0.0, etags: bool = False):
+    """Serves ``pages`` at ``/publications/?page=N`` on a local port."""
+    return serve(page_routes(pages), latency=latency, etags=etags)
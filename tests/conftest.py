@@ -0,0 +1,47 @@
+import os
+
+import pytest
+
+# app.config requires the database settings; the database tests connect to
+# TEST_DATABASE_URL instead
+for name, value in {
+    "DB_NAME": "test",
+    "DB_USER": "test",
+    "DB_PASS": "test",
+    "DB_HOST": "localhost",
+    "DB_PORT": "5432",
+}.items():
+    os.environ.setdefault(name, value)
+
+
+@pytest.fixture(scope="session")
+def database_url() -> str:
+    """
+    URL of a disposable PostgreSQL database with the application's tables;
+    tests needing one are skipped unless TEST_DATABASE_URL is set.
+    """
+    url = os.environ.get("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL is not set")
+
+    from sqlmodel import SQLModel, create_engine
+
+    import app.models  # noqa: F401  Registers the tables
+
+    engine = create_engine(url)
+    SQLModel.metadata.create_all(engine)
+    engine.dispose()
+    return url
+
+
+@pytest.fixture
+def db_engine(database_url):
+    """Sync engine on the test database, with the scraped tables emptied."""
+    from sqlalchemy import text
+    from sqlmodel import create_engine
+
+    engine = create_engine(database_url)
+    with engine.begin() as connection:
+        connection.execute(text("TRUNCATE prediction, publication"))
+    yield engine
+    engine.dispose()
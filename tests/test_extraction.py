@@ -0,0 +1,41 @@
+import random
+
+import pytest
+
+from app.extraction import ExtractionPool, extract_article, extract_publications
+from app.routers.rss_scrape import parse_article
+from app.routers.scrape import parse_page
+from benchmarks.bench_extraction import EDGE_CASE_ARTICLES, EDGE_CASE_PAGES
+from benchmarks.news_fixture import article_page
+from benchmarks.portal_fixture import synthetic_page
+
+PAGES = EDGE_CASE_PAGES + [synthetic_page(i, 20) for i in range(20)]
+
+_rng = random.Random(0)
+ARTICLES = EDGE_CASE_ARTICLES + [
+    article_page(f"Story {i}", _rng.randint(3, 20), _rng).decode()
+    for i in range(20)
+]
+
+
+@pytest.mark.parametrize("page", PAGES)
+def test_publications_match_beautifulsoup(page):
+    assert extract_publications(page) == parse_page(page)
+
+
+@pytest.mark.parametrize("page", ARTICLES)
+def test_article_matches_beautifulsoup(page):
+    assert extract_article(page) == parse_article(page)
+
+
+def test_pool_matches_in_process():
+    pool = ExtractionPool(processes=2, min_batch=1)
+    try:
+        assert pool.map(extract_publications, PAGES) == [
+            extract_publications(page) for page in PAGES
+        ]
+        assert pool.map(extract_article, ARTICLES) == [
+            extract_article(page) for page in ARTICLES
+        ]
+    finally:
+        pool.shutdown()
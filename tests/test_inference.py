@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from app.inference import SnapshotVectorizer, predict_batch
+from app.preprocessing import clean_texts
+from app.training import fit_classifier, fit_streaming, update_classifier
+from benchmarks.common import synthetic_documents
+
+# Largest difference allowed between engine and sklearn probabilities
+TOLERANCE = 1e-9
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    return synthetic_documents(2_000)
+
+
+@pytest.fixture(scope="module")
+def test_texts():
+    return [text for text, _ in synthetic_documents(200, seed=1)]
+
+
+def fit_in_memory(corpus):
+    return fit_classifier(*zip(*corpus), n_jobs=1)
+
+
+def fit_uncompacted(corpus):
+    return fit_classifier(*zip(*corpus), n_jobs=1, compact=False)
+
+
+def fit_chunked(corpus):
+    classes = sorted({label for _, label in corpus})
+    chunks = (corpus[i : i + 500] for i in range(0, len(corpus), 500))
+    return fit_streaming(chunks, classes, n_features=2**16)
+
+
+def fit_incremental(corpus):
+    split = len(corpus) * 9 // 10
+    base = fit_classifier(*zip(*corpus[:split]), n_jobs=1)
+    texts, labels = zip(*corpus[split:])
+    return update_classifier(base, texts, labels, watermark=len(corpus))
+
+
+def fit_binary(corpus):
+    classes = sorted({label for _, label in corpus})[:2]
+    return fit_classifier(
+        *zip(*[row for row in corpus if row[1] in classes]), n_jobs=1
+    )
+
+
+@pytest.mark.parametrize(
+    "fit",
+    [fit_in_memory, fit_uncompacted, fit_chunked, fit_incremental, fit_binary],
+)
+def test_engine_matches_sklearn(fit, corpus, test_texts):
+    artifact = fit(corpus)
+    X = artifact["vectorizer"].transform(test_texts)
+
+    expected = artifact["model"].predict_proba(X)
+    actual = artifact["engine"].predict_proba(X)
+
+    assert actual.shape == expected.shape
+    np.testing.assert_allclose(actual, expected, rtol=0, atol=TOLERANCE)
+
+
+def test_predict_batch_matches_sklearn(corpus, test_texts):
+    artifact = fit_in_memory(corpus)
+    X = artifact["vectorizer"].transform(clean_texts(test_texts))
+
+    result = predict_batch(artifact, test_texts)
+
+    np.testing.assert_allclose(
+        result.probabilities,
+        artifact["model"].predict_proba(X),
+        rtol=0,
+        atol=TOLERANCE,
+    )
+    assert list(result.labels) == list(artifact["model"].predict(X))
+
+
+def test_empty_vocabulary_matches_nothing(corpus):
+    vectorizer = fit_in_memory(corpus)["vectorizer"]
+    empty = SnapshotVectorizer(
+        np.array([], dtype=np.bytes_),
+        np.array([], dtype=np.int64),
+        np.array([]),
+        vectorizer.params,
+    )
+    assert list(empty.contains(["news", "market"])) == [False, False]
+    assert empty.contains([]).shape == (0,)
+    assert empty.transform(["some news", ""]).shape == (2, 0)
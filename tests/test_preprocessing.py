@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.inference import predict_batch
+from app.preprocessing import clean_text, clean_texts, normalize_document
+from app.training import fit_classifier, fit_streaming
+from benchmarks.bench_preprocessing import (
+    EDGE_CASES,
+    reference_clean_text,
+    reference_normalize_document,
+)
+from benchmarks.common import synthetic_documents
+
+
+def noisy(text: str) -> str:
+    """``text`` as raw documents arrive: case, punctuation and layout."""
+    return f"  {text[:30].upper()}!! -- {text[30:]}?\n\t(see: {text[:10]}...)"
+
+
+RAW_TEXTS = EDGE_CASES + [
+    noisy(text) for text, _ in synthetic_documents(200, seed=1)
+]
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    return [(noisy(text), label) for text, label in synthetic_documents(2_000)]
+
+
+@pytest.mark.parametrize("text", EDGE_CASES)
+def test_clean_text_matches_reference(text):
+    assert clean_text(text) == reference_clean_text(text)
+
+
+@pytest.mark.parametrize("text", EDGE_CASES)
+def test_normalize_document_matches_reference(text):
+    assert normalize_document(text) == reference_normalize_document(text)
+
+
+def test_clean_texts_batches():
+    expected = [clean_text(text) for text in RAW_TEXTS]
+    series = pd.Series(RAW_TEXTS, index=range(10, 10 + len(RAW_TEXTS)))
+
+    cleaned = clean_texts(series)
+
+    assert clean_texts(RAW_TEXTS) == expected
+    assert clean_texts(RAW_TEXTS, processes=2) == expected
+    assert isinstance(cleaned, pd.Series)
+    assert cleaned.index.equals(series.index)
+    assert list(cleaned) == expected
+
+
+def test_inference_cleans_like_training(corpus):
+    artifact = fit_classifier(*zip(*corpus), n_jobs=1)
+    X = artifact["vectorizer"].transform(
+        [reference_clean_text(text) for text in RAW_TEXTS]
+    )
+
+    result = predict_batch(artifact, RAW_TEXTS)
+
+    np.testing.assert_allclose(
+        result.probabilities,
+        artifact["engine"].predict_proba(X),
+        rtol=0,
+        atol=1e-12,
+    )
+
+
+def test_fit_classifier_cleans_texts(corpus):
+    texts, labels = zip(*corpus)
+    raw = fit_classifier(texts, labels, n_jobs=1)
+    cleaned = fit_classifier(clean_texts(list(texts)), labels, n_jobs=1)
+
+    np.testing.assert_array_equal(
+        raw["vectorizer"].terms, cleaned["vectorizer"].terms
+    )
+    assert all(
+        clean_text(term.decode()) == term.decode()
+        for term in raw["vectorizer"].terms
+    )
+
+
+def test_fit_streaming_cleans_texts(corpus):
+    classes = sorted({label for _, label in corpus})
+    cleaned_corpus = [(clean_text(text), label) for text, label in corpus]
+    raw = fit_streaming([corpus], classes, n_features=2**16)
+    cleaned = fit_streaming([cleaned_corpus], classes, n_features=2**16)
+    X = raw["vectorizer"].transform(clean_texts(RAW_TEXTS))
+
+    np.testing.assert_array_equal(
+        raw["engine"].predict_proba(X), cleaned["engine"].predict_proba(X)
+    )
@@ -0,0 +1,48 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.database import get_async_db
+from app.routers import search
+
+
+@pytest.fixture
+def calls():
+    """Options of every search the endpoint ran."""
+    return []
+
+
+@pytest.fixture
+def client(monkeypatch, calls):
+    async def run_search_async(db, query, **options):
+        calls.append(options)
+        if query == "broken":
+            raise ValueError("not a cursor problem")
+        return search.SearchPage(total=0, total_is_exact=True)
+
+    monkeypatch.setattr(search, "run_search_async", run_search_async)
+    app = FastAPI()
+    app.include_router(search.router)
+    app.dependency_overrides[get_async_db] = lambda: None
+    return TestClient(app)
+
+
+def test_invalid_cursor_is_a_bad_request(client, calls):
+    response = client.get("/api/search", params={"query": "a", "cursor": "x"})
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid cursor."}
+    assert calls == []
+
+
+def test_valid_cursor_is_searched(client, calls):
+    cursor = search.encode_cursor(0.5, 7)
+    response = client.get(
+        "/api/search", params={"query": "a", "cursor": cursor}
+    )
+    assert response.status_code == 200
+    assert calls[0]["cursor"] == cursor
+
+
+def test_search_errors_are_not_reported_as_invalid_cursors(client):
+    with pytest.raises(ValueError, match="not a cursor problem"):
+        client.get("/api/search", params={"query": "broken"})
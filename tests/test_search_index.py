@@ -0,0 +1,43 @@
+from app.search_index import IndexedPublication, PublicationIndex, parse_query
+
+INDEX = PublicationIndex.build(
+    IndexedPublication(
+        id=i,
+        title=f"Deep learning study {i}" if i % 3 else f"Data study {i}",
+        authors=[{"name": f"Author {i % 4}", "link": ""}],
+        link=f"/en/publications/study-{i}",
+        year="2020",
+    )
+    for i in range(1, 31)
+)
+
+
+def pages(query: str, limit: int):
+    terms, require_all = parse_query(query)
+    after = None
+    while True:
+        rows, has_more, total = INDEX.search(
+            terms, limit, after=after, require_all=require_all
+        )
+        yield rows, total
+        if not has_more:
+            return
+        after = rows[-1][1], rows[-1][0]
+
+
+def test_cursor_pages_report_the_total_of_the_query():
+    terms, require_all = parse_query("learning | study")
+    everything, _, total = INDEX.search(terms, 100, require_all=require_all)
+    assert total == len(everything) == 30
+
+    results = list(pages("learning | study", 7))
+    assert len(results) == 5
+    assert [total for _, total in results] == [30] * 5
+    assert [row for rows, _ in results for row in rows] == list(everything)
+
+
+def test_offset_pages_report_the_total_of_the_query():
+    terms, require_all = parse_query("learning & study")
+    first = INDEX.search(terms, 5, require_all=require_all)
+    second = INDEX.search(terms, 5, offset=5, require_all=require_all)
+    assert first[2] == second[2] == 20
@@ -0,0 +1,94 @@
+import asyncio
+import io
+
+import pytest
+from pandas.errors import ParserError
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models import Prediction, Publication
+from app.services import bulk_load_csv_async, copy_records
+
+
+def predictions(engine) -> list[tuple]:
+    with engine.connect() as connection:
+        return list(
+            connection.execute(
+                text("SELECT content, category FROM prediction ORDER BY id")
+            )
+        )
+
+
+def load_csv(database_url: str, csv: str, chunksize: int, commit: bool):
+    async def load():
+        engine = create_async_engine(
+            database_url.replace("postgresql://", "postgresql+asyncpg://", 1)
+        )
+        try:
+            async with AsyncSession(engine) as session:
+                counts = await bulk_load_csv_async(
+                    session,
+                    io.BytesIO(csv.encode()),
+                    Prediction,
+                    ["content", "category"],
+                    chunksize=chunksize,
+                )
+                if commit:
+                    await session.commit()
+                return counts
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(load())
+
+
+def test_bulk_load_csv_async_commits_with_the_session(db_engine):
+    csv = "content,category\na,Politics\nb,Health\n ,Health\nc,Business\n"
+    url = db_engine.url.render_as_string(hide_password=False)
+
+    assert load_csv(url, csv, chunksize=2, commit=False) == {
+        "inserted": 3,
+        "skipped": 1,
+    }
+    assert predictions(db_engine) == []
+
+    load_csv(url, csv, chunksize=2, commit=True)
+    assert predictions(db_engine) == [
+        ("a", "Politics"),
+        ("b", "Health"),
+        ("c", "Business"),
+    ]
+
+
+def test_bulk_load_csv_async_is_all_or_nothing(db_engine):
+    # Truncated upload: the second chunk ends inside a quoted field
+    csv = 'content,category\na,Politics\nb,Health\n"c,Business\n'
+    url = db_engine.url.render_as_string(hide_password=False)
+
+    with pytest.raises(ParserError):
+        load_csv(url, csv, chunksize=2, commit=True)
+    assert predictions(db_engine) == []
+
+
+def test_copy_records_keeps_null_apart_from_empty_strings(db_engine):
+    rows = [
+        ("Null year", "/a", [{"name": "A", "link": ""}], None),
+        ("Empty year", "/b", [], ""),
+        ('Quoted "title",\nnew line', "/c", [{"name": 'B "b"'}], "2020"),
+    ]
+    with Session(db_engine) as session:
+        count = copy_records(
+            session, Publication, ["title", "link", "authors", "year"], rows
+        )
+        session.commit()
+
+    assert count == 3
+    with db_engine.connect() as connection:
+        stored = connection.execute(
+            text(
+                "SELECT title, link, authors, year FROM publication ORDER BY id"
+            )
+        )
+        assert [tuple(row) for row in stored] == rows
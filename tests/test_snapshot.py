@@ -0,0 +1,27 @@
+import shutil
+
+import numpy as np
+import pytest
+
+from app.snapshot import current_version, load_snapshot, write_snapshot
+
+
+def test_load_maps_the_newest_version_once_a_version_is_pruned(tmp_path):
+    root = str(tmp_path)
+    old = write_snapshot("index", {"values": np.arange(3)}, root=root)
+    for i in range(3):
+        write_snapshot("index", {"values": np.arange(4 + i)}, root=root)
+
+    # ``old`` was read from the pointer before newer versions pruned it
+    snapshot = load_snapshot("index", old, root)
+    assert snapshot.version == current_version("index", root) != old
+    assert list(snapshot.arrays["values"]) == list(range(6))
+
+
+def test_load_raises_when_the_current_version_is_missing(tmp_path):
+    root = str(tmp_path)
+    version = write_snapshot("index", {"values": np.arange(3)}, root=root)
+    shutil.rmtree(tmp_path / "index" / version)
+
+    with pytest.raises(FileNotFoundError):
+        load_snapshot("index", root=root)